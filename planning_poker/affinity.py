@@ -0,0 +1,70 @@
+"""
+Répartition des rooms entre les workers de `runasgi --workers N`.
+
+Chaque room est servie par un seul worker, choisi par hachage de son nom : le superviseur
+de runasgi transmet au worker de la room toutes les connexions qui la visent, websockets
+comme pages (voir runasgi.Supervisor). Le RoomState d'une room n'existe donc que dans un
+processus et y fait autorité.
+"""
+
+import zlib
+from functools import lru_cache
+from urllib.parse import unquote, urlsplit
+
+from django.conf import settings
+from django.urls import Resolver404, get_resolver
+from django.urls.resolvers import RegexPattern, URLResolver
+
+
+class RoomNotServedHere(Exception):
+    """
+    @brief La room est confiée à un autre worker : ce processus ne doit pas charger son état.
+    """
+
+
+@lru_cache(maxsize=None)
+def _resolvers():
+    from .routing import websocket_urlpatterns
+
+    return get_resolver(), URLResolver(RegexPattern(r'^/'), websocket_urlpatterns)
+
+
+def room_of(target):
+    """
+    @brief Room visée par une requête HTTP ou websocket.
+
+    @param target Cible de la ligne de requête (chemin et query string).
+
+    @return Le paramètre room_name de la route correspondante, ou None si la requête ne vise
+    pas une room.
+    """
+    path = unquote(urlsplit(target).path)
+    for resolver in _resolvers():
+        try:
+            match = resolver.resolve(path)
+        except Resolver404:
+            continue
+        return match.kwargs.get('room_name')
+    return None
+
+
+def worker_for(room_name, workers):
+    """
+    @brief Worker chargé d'une room.
+
+    @param room_name Nom de la room.
+    @param workers Nombre de workers.
+
+    @return Indice du worker, entre 0 et workers - 1 (stable d'un processus à l'autre).
+    """
+    return zlib.crc32(room_name.encode()) % workers
+
+
+def serves_room(room_name):
+    """
+    @brief Indique si la room est confiée au worker courant (POKER_WORKER_INDEX sur
+    POKER_WORKER_COUNT, toujours vrai hors superviseur).
+
+    @param room_name Nom de la room.
+    """
+    return worker_for(room_name, settings.POKER_WORKER_COUNT) == settings.POKER_WORKER_INDEX
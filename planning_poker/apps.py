@@ -1,6 +1,24 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
 
 # configuration de l'application
 class PlanningPokerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'planning_poker'
+
+    def ready(self):
+        """
+        @brief Active la collecte des métriques (comptage des requêtes SQL, publication multi-processus)
+        et l'invalidation du cache des rooms.
+        """
+        from .metrics import REGISTRY, install_query_counter
+        from .models import PokerRoom, Feature
+        from .room_cache import room_changed
+
+        connection_created.connect(install_query_counter, dispatch_uid='poker_query_counter')
+        REGISTRY.start_writer()
+
+        post_save.connect(room_changed, sender=PokerRoom, dispatch_uid='poker_room_saved')
+        post_delete.connect(room_changed, sender=PokerRoom, dispatch_uid='poker_room_deleted')
+        post_save.connect(room_changed, sender=Feature, dispatch_uid='poker_feature_saved')
@@ -1,13 +1,53 @@
-import json
+import time
+from urllib.parse import parse_qs
 from channels.generic.websocket import AsyncWebsocketConsumer
-from asgiref.sync import sync_to_async
-from .models import PokerRoom, Player
-import asyncio
+from django.db import DatabaseError
+from .models import PokerRoom
+from .room_state import get_room_state, release_room_state
+from .affinity import RoomNotServedHere
+from .rounds import complete_round
+from .protocol import negotiate
+from .tally import COFFEE_CARD, VOTE_VALUES, compute_tally, decide, stats_payload
+from .outbox import OUTBOX_LIMIT, SLOW_CLOSE_CODE, Outbox
+from .metrics import (
+    ACTIVE_CONNECTIONS, MESSAGES_RECEIVED, GROUP_SENDS, SLOW_DISCONNECTS, VOTE_BROADCAST_LATENCY, track_handler
+)
 
 class PokerConsumer(AsyncWebsocketConsumer):
     """
     Consommateur pour le planning poker.
 
+    @details Toutes les modifications d'état provoquées par une action (vote, révélation...)
+    sont envoyées aux joueurs dans un seul message `room_update`, dont le champ `changes`
+    peut contenir les clés suivantes :
+    - `vote` : {"player", "vote"} du joueur qui vient de voter ;
+    - `all_voted` : tous les joueurs ont voté ;
+    - `not_voted` : liste des joueurs sans vote ;
+    - `reveal` : {"votes", "unanimity", "estimate", "stats"} résultat de la révélation :
+      `unanimity` indique si la règle de consensus du mode de la room est satisfaite,
+      `estimate` la valeur retenue, `stats` le décompte (voir tally.stats_payload()) ;
+    - `feature` : fonctionnalité en cours (null si le backlog est épuisé) ;
+    - `final_backlog` : fonctionnalités estimées, quand le backlog est terminé ;
+    - `redirect` : URL vers laquelle rediriger les joueurs ;
+    - `departed` : joueurs retirés de la room faute de heartbeat (voir presence.py).
+
+    Le client envoie un message `heartbeat` toutes les 15 secondes. Les joueurs absents
+    sont balayés à la réception de chaque message, par lots de SWEEP_BATCH au plus.
+
+    Chaque `room_update` porte un numéro de séquence `seq`. À la connexion, le joueur reçoit
+    un message `snapshot` (époque, séquence, fonctionnalité, joueurs sans vote, son vote).
+    Un client qui se reconnecte avec `?resume=<époque>:<seq>` ne reçoit que les mises à jour
+    manquées (ou un instantané s'il est trop en retard), garde son vote, et rien n'est
+    diffusé au reste de la room.
+
+    Le format des trames (JSON ou MessagePack) est négocié par sous-protocole websocket
+    à la connexion, voir protocol.negotiate().
+
+    Les messages destinés au joueur passent par une file d'envoi bornée (voir outbox.py) où
+    les états `not_voted` et `all_voted` encore en attente sont remplacés par les plus
+    récents. Un joueur dont la file dépasse OUTBOX_LIMIT messages est déconnecté (code
+    SLOW_CLOSE_CODE, raison `resume=<époque>:<seq>`) et reprend avec `?resume=`.
+
     @param AsyncWebsocketConsumer: Classe de consommateur asynchrone.
     """
 
@@ -17,6 +57,8 @@ class PokerConsumer(AsyncWebsocketConsumer):
         """
         self.room_name = self.scope['url_route']['kwargs']['room_name']
         self.room_group_name = f"poker_{self.room_name}"
+        self.codec = negotiate(self.scope.get('subprotocols'))
+        self.outbox = Outbox(self.write_message, OUTBOX_LIMIT)
 
         self.pseudo = self.scope['session'].get('pseudo', None)
         if not self.pseudo:
@@ -27,41 +69,46 @@ class PokerConsumer(AsyncWebsocketConsumer):
         print(f"DEBUG: Pseudo détecté dans la session : {self.pseudo}")
 
         try:
-            self.room = await sync_to_async(PokerRoom.objects.get)(name=self.room_name)
+            self.state = await get_room_state(self.room_name)
+            self.state.connections += 1
 
-            player, created = await sync_to_async(Player.objects.get_or_create)(
-                room=self.room,
-                name=self.pseudo,
-                defaults={'vote': None}
-            )
-            if not created and player.vote is not None:
-                player.vote = None
-                await sync_to_async(player.save)()
+            resume = self.get_resume_position()
+            resuming = resume is not None and self.pseudo in self.state.players
+            if resuming:
+                self.state.reattach(self.pseudo)
+            else:
+                self.state.join(self.pseudo)
 
             await self.channel_layer.group_add(
                 self.room_group_name,
                 self.channel_name
             )
-            await self.accept()
-
-            not_voted = await self.get_not_voted_players()
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {"type": "not_voted_update", "not_voted": not_voted}
-            )
+            await self.accept(subprotocol=self.codec.subprotocol)
+            ACTIVE_CONNECTIONS.inc()
+
+            if resuming:
+                missed = self.state.updates_since(*resume)
+                # au-delà de la taille de la file, un instantané est plus court que le rattrapage
+                if missed is not None and len(missed) <= OUTBOX_LIMIT:
+                    # les doublons éventuels avec le groupe sont écartés par le client grâce à seq
+                    for seq, changes in missed:
+                        await self.room_update({"seq": seq, "changes": changes})
+                    print(f"DEBUG: Reprise de {self.pseudo} : {len(missed)} mise(s) à jour renvoyée(s)")
+                    return
+            else:
+                await self.broadcast(not_voted=self.get_not_voted_players())
 
-            backlog = json.loads(self.room.backlog) if self.room.backlog else []
-            current_feature = backlog[0] if backlog else None
-            if current_feature:
-                await self.send(text_data=json.dumps({
-                    "type": "feature_update",
-                    "feature": current_feature
-                }))
+            await self.send_snapshot()
 
             print(f"DEBUG: Nouveau joueur connecté : {self.pseudo} dans {self.room_group_name}")
         except PokerRoom.DoesNotExist:
             await self.close()
             return
+        except RoomNotServedHere as error:
+            # connexion arrivée sans passer par le superviseur : refusée plutôt que de créer un second état
+            print(f"ERROR: {error}")
+            await self.close()
+            return
 
     async def disconnect(self, close_code):
         """
@@ -73,331 +120,314 @@ class PokerConsumer(AsyncWebsocketConsumer):
 
         @return Rien.
         """
+        if hasattr(self, 'outbox'):
+            self.outbox.close()
+        if not hasattr(self, 'state'):
+            return
+        ACTIVE_CONNECTIONS.dec()
+        self.state.detach(self.pseudo)
         await self.channel_layer.group_discard(
             self.room_group_name,
             self.channel_name
         )
+        self.state.connections -= 1
+        if self.state.connections <= 0:
+            await release_room_state(self.state)
         print(f"DEBUG: Channel {self.channel_name} retiré du groupe {self.room_group_name}")
 
-    async def receive(self, text_data):
+    async def receive(self, text_data=None, bytes_data=None):
         """
         @brief Réception de données.
 
         @param self: Instance de la classe.
 
-        @param text_data: Données textuelles.
+        @param text_data: Données textuelles (protocole JSON).
+
+        @param bytes_data: Données binaires (protocole MessagePack).
 
         @return Rien.
         """
-        data = json.loads(text_data)
-        if data['type'] == 'vote':
-            await self.handle_vote(data)
-        elif data['type'] == 'reveal':
-            print("DEBUG: Appel à reveal_votes")
-            await self.reveal_votes(data)
-        elif data['type'] == 'start_feature':
-            await self.start_feature_voting()
-        else:
-            await self.send(text_data=json.dumps({"type": "error", "message": "Événement inconnu"}))
+        received_at = time.perf_counter()
+        try:
+            # ValueError couvre JSON, MessagePack, UTF-8 invalides et trames trop volumineuses
+            data = self.codec.decode(text_data, bytes_data)
+        except ValueError as error:
+            print(f"DEBUG: Trame illisible de {self.pseudo} : {error}")
+            MESSAGES_RECEIVED.inc('invalid')
+            await self.send_message({"type": "error", "message": "Message illisible"})
+            return
+        message_type = data.get('type')
+        # libellé borné : un client ne doit pas pouvoir créer des séries de métriques arbitraires
+        label = message_type if message_type in ('vote', 'reveal', 'start_feature', 'heartbeat') else 'unknown'
+        MESSAGES_RECEIVED.inc(label)
+        with track_handler(label):
+            if message_type == 'heartbeat':
+                await self.handle_heartbeat()
+            elif message_type == 'vote':
+                await self.handle_vote(data)
+                VOTE_BROADCAST_LATENCY.observe(time.perf_counter() - received_at)
+            elif message_type == 'reveal':
+                print("DEBUG: Appel à reveal_votes")
+                await self.reveal_votes(data)
+            elif message_type == 'start_feature':
+                await self.start_feature_voting()
+            else:
+                await self.send_message({"type": "error", "message": "Événement inconnu"})
+            await self.sweep_departed()
 
-    async def handle_vote(self, data):
+    async def handle_heartbeat(self):
         """
-        @brief Gère le vote d'un joueur et vérifie si tous ont voté.
+        @brief Prolonge la présence du joueur ; s'il avait été retiré entre-temps, il revient
+        dans la room sans vote et reçoit un instantané pour que son affichage (carte choisie)
+        suive.
 
         @param self: Instance de la classe.
 
-        @param data: Données du vote.
+        @return Rien.
+        """
+        if self.state.heartbeat(self.pseudo):
+            print(f"DEBUG: Retour de {self.pseudo} dans {self.room_group_name}")
+            await self.broadcast(not_voted=self.get_not_voted_players(), all_voted=self.state.all_voted)
+            await self.send_snapshot()
+
+    async def sweep_departed(self):
+        """
+        @brief Retire les joueurs dont la présence a expiré et prévient la room.
+
+        @param self: Instance de la classe.
 
         @return Rien.
         """
-        player = await sync_to_async(Player.objects.get)(room=self.room, name=data["player"])
-        print(f"DEBUG: Avant mise à jour, vote pour {player.name} = {player.vote}")
+        departed = self.state.sweep()
+        if not departed:
+            return
+        print(f"DEBUG: Joueurs partis de {self.room_group_name} : {departed}")
+        await self.broadcast(
+            departed=departed,
+            not_voted=self.get_not_voted_players(),
+            all_voted=self.state.all_voted,
+        )
 
-        player.vote = str(data["vote"]).strip()
-        await sync_to_async(player.save)()
-        print(f"DEBUG: Après mise à jour, vote pour {player.name} = {player.vote}")
+    async def send_message(self, message):
+        """
+        @brief Place un message dans la file d'envoi du joueur ; ferme la connexion si le
+        joueur ne suit plus.
 
-        await asyncio.sleep(0.1)
+        @param self: Instance de la classe.
 
-        not_voted = await self.get_not_voted_players()
-        print(f"DEBUG: Liste des joueurs sans vote après mise à jour : {not_voted}")
+        @param message: Dictionnaire contenant une clé "type".
+
+        @return Rien.
+        """
+        if not self.outbox.put(message):
+            await self.close_slow_connection()
 
-        all_voted = len(not_voted) == 0
+    async def write_message(self, message):
+        """
+        @brief Envoie un message au joueur dans le format négocié à la connexion (tâche
+        d'envoi de la file).
 
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                "type": "player_vote",
-                "player": player.name,
-                "vote": player.vote,
-                "all_voted": all_voted,
-                "not_voted": not_voted,
-            }
-        )
+        @param self: Instance de la classe.
 
-        await self.channel_layer.group_send(
-            self.room_group_name,
-            {
-                "type": "not_voted_update",
-                "not_voted": not_voted,
-            }
-        )
+        @param message: Dictionnaire contenant une clé "type".
 
-        print(f"DEBUG: Player {player.name} voted {player.vote}. All voted: {all_voted}")
+        @return Rien.
+        """
+        text_data, bytes_data = self.codec.encode(message)
+        await self.send(text_data=text_data, bytes_data=bytes_data)
 
-    async def reveal_votes(self, event=None):
+    async def close_slow_connection(self):
         """
-        Révèle les votes des joueurs et détermine si la condition (majorité ou unanimité) est atteinte.
+        @brief Ferme la connexion d'un joueur trop lent, avec sa position de reprise.
 
         @param self: Instance de la classe.
-        @param event: Événement.
 
         @return Rien.
         """
-        players = await sync_to_async(list)(Player.objects.filter(room=self.room))
-        votes = [{"name": player.name, "vote": str(player.vote).strip()} for player in players]
+        SLOW_DISCONNECTS.inc()
+        position = self.outbox.position
+        print(f"DEBUG: {self.pseudo} trop lent ({len(self.outbox)} messages en attente), déconnexion")
+        self.outbox.close()
+        reason = f"resume={self.state.epoch}:{position}" if position is not None else ""
+        await self.close(code=SLOW_CLOSE_CODE, reason=reason)
+
+    def get_resume_position(self):
+        """
+        @brief Lit la position de reprise `?resume=<époque>:<seq>` de l'URL du websocket.
 
-        if any(vote["vote"] in [None, "None", ""] for vote in votes):
-            print("DEBUG: Tous les joueurs n'ont pas encore voté.")
-            return
+        @param self: Instance de la classe.
 
-        vote_values = [vote["vote"] for vote in votes]
-        mode = self.room.mode
+        @return Tuple (époque, seq), ou None si absente ou invalide.
+        """
+        query = parse_qs(self.scope.get('query_string', b'').decode())
+        epoch, _, seq = query.get('resume', [''])[0].partition(':')
+        if not epoch or not seq.isdigit():
+            return None
+        return epoch, int(seq)
 
-        if mode == 'unanimity':
-            condition_met = len(set(vote_values)) == 1
-        elif mode == 'absolute_majority':
-            if len(vote_values) == 1:
-                condition_met = True
-            else:
-                condition_met = any(vote_values.count(v) > len(vote_values) / 2 for v in set(vote_values))
-        else:
-            condition_met = False
-
-        print(f"DEBUG: Votes: {votes}, Condition atteinte: {condition_met}")
-
-        backlog = json.loads(self.room.backlog) if self.room.backlog else []
-        all_features = json.loads(self.room.all_features) if self.room.all_features else []
-
-        if condition_met:
-            if vote_values[0] == "200":
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        "type": "redirect",
-                        "url": f"/export/{self.room_name}/",
-                    }
-                )
-                return
+    async def broadcast(self, **changes):
+        """
+        @brief Envoie en un seul message toutes les modifications d'une action à la room.
 
-            if backlog:
-                current_feature = backlog.pop(0)
-                current_feature["priority"] = vote_values[0]
-                all_features.append(current_feature)
-
-                self.room.backlog = json.dumps(backlog)
-                self.room.all_features = json.dumps(all_features)
-                await sync_to_async(self.room.save)()
-
-                next_feature = backlog[0] if backlog else None
-                await self.reset_votes()
-
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        "type": "reveal",
-                        "votes": votes,
-                        "unanimity": True,
-                    }
-                )
-                await self.channel_layer.group_send(
-                    self.room_group_name,
-                    {
-                        "type": "not_voted_update",
-                        "not_voted": await self.get_not_voted_players(),
-                    }
-                )
-
-                if next_feature:
-                    await self.channel_layer.group_send(
-                        self.room_group_name,
-                        {
-                            "type": "feature_update",
-                            "feature": next_feature,
-                        }
-                    )
-                else:
-                    await self.channel_layer.group_send(
-                        self.room_group_name,
-                        {
-                            "type": "final_backlog",
-                            "final_backlog": all_features,
-                        }
-                    )
-        else:
-            await self.reset_votes()
+        @details La numérotation et l'envoi se font sous le verrou de diffusion de la room :
+        deux envois concurrents ne peuvent pas livrer seq n+1 avant seq n, que le client
+        écarterait comme déjà reçu.
 
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {
-                    "type": "not_voted_update",
-                    "not_voted": await self.get_not_voted_players(),
-                }
-            )
+        @param self: Instance de la classe.
 
+        @param changes: Modifications à appliquer côté client (voir la doc de la classe).
+
+        @return Rien.
+        """
+        async with self.state.broadcast_lock:
+            seq = self.state.publish(changes)
+            GROUP_SENDS.inc()
             await self.channel_layer.group_send(
                 self.room_group_name,
                 {
-                    "type": "reveal",
-                    "votes": votes,
-                    "unanimity": False,
-                    "next_feature": backlog[0],
+                    "type": "room_update",
+                    "seq": seq,
+                    "changes": changes,
                 }
             )
 
-    async def start_feature_voting(self):
-        """
-        @brief Démarre le vote pour la première fonctionnalité du backlog.
+    async def send_snapshot(self):
         """
-        backlog = json.loads(self.room.backlog) if self.room.backlog else []
-        if backlog:
-            current_feature = backlog[0]
-            print(f"DEBUG: Début du vote pour la feature : {current_feature}")
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {"type": "feature_update", "feature": current_feature}
-            )
-        else:
-            print("DEBUG: Backlog vide.")
-            await self.channel_layer.group_send(
-                self.room_group_name,
-                {"type": "final_backlog", "final_backlog": []}
-            )
+        @brief Envoie à ce seul joueur un instantané de la room.
 
-
-    async def player_vote(self, event):
-        """
-        @brief Envoie le vote d'un joueur à tous les joueurs.
-        
         @param self: Instance de la classe.
-        
-        @param event: Événement.
 
         @return Rien.
         """
-        await self.send(text_data=json.dumps({
-            "type": "vote",
-            "player": event["player"],
-            "vote": event["vote"],
-            "all_voted": event["all_voted"],
-            "not_voted": event["not_voted"],
-        }))
+        await self.send_message({"type": "snapshot", **self.state.snapshot(self.pseudo)})
 
-    async def not_voted_update(self, event):
+    async def handle_vote(self, data):
         """
-        @brief Met à jour la liste des joueurs sans vote.
+        @brief Gère le vote du joueur connecté et vérifie si tous ont voté.
+
+        @details Le vote est attribué au pseudo de la session : le champ `player` envoyé
+        par le client est ignoré. Une valeur qui n'est pas une carte du jeu est refusée.
 
         @param self: Instance de la classe.
 
-        @param event: Événement.
+        @param data: Données du vote.
 
         @return Rien.
         """
-        await self.send(text_data=json.dumps(event))
+        name = self.pseudo
+        vote = str(data.get("vote")).strip()
+        if vote not in VOTE_VALUES:
+            print(f"DEBUG: Vote invalide de {name} : {data.get('vote')!r}")
+            await self.send_message({"type": "error", "message": "Vote invalide"})
+            return
+        not_voted, all_voted = self.state.record_vote(name, vote)
+        print(f"DEBUG: Liste des joueurs sans vote après mise à jour : {not_voted}")
+
+        await self.broadcast(
+            vote={"player": name, "vote": vote},
+            all_voted=all_voted,
+            not_voted=not_voted,
+        )
+
+        print(f"DEBUG: Player {name} voted {vote}. All voted: {all_voted}")
 
-    async def feature_update(self, event):
+    async def reveal_votes(self, event=None):
         """
-        @brief Envoie une nouvelle fonctionnalité à tous les joueurs.
+        Révèle les votes des joueurs et applique la règle de consensus du mode de la room (voir tally.py).
 
         @param self: Instance de la classe.
-
         @param event: Événement.
 
         @return Rien.
         """
-        await self.send(text_data=json.dumps({
-            "type": "feature_update",
-            "feature": event.get("feature"),
-            "votes": event.get("votes", []),
-            "unanimity": event.get("unanimity", False),
-        }))
+        votes = self.state.votes()
 
-    async def reset_votes(self):
-        """
-        @brief Réinitialise les votes de tous les joueurs.
+        if any(vote["vote"] in [None, "None", ""] for vote in votes):
+            print("DEBUG: Tous les joueurs n'ont pas encore voté.")
+            return
 
-        @param self: Instance de la classe.
+        tally = compute_tally(vote["vote"] for vote in votes)
+        estimate = decide(self.state.mode, tally)
+        stats = stats_payload(tally)
 
-        @return Rien.
-        """
-        players = await sync_to_async(list)(Player.objects.filter(room=self.room))
-        for player in players:
-            player.vote = None
-            await sync_to_async(player.save)()
-        print("DEBUG: Votes réinitialisés.")
+        print(f"DEBUG: Votes: {votes}, Valeur retenue: {estimate}")
 
-    async def get_not_voted_players(self):
-        """
-        @brief Récupère les joueurs qui n'ont pas encore voté.
+        if estimate is not None:
+            if estimate == COFFEE_CARD:
+                await self.broadcast(redirect=f"/export/{self.room_name}/")
+                return
 
-        @return Liste des noms des joueurs sans vote.
-        """
-        players = await sync_to_async(list)(Player.objects.filter(room=self.room))
-        return [player.name for player in players if player.vote is None]
+            if self.state.current_feature:
+                result = await self.complete_round(estimate)
+                if result is None:
+                    return
+                changes = {
+                    "reveal": {"votes": votes, "unanimity": True, "estimate": estimate, "stats": stats},
+                    "not_voted": result.not_voted,
+                    "feature": result.next_feature,
+                }
+                if not result.next_feature:
+                    changes["final_backlog"] = result.all_features
+                await self.broadcast(**changes)
+        else:
+            result = await self.complete_round()
+            if result is None:
+                return
+            await self.broadcast(
+                reveal={"votes": votes, "unanimity": False, "estimate": None, "stats": stats},
+                not_voted=result.not_voted,
+                feature=result.next_feature,
+            )
 
-    async def final_backlog(self, event):
+    async def complete_round(self, priority=None):
         """
-        @brief Envoie le backlog final avec toutes les fonctionnalités et leurs priorités.
+        @brief Termine le round courant (voir rounds.complete_round).
 
-        @param self: Instance de la classe.
+        @details Si la transition ne peut pas être persistée (base verrouillée...), l'état de
+        la room est inchangé : le joueur reçoit un message `error` et peut révéler à nouveau.
 
-        @param event: Événement.
+        @param priority Priorité retenue, ou None pour relancer le vote.
 
-        @return Rien.
+        @return Le RoundResult, ou None en cas d'échec.
         """
-        if event.get("url"):
-            await self.send(text_data=json.dumps({
-                "type": "final_backlog",
-                "url": event["url"],
-            }))
-            print(f"DEBUG: Redirection vers {event['url']}")
-        elif event.get("final_backlog"):
-            await self.send(text_data=json.dumps({
-                "type": "final_backlog",
-                "final_backlog": event["final_backlog"],
-            }))
-            print(f"DEBUG: Résultat final envoyé : {event['final_backlog']}")
-
+        try:
+            return await complete_round(self.state, priority)
+        except DatabaseError as error:
+            print(f"DEBUG: Échec de la fin de round dans {self.room_name} : {error}")
+            await self.send_message({"type": "error", "message": "Impossible d'enregistrer le round, réessayez"})
+            return None
 
-    async def reveal(self, event):
+    async def start_feature_voting(self):
         """
-        @brief Révèle les votes des joueurs.
-
-        @param self: Instance de la classe.
+        @brief Démarre le vote pour la première fonctionnalité du backlog.
+        """
+        current_feature = self.state.current_feature
+        if current_feature:
+            print(f"DEBUG: Début du vote pour la feature : {current_feature}")
+        else:
+            print("DEBUG: Backlog vide.")
+        await self.broadcast(feature=current_feature)
 
-        @param event: Événement.
+    def get_not_voted_players(self):
+        """
+        @brief Récupère les joueurs qui n'ont pas encore voté.
 
-        @return Rien.
+        @return Liste des noms des joueurs sans vote.
         """
-        print("DEBUG: Révélation des votes.")
-        print(event)
-        await self.send(text_data=json.dumps({
-            "type": "reveal",
-            "votes": event.get("votes", []),
-            "unanimity": event.get("unanimity"),
-        }))
-        print("DEBUG: Révélation des votes envoyée.")
+        return self.state.not_voted()
 
-    async def redirect(self, event):
+    async def room_update(self, event):
         """
-        @brief Redirige tous les joueurs vers la page d'exportation JSON.
+        @brief Transmet au joueur un lot de modifications de la room.
 
         @param self: Instance de la classe.
-        @param event: Événement contenant l'URL de redirection.
+
+        @param event: Événement contenant le numéro de séquence et les modifications.
 
         @return Rien.
         """
-        await self.send(text_data=json.dumps({
-            "type": "redirect",
-            "url": event["url"],
-        }))
+        await self.send_message({
+            "type": "room_update",
+            "seq": event["seq"],
+            "changes": event["changes"],
+        })
@@ -0,0 +1,48 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from channels.db import DatabaseSyncToAsync
+from django.conf import settings
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def db_executor():
+    """
+    @brief Pool de threads dédié aux accès à la base depuis le code asynchrone.
+
+    @details Sa taille est donnée par le réglage POKER_DB_THREADS. Chaque thread garde sa
+    propre connexion (persistante selon CONN_MAX_AGE) ; les connexions périmées sont
+    fermées avant et après chaque appel, comme avec database_sync_to_async.
+
+    @return Un ThreadPoolExecutor, ou None si POKER_DB_THREADS vaut 0.
+    """
+    global _executor
+    size = getattr(settings, 'POKER_DB_THREADS', 8)
+    if not size:
+        return None
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix='poker-db')
+        return _executor
+
+
+def db_sync_to_async(func):
+    """
+    @brief Équivalent de sync_to_async pour une fonction qui accède à la base.
+
+    @details Par défaut sync_to_async exécute toutes les fonctions dans un seul thread
+    partagé : les accès à la base de toutes les rooms y sont sérialisés. Ici ils sont
+    répartis sur le pool de db_executor(). Avec POKER_DB_THREADS = 0 (tests), le thread
+    partagé est conservé : les tests s'exécutent dans une transaction visible de ce seul thread.
+
+    @param func Fonction synchrone.
+
+    @return La fonction asynchrone correspondante.
+    """
+    executor = db_executor()
+    if executor is None:
+        return sync_to_async(func)
+    return DatabaseSyncToAsync(func, thread_sensitive=False, executor=executor)
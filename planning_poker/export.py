@@ -0,0 +1,155 @@
+import csv
+import json
+import zlib
+
+from .models import PokerRoom, Feature
+from .db import db_sync_to_async
+
+EXPORT_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+"""@var EXPORT_FORMATS
+@brief Formats d'export disponibles et leur type MIME.
+"""
+
+CHUNK_SIZE = 500
+"""@var CHUNK_SIZE
+@brief Nombre de fonctionnalités lues en base par requête pendant l'export.
+"""
+
+SECTIONS = ((Feature.ESTIMATED, 'all_features'), (Feature.PENDING, 'backlog'))
+"""@var SECTIONS
+@brief Statut des fonctionnalités de chaque liste du backlog JSON, dans l'ordre de l'export.
+"""
+
+
+def export_validators(room_name):
+    """
+    @brief Validateurs HTTP d'un export : une seule requête, sans lire les fonctionnalités.
+
+    @param room_name Nom de la room.
+
+    @return Tuple (id, version, date de modification), ou None si la room n'existe pas.
+    """
+    return PokerRoom.objects.filter(name=room_name).values_list('pk', 'version', 'updated_at').first()
+
+
+class ExportChanged(Exception):
+    """
+    @brief Levée quand le backlog change pendant un export : le flux est interrompu plutôt que
+    de mêler deux versions sous l'ETag de la première.
+    """
+
+
+def _fetch_chunk(room_id, status, after, version):
+    features = [
+        (feature.ordinal, feature.as_dict())
+        for feature in Feature.objects.filter(room_id=room_id, status=status, ordinal__gt=after)
+        .order_by('ordinal')[:CHUNK_SIZE]
+    ]
+    # Relue après le lot : toute modification validée avant ou pendant sa lecture est visible ici
+    current = PokerRoom.objects.filter(pk=room_id).values_list('version', flat=True).first()
+    if current != version:
+        raise ExportChanged(f"Room {room_id} modifiée pendant l'export (version {version} -> {current}).")
+    return features
+
+
+async def iter_features(room_id, status, version):
+    """
+    @brief Parcourt les fonctionnalités d'une room par lots de CHUNK_SIZE (pagination par ordinal).
+
+    @details Chaque lot est suivi d'une relecture de PokerRoom.version : tant qu'elle vaut
+    `version`, aucun round ni import n'a été validé depuis le calcul de l'ETag, et tout ce qui a
+    été envoyé appartient à cette version.
+
+    @param room_id Identifiant de la room.
+    @param status Feature.PENDING ou Feature.ESTIMATED.
+    @param version Version de la room annoncée dans l'ETag de la réponse.
+
+    @return Générateur asynchrone de dictionnaires au format du backlog JSON.
+
+    @exception ExportChanged Si la version de la room a changé : le flux est interrompu.
+    """
+    after = -1
+    while True:
+        chunk = await db_sync_to_async(_fetch_chunk)(room_id, status, after, version)
+        for _, item in chunk:
+            yield item
+        if len(chunk) < CHUNK_SIZE:
+            return
+        after = chunk[-1][0]
+
+
+async def stream_json(room_id, version):
+    """
+    @brief Export au format du backlog JSON : {"backlog": [...], "all_features": [...]}.
+    """
+    for index, (status, section) in enumerate(reversed(SECTIONS)):
+        prefix = '{' if index == 0 else '], '
+        yield f'{prefix}"{section}": ['
+        separator = ''
+        async for item in iter_features(room_id, status, version):
+            yield separator + json.dumps(item, ensure_ascii=False)
+            separator = ', '
+    yield ']}\n'
+
+
+async def stream_ndjson(room_id, version):
+    """
+    @brief Export NDJSON : une fonctionnalité par ligne, avec sa liste d'origine dans la clé "section".
+    """
+    for status, section in SECTIONS:
+        async for item in iter_features(room_id, status, version):
+            yield json.dumps({'section': section, **item}, ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+async def stream_csv(room_id, version):
+    """
+    @brief Export CSV : colonnes section, feature, priority et extra (autres clés, en JSON).
+    """
+    writer = csv.writer(_Echo())
+    yield writer.writerow(['section', 'feature', 'priority', 'extra'])
+    for status, section in SECTIONS:
+        async for item in iter_features(room_id, status, version):
+            extra = {key: value for key, value in item.items() if key not in ('feature', 'priority')}
+            yield writer.writerow([
+                section,
+                item['feature'],
+                item.get('priority', ''),
+                json.dumps(extra, ensure_ascii=False) if extra else '',
+            ])
+
+
+STREAMS = {'json': stream_json, 'ndjson': stream_ndjson, 'csv': stream_csv}
+"""@var STREAMS
+@brief Générateur d'export de chaque format, appelé avec (room_id, version).
+"""
+
+
+async def encode(chunks, gzip=False):
+    """
+    @brief Encode en UTF-8 les morceaux d'un export, compressés en gzip au fil de l'eau si demandé.
+
+    @param chunks Générateur asynchrone de chaînes.
+    @param gzip Compresser la sortie.
+
+    @return Générateur asynchrone d'octets.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+    async for chunk in chunks:
+        data = chunk.encode()
+        if compressor is None:
+            yield data
+            continue
+        data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor is not None:
+        yield compressor.flush()
@@ -0,0 +1,391 @@
+import codecs
+import csv
+import json
+from functools import partial
+
+from django.db import connection, transaction
+from django.db.models import F, Max
+
+from .models import PokerRoom, Feature
+from .room_cache import invalidate_room_on_commit
+from .room_state import loaded_room_state
+from .schema import check_item
+
+IMPORT_FORMATS = {
+    '.json': 'json',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+    '.csv': 'csv',
+}
+"""@var IMPORT_FORMATS
+@brief Format d'import selon l'extension du fichier envoyé.
+"""
+
+BATCH_SIZE = 1000
+"""@var BATCH_SIZE
+@brief Nombre de fonctionnalités insérées par requête.
+"""
+
+READ_SIZE = 64 * 1024
+"""@var READ_SIZE
+@brief Taille des blocs lus dans le fichier pendant l'analyse du JSON.
+"""
+
+MAX_ITEM_SIZE = 1024 * 1024
+"""@var MAX_ITEM_SIZE
+@brief Taille maximale (en caractères) d'un objet du backlog JSON, qui borne la mémoire de l'analyse.
+"""
+
+MAX_ERRORS = 20
+"""@var MAX_ERRORS
+@brief Nombre d'erreurs au-delà duquel l'analyse s'arrête.
+"""
+
+PENDING_OFFSET = 1_000_000_000
+"""@var PENDING_OFFSET
+@brief Décalage provisoire des ordinaux des fonctionnalités à estimer pendant un import,
+pour qu'elles restent numérotées après les fonctionnalités estimées, quel que soit
+l'ordre du fichier.
+"""
+
+SECTIONS = {'backlog': Feature.PENDING, 'all_features': Feature.ESTIMATED}
+"""@var SECTIONS
+@brief Statut des fonctionnalités de chaque liste du backlog.
+"""
+
+
+ENCODING_ERROR = "encodage invalide (UTF-8 attendu)."
+"""@var ENCODING_ERROR
+@brief Message d'erreur d'un fichier qui n'est pas en UTF-8.
+"""
+
+
+class BacklogImportError(ValueError):
+    """
+    @brief Fichier de backlog invalide.
+
+    @details Le message regroupe les erreurs rencontrées, chacune préfixée par son numéro de ligne.
+    """
+
+    def __init__(self, errors):
+        """
+        @param errors Liste de tuples (numéro de ligne, message).
+        """
+        self.errors = errors
+        super().__init__(" ; ".join(f"Ligne {line} : {message}" for line, message in errors))
+
+
+def detect_format(filename):
+    """
+    @brief Format d'un fichier de backlog d'après son extension.
+
+    @param filename Nom du fichier envoyé.
+
+    @return 'json', 'ndjson' ou 'csv'.
+
+    @exception BacklogImportError Si l'extension n'est pas reconnue.
+    """
+    for extension, file_format in IMPORT_FORMATS.items():
+        if filename.lower().endswith(extension):
+            return file_format
+    raise BacklogImportError([(0, "format de fichier non reconnu (.json, .ndjson ou .csv attendu).")])
+
+
+def parse_ndjson(file):
+    """
+    @brief Lit un fichier NDJSON ligne à ligne : un objet par ligne, la clé optionnelle
+    "section" ('backlog' par défaut ou 'all_features') indiquant sa liste.
+
+    @param file Fichier ouvert en binaire.
+
+    @return Générateur de tuples (ligne, section, objet).
+    """
+    for line_number, line in enumerate(file, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as error:
+            yield line_number, None, error
+            continue
+        section = item.pop('section', 'backlog') if isinstance(item, dict) else 'backlog'
+        yield line_number, section, item
+
+
+def _decode_lines(file):
+    """
+    @brief Décode en UTF-8 un fichier ouvert en binaire, ligne par ligne.
+
+    @param file Fichier ouvert en binaire.
+
+    @return Générateur des lignes décodées (fins de ligne comprises).
+
+    @exception BacklogImportError Si une ligne n'est pas en UTF-8.
+    """
+    for line_number, line in enumerate(file, start=1):
+        try:
+            yield line.decode('utf-8-sig' if line_number == 1 else 'utf-8')
+        except UnicodeDecodeError:
+            raise BacklogImportError([(line_number, ENCODING_ERROR)])
+
+
+def parse_csv(file):
+    """
+    @brief Lit un fichier CSV d'en-tête section, feature, priority, extra (voir export.stream_csv).
+
+    @details Seule la colonne feature est obligatoire ; extra contient les autres clés en JSON.
+
+    @param file Fichier ouvert en binaire.
+
+    @return Générateur de tuples (ligne, section, objet).
+    """
+    reader = csv.DictReader(_decode_lines(file))
+    for row in reader:
+        item = {}
+        if row.get('extra'):
+            try:
+                item.update(json.loads(row['extra']))
+            except ValueError as error:
+                yield reader.line_num, None, error
+                continue
+        if row.get('feature'):
+            item['feature'] = row['feature']
+        if row.get('priority'):
+            item['priority'] = row['priority']
+        yield reader.line_num, row.get('section') or 'backlog', item
+
+
+def parse_json(file):
+    """
+    @brief Lit un backlog JSON {"backlog": [...], "all_features": [...]} objet par objet.
+
+    @details Le fichier est lu par blocs de READ_SIZE et seul l'objet en cours de lecture
+    est conservé en mémoire ; les autres clés de premier niveau sont ignorées.
+
+    @param file Fichier ouvert en binaire.
+
+    @return Générateur de tuples (ligne, section, objet).
+
+    @exception BacklogImportError Si la structure du document est invalide.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8-sig')()
+    # `line` est le numéro de la ligne à la position `mark` du tampon
+    state = {'buffer': '', 'pos': 0, 'line': 1, 'mark': 0, 'eof': False}
+
+    def fill():
+        if state['eof']:
+            return False
+        # on oublie la partie déjà lue en tenant le compte des lignes
+        state['line'] = current_line()
+        chunk = file.read(READ_SIZE)
+        rest = state['buffer'][state['pos']:]
+        try:
+            text = utf8.decode(chunk, final=not chunk)
+        except UnicodeDecodeError as error:
+            line = state['line'] + rest.count('\n') + chunk[:error.start].count(b'\n')
+            raise BacklogImportError([(line, ENCODING_ERROR)])
+        state['buffer'] = rest + text
+        state['pos'] = state['mark'] = 0
+        state['eof'] = not chunk
+        return True
+
+    def current_line():
+        state['line'] += state['buffer'].count('\n', state['mark'], state['pos'])
+        state['mark'] = state['pos']
+        return state['line']
+
+    def fail(message):
+        raise BacklogImportError([(current_line(), message)])
+
+    def peek():
+        while True:
+            buffer, pos = state['buffer'], state['pos']
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            state['pos'] = pos
+            if pos < len(buffer):
+                return buffer[pos]
+            if not fill():
+                fail("fin de fichier inattendue.")
+
+    def expect(characters):
+        character = peek()
+        if character not in characters:
+            fail(f"'{characters[0]}' attendu, '{character}' trouvé.")
+        state['pos'] += 1
+        return character
+
+    def value():
+        peek()
+        while True:
+            try:
+                result, end = decoder.raw_decode(state['buffer'], state['pos'])
+            except json.JSONDecodeError as error:
+                if len(state['buffer']) - state['pos'] > MAX_ITEM_SIZE:
+                    fail(f"JSON invalide ou objet trop volumineux ({error.msg}).")
+                if fill():
+                    continue
+                fail(f"JSON invalide ({error.msg}).")
+            state['pos'] = end
+            return result
+
+    expect('{')
+    if peek() == '}':
+        return
+    while True:
+        key = value()
+        if not isinstance(key, str):
+            fail("clé de premier niveau invalide (chaîne attendue).")
+        expect(':')
+        if key in SECTIONS:
+            expect('[')
+            if peek() == ']':
+                state['pos'] += 1
+            else:
+                while True:
+                    peek()
+                    line = current_line()
+                    yield line, key, value()
+                    if expect(',]') == ']':
+                        break
+        else:
+            value()
+        if expect(',}') == '}':
+            return
+
+
+PARSERS = {'json': parse_json, 'ndjson': parse_ndjson, 'csv': parse_csv}
+"""@var PARSERS
+@brief Analyseur incrémental de chaque format.
+"""
+
+
+def validate_record(section, index, item):
+    """
+    @brief Vérifie un objet du backlog avec le validateur de schema.py.
+
+    @param section Liste de l'objet ('backlog' ou 'all_features').
+    @param index Position de l'objet dans sa liste.
+    @param item Objet lu (ou l'exception levée à sa lecture).
+
+    @return Message d'erreur, ou None si l'objet est valide.
+    """
+    if isinstance(item, Exception):
+        return f"JSON invalide ({item})."
+    if not isinstance(section, str) or section not in SECTIONS:
+        return f"section '{section}' inconnue (backlog ou all_features attendu)."
+    errors = []
+    check_item(item, section, index, errors)
+    if not errors:
+        return None
+    return "; ".join(f"{path} : {message}" for path, message in errors)
+
+
+def _insert(rows):
+    """
+    @brief Insère un lot de fonctionnalités en une seule requête préparée (executemany).
+
+    @details Évite l'instanciation d'un modèle et la compilation d'un INSERT par objet
+    de bulk_create(), qui dominent le temps d'un gros import.
+
+    @param rows Liste de tuples (room_id, ordinal, status, title, priority, extra).
+    """
+    if not rows:
+        return
+    opts = Feature._meta
+    columns = [opts.get_field(name).column for name in ('room', 'ordinal', 'status', 'title', 'priority', 'extra')]
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        connection.ops.quote_name(opts.db_table),
+        ", ".join(connection.ops.quote_name(column) for column in columns),
+        ", ".join(["%s"] * len(columns)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def _records(records, errors):
+    """
+    @brief Relaie les objets d'un analyseur ; une erreur qui l'interrompt (structure,
+    encodage) rejoint la liste des erreurs au lieu de perdre les précédentes.
+
+    @param records Générateur de tuples (ligne, section, objet).
+    @param errors Liste des erreurs de l'import, complétée en cas d'interruption.
+
+    @return Générateur de tuples (ligne, section, objet).
+    """
+    try:
+        yield from records
+    except BacklogImportError as error:
+        errors.extend(error.errors)
+
+
+def import_backlog(room, file, file_format):
+    """
+    @brief Ajoute à une room les fonctionnalités d'un fichier, par lots de BATCH_SIZE.
+
+    @details L'import est atomique : à la première erreur les lots déjà insérés sont
+    annulés, mais l'analyse continue jusqu'à MAX_ERRORS erreurs pour les signaler toutes.
+    Les fonctionnalités estimées sont numérotées avant celles à estimer, comme dans
+    PokerRoom.add_features(). Si la room est ouverte dans ce processus, les fonctionnalités
+    importées sont ajoutées à son état en mémoire (RoomState) après la validation.
+
+    @param room PokerRoom de destination.
+    @param file Fichier ouvert en binaire (UploadedFile).
+    @param file_format 'json', 'ndjson' ou 'csv'.
+
+    @return Nombre de fonctionnalités importées.
+
+    @exception BacklogImportError Si le fichier contient des erreurs (rien n'est importé).
+    """
+    errors = []
+    counts = {Feature.ESTIMATED: 0, Feature.PENDING: 0}
+    seen = dict.fromkeys(SECTIONS, 0)
+    batch = []
+    extra_field = Feature._meta.get_field('extra')
+
+    with transaction.atomic():
+        last = room.features.aggregate(last=Max('ordinal'))['last']
+        start = 0 if last is None else last + 1
+
+        for line, section, item in _records(PARSERS[file_format](file), errors):
+            index = 0
+            if isinstance(section, str) and section in seen:
+                index = seen[section]
+                seen[section] += 1
+            error = validate_record(section, index, item)
+            if error is not None:
+                errors.append((line, error))
+                if len(errors) >= MAX_ERRORS:
+                    break
+                continue
+            if errors:
+                continue
+            status = SECTIONS[section]
+            ordinal = start + counts[status] + (PENDING_OFFSET if status == Feature.PENDING else 0)
+            counts[status] += 1
+            title, priority, extra = Feature.split_dict(item)
+            batch.append((room.pk, ordinal, status, title, priority, extra_field.get_db_prep_save(extra, connection)))
+            if len(batch) >= BATCH_SIZE:
+                _insert(batch)
+                batch = []
+
+        if errors:
+            # l'exception annule les lots déjà insérés
+            raise BacklogImportError(errors)
+
+        _insert(batch)
+        if counts[Feature.PENDING]:
+            Feature.objects.filter(room=room, status=Feature.PENDING, ordinal__gte=start + PENDING_OFFSET).update(
+                ordinal=F('ordinal') - PENDING_OFFSET + counts[Feature.ESTIMATED]
+            )
+        imported = counts[Feature.ESTIMATED] + counts[Feature.PENDING]
+        if imported:
+            PokerRoom.objects.bump_version(room.pk)
+            invalidate_room_on_commit(room.name)
+            state = loaded_room_state(room.name)
+            if state is not None:
+                features = list(room.features.filter(ordinal__gte=start))
+                transaction.on_commit(partial(state.extend, features))
+    return imported
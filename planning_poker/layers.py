@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import re
+import time
+import uuid
+
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer, InMemoryChannelLayer
+from channels_redis.core import RedisChannelLayer
+from django.utils.module_loading import import_string
+
+from .metrics import LAYER_GROUP_SENDS
+
+logger = logging.getLogger(__name__)
+
+CONTROL_GROUP = "hybrid.control"
+"""@var CONTROL_GROUP
+@brief Groupe Redis réunissant tous les processus : annonces d'arrivée et de départ des groupes.
+"""
+
+PROCESS_CAPACITY = 10000
+"""@var PROCESS_CAPACITY
+@brief Capacité du channel Redis d'un processus, qui reçoit les messages de tous ses groupes.
+"""
+
+HYBRID_CHANNEL_RE = re.compile(r'hybrid-([0-9a-f]+)!')
+
+
+class HybridChannelLayer(BaseChannelLayer):
+    """
+    @brief Channel layer livrant en mémoire aux channels du processus, et par Redis seulement
+    aux autres processus.
+
+    @details Les channels et groupes du processus sont tenus par un InMemoryChannelLayer local.
+    Dans Redis, le processus n'est inscrit qu'une fois par groupe, avec un channel qui lui est
+    propre (`hybrid.process.<id>`), tant qu'il a au moins un membre local dans ce groupe.
+
+    group_send livre d'abord en mémoire, puis ne relaie par Redis (un message par processus,
+    non par membre) que si d'autres processus ont des membres dans le groupe. Cette
+    information est lue dans Redis au plus toutes les `membership_ttl` secondes et tenue à
+    jour entre-temps par les annonces diffusées sur CONTROL_GROUP quand un processus rejoint
+    ou quitte un groupe. Un membre qui arrive sur un autre processus peut ainsi manquer les
+    messages des quelques millisecondes que met son annonce à arriver ; le consommateur lui
+    envoie de toute façon l'état complet de la room à la connexion.
+
+    Les noms de channel contiennent l'identifiant du processus qui les a créés : send() vers
+    un channel distant passe par le channel Redis de ce processus.
+    """
+
+    extensions = ["groups", "flush"]
+
+    def __init__(self, expiry=60, group_expiry=86400, capacity=100, channel_capacity=None,
+                 membership_ttl=5, inner=None, inner_backend="channels_redis.core.RedisChannelLayer", **inner_config):
+        """
+        @param expiry Durée de vie d'un message non lu, en secondes.
+        @param group_expiry Durée de vie d'une appartenance à un groupe, en secondes.
+        @param capacity Messages en attente par channel.
+        @param channel_capacity Capacités par motif de nom de channel.
+        @param membership_ttl Durée (secondes) pendant laquelle les membres distants d'un groupe
+        lus dans Redis sont considérés comme à jour.
+        @param inner Layer partagé entre processus déjà construit (tests), à la place de `inner_backend`.
+        @param inner_backend Classe du layer partagé entre processus.
+        @param inner_config Options du layer partagé (hosts, prefix...).
+        """
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity)
+        self.local = InMemoryChannelLayer(
+            expiry=expiry, group_expiry=group_expiry, capacity=capacity, channel_capacity=channel_capacity,
+        )
+        if inner is None:
+            inner_capacity = dict(channel_capacity or {})
+            inner_capacity.setdefault("hybrid.process.*", PROCESS_CAPACITY)
+            inner = import_string(inner_backend)(
+                expiry=expiry, group_expiry=group_expiry, capacity=capacity,
+                channel_capacity=inner_capacity, **inner_config,
+            )
+        self.inner = inner
+        for layer in (self.local, self.inner):
+            # InMemoryChannelLayer garde les motifs de capacité sans les compiler
+            if isinstance(getattr(layer, 'channel_capacity', None), dict):
+                layer.channel_capacity = layer.compile_capacities(layer.channel_capacity)
+        self.membership_ttl = membership_ttl
+        self.process_id = uuid.uuid4().hex[:12]
+        self.process_channel = f"hybrid.process.{self.process_id}"
+        self._local_groups = {}
+        self._remote = {}
+        self._pump = None
+
+    async def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._pump is None or self._pump.done() or self._pump.get_loop() is not loop:
+            self._pump = loop.create_task(self._receive_remote())
+
+    async def _receive_remote(self):
+        await self.inner.group_add(CONTROL_GROUP, self.process_channel)
+        for group in self._local_groups:
+            await self.inner.group_add(group, self.process_channel)
+        while True:
+            try:
+                message = await self.inner.receive(self.process_channel)
+                await self._dispatch(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Réception depuis le layer partagé impossible")
+                await asyncio.sleep(1)
+
+    async def _dispatch(self, message):
+        kind = message["type"]
+        if kind == "hybrid.group":
+            if message["origin"] != self.process_channel:
+                await self.local.group_send(message["group"], message["message"])
+        elif kind == "hybrid.send":
+            try:
+                await self.local.send(message["channel"], message["message"])
+            except ChannelFull:
+                logger.warning("Channel %s plein : message distant abandonné", message["channel"])
+        elif kind in ("hybrid.join", "hybrid.leave") and message["process"] != self.process_channel:
+            known = self._remote.get(message["group"])
+            if known is not None:
+                if kind == "hybrid.join":
+                    known[0].add(message["process"])
+                else:
+                    known[0].discard(message["process"])
+
+    async def _fetch_members(self, group):
+        if isinstance(self.inner, RedisChannelLayer):
+            connection = self.inner.connection(self.inner.consistent_hash(group))
+            members = await connection.zrangebyscore(
+                self.inner._group_key(group), min=int(time.time()) - self.inner.group_expiry, max="+inf",
+            )
+            members = {member.decode() for member in members}
+        else:
+            members = set(getattr(self.inner, 'groups', {}).get(group, {}))
+        members.discard(self.process_channel)
+        return members
+
+    async def _remote_members(self, group):
+        known = self._remote.get(group)
+        if known is None or time.monotonic() - known[1] > self.membership_ttl:
+            known = self._remote[group] = (await self._fetch_members(group), time.monotonic())
+        return known[0]
+
+    async def _announce(self, kind, group):
+        await self.inner.group_send(CONTROL_GROUP, {"type": kind, "group": group, "process": self.process_channel})
+
+    async def new_channel(self, prefix="specific."):
+        """
+        @brief Nouveau channel propre au processus (son nom désigne le processus).
+        """
+        return f"{prefix}hybrid-{self.process_id}!{uuid.uuid4().hex[:12]}"
+
+    async def send(self, channel, message):
+        """
+        @brief Envoie un message à un channel, en mémoire s'il appartient au processus.
+        """
+        owner = HYBRID_CHANNEL_RE.search(channel)
+        if owner is None:
+            await self.inner.send(channel, message)
+        elif owner[1] == self.process_id:
+            await self.local.send(channel, message)
+        else:
+            await self.inner.send(
+                f"hybrid.process.{owner[1]}", {"type": "hybrid.send", "channel": channel, "message": message},
+            )
+
+    async def receive(self, channel):
+        """
+        @brief Attend le prochain message d'un channel du processus.
+        """
+        await self._ensure_started()
+        return await self.local.receive(channel)
+
+    async def group_add(self, group, channel):
+        """
+        @brief Ajoute un channel à un groupe ; le premier membre local inscrit le processus dans Redis.
+        """
+        await self._ensure_started()
+        await self.local.group_add(group, channel)
+        members = self._local_groups.setdefault(group, set())
+        first = not members
+        members.add(channel)
+        if first:
+            await self.inner.group_add(group, self.process_channel)
+            await self._announce("hybrid.join", group)
+
+    async def group_discard(self, group, channel):
+        """
+        @brief Retire un channel d'un groupe ; le départ du dernier membre local désinscrit le processus.
+        """
+        await self.local.group_discard(group, channel)
+        members = self._local_groups.get(group)
+        if members is None or channel not in members:
+            return
+        members.discard(channel)
+        if not members:
+            del self._local_groups[group]
+            await self.inner.group_discard(group, self.process_channel)
+            await self._announce("hybrid.leave", group)
+
+    async def group_send(self, group, message):
+        """
+        @brief Diffuse un message au groupe : en mémoire aux membres locaux, par Redis aux
+        autres processus seulement s'ils ont des membres dans le groupe.
+        """
+        await self._ensure_started()
+        await self.local.group_send(group, message)
+        if await self._remote_members(group):
+            LAYER_GROUP_SENDS.inc("redis")
+            await self.inner.group_send(
+                group, {"type": "hybrid.group", "group": group, "message": message, "origin": self.process_channel},
+            )
+        else:
+            LAYER_GROUP_SENDS.inc("local")
+
+    async def flush(self):
+        """
+        @brief Vide le layer local et le layer partagé, et arrête la réception distante.
+        """
+        if self._pump is not None:
+            self._pump.cancel()
+            self._pump = None
+        self._local_groups.clear()
+        self._remote.clear()
+        await self.local.flush()
+        await self.inner.flush()
+
+    async def close_pools(self):
+        """
+        @brief Ferme les connexions du layer partagé (voir RedisChannelLayer.close_pools()).
+        """
+        if hasattr(self.inner, 'close_pools'):
+            await self.inner.close_pools()
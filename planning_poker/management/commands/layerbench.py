@@ -0,0 +1,117 @@
+import asyncio
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+from redis.exceptions import RedisError
+
+from planningpoker.channel_layers import LAYER_BACKENDS, channel_layer_config, redis_hosts
+from .loadtest import percentile
+
+
+def make_layer(config):
+    """
+    @brief Instancie un channel layer à partir de sa configuration (format CHANNEL_LAYERS).
+
+    @param config Dictionnaire {"BACKEND": ..., "CONFIG": ...}.
+
+    @return Le channel layer.
+    """
+    return import_string(config["BACKEND"])(**config.get("CONFIG", {}))
+
+
+async def fan_out(layer, members, rounds):
+    """
+    @brief Envoie `rounds` messages à un groupe de `members` channels et chronomètre leur réception.
+
+    @details Chaque tour attend que tous les membres aient reçu le message avant le suivant,
+    comme une révélation de votes dans une room.
+
+    @param layer Channel layer.
+    @param members Nombre de membres du groupe.
+    @param rounds Nombre de messages envoyés au groupe.
+
+    @return Tuple (durée totale en secondes, latences de livraison en secondes).
+    """
+    group = f"bench-{uuid.uuid4().hex[:8]}"
+    channels = [await layer.new_channel() for _ in range(members)]
+    for channel in channels:
+        await layer.group_add(group, channel)
+
+    async def receive(channel):
+        await layer.receive(channel)
+        return time.perf_counter()
+
+    latencies = []
+    try:
+        start = time.perf_counter()
+        for _ in range(rounds):
+            receivers = [asyncio.ensure_future(receive(channel)) for channel in channels]
+            sent = time.perf_counter()
+            await layer.group_send(group, {"type": "bench.message", "changes": {"not_voted": []}})
+            latencies.extend(arrival - sent for arrival in await asyncio.gather(*receivers))
+        elapsed = time.perf_counter() - start
+    finally:
+        for channel in channels:
+            await layer.group_discard(group, channel)
+    return elapsed, latencies
+
+
+class Command(BaseCommand):
+    help = "Mesure le débit et la latence de group_send selon le channel layer et la taille des groupes."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--layers', default='memory,hybrid,redis,pubsub',
+            help=f"Layers comparés, séparés par des virgules ({', '.join(sorted(LAYER_BACKENDS))}).",
+        )
+        parser.add_argument('--members', default='10,100,1000', help="Tailles de groupe, séparées par des virgules.")
+        parser.add_argument('--rounds', type=int, default=20, help="Messages envoyés par mesure.")
+        parser.add_argument(
+            '--hosts', default=None,
+            help="Instances Redis séparées par des virgules (par défaut : POKER_REDIS_HOSTS, REDIS_HOST).",
+        )
+
+    def handle(self, *args, **options):
+        layers = [kind.strip() for kind in options['layers'].split(',') if kind.strip()]
+        unknown = set(layers) - set(LAYER_BACKENDS)
+        if unknown:
+            raise CommandError(f"Layer(s) inconnu(s) : {', '.join(sorted(unknown))}")
+        sizes = [int(size) for size in options['members'].split(',')]
+        hosts = redis_hosts({'POKER_REDIS_HOSTS': options['hosts']}) if options['hosts'] else redis_hosts()
+        self.stdout.write(f"{options['rounds']} message(s) par mesure, Redis : {', '.join(hosts)}")
+        self.stdout.write(f"{'layer':<10}{'membres':>8}{'livraisons/s':>14}{'p50 (ms)':>12}{'p95 (ms)':>12}{'p99 (ms)':>12}")
+        asyncio.run(self.run(layers, sizes, hosts, options['rounds']))
+
+    async def run(self, layers, sizes, hosts, rounds):
+        """
+        @brief Mesure chaque layer, pour chaque taille de groupe.
+        """
+        for kind in layers:
+            layer = make_layer(channel_layer_config(kind, hosts, prefix=f"layerbench-{uuid.uuid4().hex[:8]}"))
+            try:
+                for members in sizes:
+                    try:
+                        elapsed, latencies = await asyncio.wait_for(fan_out(layer, members, rounds), timeout=60)
+                    except (OSError, RedisError, asyncio.TimeoutError) as exc:
+                        self.stdout.write(f"{kind:<10}{members:>8}  indisponible ({exc.__class__.__name__} : {exc})")
+                        break
+                    p50, p95, p99 = (percentile(latencies, rank) * 1000 for rank in (50, 95, 99))
+                    self.stdout.write(
+                        f"{kind:<10}{members:>8}{len(latencies) / elapsed:>14.0f}{p50:>12.2f}{p95:>12.2f}{p99:>12.2f}"
+                    )
+            finally:
+                await self.close(layer)
+
+    async def close(self, layer):
+        """
+        @brief Libère les connexions Redis d'un layer (et ses clés, préfixées pour le benchmark).
+        """
+        try:
+            if hasattr(layer, 'flush'):
+                await layer.flush()
+            if hasattr(layer, 'close_pools'):
+                await layer.close_pools()
+        except (OSError, RedisError):
+            pass
@@ -0,0 +1,276 @@
+import asyncio
+import contextlib
+import io
+import math
+import time
+import uuid
+
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+
+from planning_poker.metrics import DB_QUERIES
+from planning_poker.models import PokerRoom
+from planning_poker.protocol import JSON_SUBPROTOCOL, MSGPACK_SUBPROTOCOL, negotiate
+from planning_poker.room_state import clear_room_states
+from planningpoker.asgi import application
+from planningpoker.channel_layers import LAYER_BACKENDS, channel_layer_config
+
+LAYERS = {
+    kind: lambda options, kind=kind: channel_layer_config(kind, [options['redis_url']])
+    for kind in LAYER_BACKENDS
+}
+"""@var LAYERS
+@brief Configurations de channel layer sélectionnables avec --layer.
+"""
+
+
+def percentile(values, rank):
+    """
+    @brief Percentile (méthode du rang le plus proche) d'une liste de valeurs.
+
+    @param values Valeurs mesurées.
+    @param rank Rang du percentile, entre 0 et 100.
+
+    @return La valeur du percentile, ou None si la liste est vide.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(rank / 100 * len(ordered)) - 1)]
+
+
+class SimulatedPlayer:
+    """
+    @brief Joueur simulé connecté au consommateur par un WebsocketCommunicator.
+
+    @details Une tâche de lecture décode en continu les messages reçus et réveille les
+    attentes enregistrées par expect() ; les messages qu'aucune attente ne vise sont ignorés.
+    """
+
+    def __init__(self, room_name, pseudo, session, subprotocol):
+        """
+        @brief Prépare le joueur (sans le connecter).
+
+        @param room_name Nom de la room.
+        @param pseudo Pseudo du joueur.
+        @param session Session Django contenant le pseudo.
+        @param subprotocol Sous-protocole websocket proposé au serveur.
+        """
+        self.pseudo = pseudo
+        self.codec = negotiate([subprotocol])
+        self.communicator = WebsocketCommunicator(
+            application, f"/ws/poker/{room_name}/", subprotocols=[subprotocol]
+        )
+        self.communicator.scope["session"] = session
+        self.received = 0
+        self._waiters = []
+        self._reader = None
+
+    async def connect(self):
+        """
+        @brief Connecte le joueur et attend son instantané.
+
+        @return Durée de la connexion, en secondes.
+        """
+        start = time.perf_counter()
+        snapshot = self.expect(lambda message: message["type"] == "snapshot")
+        connected, _ = await self.communicator.connect()
+        if not connected:
+            raise RuntimeError(f"Connexion refusée pour {self.pseudo}")
+        self._reader = asyncio.ensure_future(self._read())
+        await snapshot
+        return time.perf_counter() - start
+
+    async def disconnect(self):
+        """
+        @brief Arrête la lecture et ferme le websocket.
+        """
+        if self._reader is not None:
+            self._reader.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._reader
+        await self.communicator.disconnect()
+
+    def expect(self, predicate):
+        """
+        @brief Enregistre l'attente d'un message.
+
+        @param predicate Fonction appelée sur chaque message décodé.
+
+        @return Un futur résolu par le premier message vérifiant le prédicat.
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((predicate, future))
+        return future
+
+    async def send(self, message):
+        """
+        @brief Envoie un message dans le format négocié.
+
+        @param message Dictionnaire contenant une clé "type".
+        """
+        text_data, bytes_data = self.codec.encode(message)
+        if text_data is not None:
+            await self.communicator.send_to(text_data=text_data)
+        else:
+            await self.communicator.send_to(bytes_data=bytes_data)
+
+    async def _read(self):
+        while True:
+            output = await self.communicator.receive_output(timeout=3600)
+            if output["type"] != "websocket.send":
+                continue
+            message = self.codec.decode(output.get("text"), output.get("bytes"))
+            self.received += 1
+            pending = []
+            for predicate, future in self._waiters:
+                if not future.done() and predicate(message):
+                    future.set_result(message)
+                elif not future.done():
+                    pending.append((predicate, future))
+            self._waiters = pending
+
+
+def _changes(message):
+    return message.get("changes", {}) if message["type"] == "room_update" else {}
+
+
+class Command(BaseCommand):
+    help = (
+        "Simule des rooms de planning poker (connexion, votes, révélation, fonctionnalité "
+        "suivante) et mesure débit, latences et requêtes SQL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=10, help="Nombre de rooms simulées.")
+        parser.add_argument('--players', type=int, default=5, help="Nombre de joueurs par room.")
+        parser.add_argument('--features', type=int, default=5, help="Fonctionnalités estimées par room.")
+        parser.add_argument('--layer', choices=sorted(LAYERS), default='memory', help="Channel layer utilisé.")
+        parser.add_argument('--redis-url', default='redis://localhost:6379', help="Adresse Redis (--layer redis ou pubsub).")
+        parser.add_argument('--protocol', choices=['json', 'msgpack'], default='json', help="Format des trames.")
+        parser.add_argument('--keep', action='store_true', help="Conserver les rooms créées.")
+        parser.add_argument('--verbose', action='store_true', help="Afficher les traces du consommateur.")
+
+    def handle(self, *args, **options):
+        run_id = uuid.uuid4().hex[:8]
+        rooms = [
+            PokerRoom.objects.create_with_backlog(
+                name=f"loadtest-{run_id}-{index}",
+                creator="loadtest",
+                backlog=[{"feature": f"Fonctionnalité {number}"} for number in range(options['features'])],
+            )
+            for index in range(options['rooms'])
+        ]
+        sessions = {}
+        for room in rooms:
+            for index in range(options['players']):
+                session = SessionStore()
+                session["pseudo"] = f"joueur-{index}"
+                session.save()
+                sessions[(room.name, index)] = session
+
+        subprotocol = MSGPACK_SUBPROTOCOL if options['protocol'] == 'msgpack' else JSON_SUBPROTOCOL
+        latencies = {}
+        queries_before = DB_QUERIES.samples()
+        output = contextlib.nullcontext() if options['verbose'] else contextlib.redirect_stdout(io.StringIO())
+
+        clear_room_states()
+        try:
+            with override_settings(CHANNEL_LAYERS={"default": LAYERS[options['layer']](options)}), output:
+                start = time.perf_counter()
+                sent, received = async_to_sync(self.run)(rooms, sessions, options, subprotocol, latencies)
+                elapsed = time.perf_counter() - start
+        finally:
+            clear_room_states()
+            if not options['keep']:
+                PokerRoom.objects.filter(pk__in=[room.pk for room in rooms]).delete()
+                for session in sessions.values():
+                    session.delete()
+
+        queries = {
+            handler: count - queries_before.get(handler, 0)
+            for handler, count in DB_QUERIES.samples().items()
+            if count != queries_before.get(handler, 0)
+        }
+        self.report(options, elapsed, sent, received, latencies, queries)
+
+    async def run(self, rooms, sessions, options, subprotocol, latencies):
+        """
+        @brief Joue toutes les rooms en parallèle.
+
+        @return Tuple (messages envoyés, messages reçus).
+        """
+        counts = await asyncio.gather(*[
+            self.play_room(room, sessions, options, subprotocol, latencies) for room in rooms
+        ])
+        return sum(sent for sent, _ in counts), sum(received for _, received in counts)
+
+    async def play_room(self, room, sessions, options, subprotocol, latencies):
+        """
+        @brief Simule une room : connexion des joueurs puis un cycle vote / révélation /
+        fonctionnalité suivante par fonctionnalité du backlog.
+
+        @return Tuple (messages envoyés, messages reçus) pour la room.
+        """
+        players = [
+            SimulatedPlayer(room.name, f"joueur-{index}", sessions[(room.name, index)], subprotocol)
+            for index in range(options['players'])
+        ]
+        record = lambda kind, value: latencies.setdefault(kind, []).append(value)
+        sent = 0
+        try:
+            # connexions séquentielles : chaque arrivée est diffusée aux joueurs déjà présents
+            for player in players:
+                record('connect', await player.connect())
+
+            for _ in range(options['features']):
+                async def vote(player):
+                    echo = player.expect(lambda message: _changes(message).get("vote", {}).get("player") == player.pseudo)
+                    start = time.perf_counter()
+                    await player.send({"type": "vote", "player": player.pseudo, "vote": "5"})
+                    await echo
+                    record('vote', time.perf_counter() - start)
+
+                all_voted = [player.expect(lambda message: _changes(message).get("all_voted")) for player in players]
+                await asyncio.gather(*[vote(player) for player in players])
+                await asyncio.gather(*all_voted)
+                sent += len(players)
+
+                for kind, key in (('reveal', 'reveal'), ('start_feature', 'feature')):
+                    # latence jusqu'à la réception par tous les joueurs de la room
+                    waiters = [player.expect(lambda message, key=key: key in _changes(message)) for player in players]
+                    start = time.perf_counter()
+                    await players[0].send({"type": kind})
+                    await asyncio.gather(*waiters)
+                    record(kind, time.perf_counter() - start)
+                    sent += 1
+        finally:
+            for player in players:
+                await player.disconnect()
+        return sent, sum(player.received for player in players)
+
+    def report(self, options, elapsed, sent, received, latencies, queries):
+        """
+        @brief Affiche le résultat de la simulation.
+        """
+        self.stdout.write(
+            f"{options['rooms']} room(s) x {options['players']} joueur(s), {options['features']} "
+            f"fonctionnalité(s), layer {options['layer']}, protocole {options['protocol']}"
+        )
+        self.stdout.write(f"Durée : {elapsed:.2f} s")
+        self.stdout.write(
+            f"Débit : {sent / elapsed:.1f} messages envoyés/s, {received / elapsed:.1f} messages reçus/s"
+        )
+        self.stdout.write(f"{'type':<15}{'n':>8}{'p50 (ms)':>12}{'p95 (ms)':>12}{'p99 (ms)':>12}")
+        for kind in ('connect', 'vote', 'reveal', 'start_feature'):
+            values = latencies.get(kind, [])
+            if not values:
+                continue
+            p50, p95, p99 = (percentile(values, rank) * 1000 for rank in (50, 95, 99))
+            self.stdout.write(f"{kind:<15}{len(values):>8}{p50:>12.2f}{p95:>12.2f}{p99:>12.2f}")
+        self.stdout.write(f"Requêtes SQL : {sum(queries.values())}")
+        for (handler,), count in sorted(queries.items()):
+            self.stdout.write(f"  {handler:<13}{count:>8}")
@@ -1,14 +1,327 @@
+import argparse
+import asyncio
+import contextlib
+import itertools
 import os
-from django.core.management.base import BaseCommand
-from daphne.server import Server
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from django.core.management.base import BaseCommand, CommandError
 from daphne.endpoints import build_endpoint_description_strings
+from planning_poker.server import PokerServer
 from planningpoker.asgi import application  # Import the ASGI application
+from planning_poker.affinity import room_of, worker_for
+
+RESTART_DELAY = 1.0
+"""@var RESTART_DELAY
+@brief Délai (en secondes) avant de relancer un worker mort juste après son démarrage.
+"""
+
+CONNECT_TIMEOUT = 30
+"""@var CONNECT_TIMEOUT
+@brief Délai (en secondes) pendant lequel une connexion attend que son worker (re)démarre.
+"""
+
+MAX_HEADER_SIZE = 65536
+"""@var MAX_HEADER_SIZE
+@brief Taille maximale de l'en-tête de la première requête d'une connexion, lu par le superviseur.
+"""
+
+FORWARDED_HEADERS = (b'x-forwarded-for', b'x-forwarded-port')
+"""@var FORWARDED_HEADERS
+@brief En-têtes d'adresse du client, renseignés par le superviseur (ceux du client sont retirés).
+"""
+
+
+def worker_count(value):
+    """
+    @brief Nombre de workers : un entier positif, ou "auto" pour le nombre de cœurs.
+    """
+    if value == 'auto':
+        return os.cpu_count() or 1
+    try:
+        count = int(value)
+    except ValueError:
+        count = 0
+    if count < 1:
+        raise argparse.ArgumentTypeError("entier positif ou 'auto' attendu")
+    return count
+
+
+def prepare_request(head, peer):
+    """
+    @brief Prépare l'en-tête de la première requête d'une connexion pour son worker.
+
+    @details Les en-têtes X-Forwarded-* du client sont remplacés par son adresse réelle.
+    Hors websocket, la connexion est limitée à une requête (Connection: close) : la suivante
+    peut viser une autre room, donc un autre worker.
+
+    @param head En-tête brut, jusqu'à la ligne vide incluse.
+    @param peer Adresse (hôte, port) du client, ou None.
+
+    @return Tuple (cible de la requête, en-tête à transmettre).
+    """
+    lines = head[:-4].split(b"\r\n")
+    parts = lines[0].split(b" ")
+    target = parts[1].decode('latin-1') if len(parts) == 3 else '/'
+    headers = []
+    upgrade = False
+    for line in lines[1:]:
+        name = line.partition(b":")[0].strip().lower()
+        if name == b'upgrade' and b'websocket' in line.lower():
+            upgrade = True
+        if name not in FORWARDED_HEADERS:
+            headers.append(line)
+    if not upgrade:
+        headers = [line for line in headers if line.partition(b":")[0].strip().lower() not in (b'connection', b'keep-alive')]
+        headers.append(b"Connection: close")
+    if peer:
+        headers.append(b"X-Forwarded-For: " + str(peer[0]).encode())
+        headers.append(b"X-Forwarded-Port: " + str(peer[1]).encode())
+    return target, b"\r\n".join([lines[0], *headers]) + b"\r\n\r\n"
+
+
+async def pipe(reader, writer):
+    """
+    @brief Recopie un flux vers l'autre extrémité jusqu'à sa fin, au rythme où elle lit.
+    """
+    try:
+        while data := await reader.read(65536):
+            writer.write(data)
+            await writer.drain()
+        if writer.can_write_eof():
+            writer.write_eof()
+    except (ConnectionError, OSError):
+        writer.close()
+
 
 class Command(BaseCommand):
-    help = 'Run the ASGI server'
+    help = (
+        "Run the ASGI server. With --workers N (or --supervise), a supervisor listens on the "
+        "address, starts N Daphne workers and hands each connection to the worker of its room; "
+        "crashed workers are restarted and SIGHUP reloads them one at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help="Adresse d'écoute.")
+        parser.add_argument('--port', type=int, default=8000, help="Port d'écoute.")
+        parser.add_argument('--unix-socket', help="Écouter sur un socket Unix plutôt qu'en TCP.")
+        parser.add_argument(
+            '--workers', type=worker_count, default=os.environ.get('POKER_WORKERS', '1'),
+            help="Nombre de processus Daphne, ou 'auto' pour un par cœur (POKER_WORKERS par défaut).",
+        )
+        parser.add_argument(
+            '--supervise', action='store_true',
+            help="Lancer les workers sous un superviseur même s'il n'y en a qu'un (relance après "
+                 "crash, rechargement sur SIGHUP).",
+        )
+        parser.add_argument(
+            '--proxy-headers', action='store_true',
+            help="Lire l'adresse du client dans X-Forwarded-For (workers lancés par le superviseur).",
+        )
 
     def handle(self, *args, **options):
         os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'planningpoker.settings')
-        endpoints = build_endpoint_description_strings(host='127.0.0.1', port='8000')
-        server = Server(application=application, endpoints=endpoints)  # Pass the callable application
-        server.run()
\ No newline at end of file
+        if options['supervise'] or options['workers'] > 1:
+            if options['unix_socket']:
+                raise CommandError("Le superviseur n'écoute qu'en TCP (utiliser --host/--port).")
+            Supervisor(self, options['host'], options['port'], options['workers']).run()
+            return
+        if options['unix_socket']:
+            endpoints = build_endpoint_description_strings(unix_socket=options['unix_socket'])
+        else:
+            endpoints = build_endpoint_description_strings(host=options['host'], port=options['port'])
+        proxy = {}
+        if options['proxy_headers']:
+            proxy = {'proxy_forwarded_address_header': 'X-Forwarded-For', 'proxy_forwarded_port_header': 'X-Forwarded-Port'}
+        server = PokerServer(application=application, endpoints=endpoints, **proxy)  # Pass the callable application
+        server.run()
+
+
+class Supervisor:
+    """
+    @brief Superviseur des workers Daphne et répartiteur des connexions par room.
+
+    @details Le superviseur écoute sur host:port et lance chaque worker sur son propre socket
+    Unix (`runasgi --unix-socket`). Il lit la première requête de chaque connexion et la
+    transmet au worker de sa room (voir affinity.worker_for) : websockets et pages d'une même
+    room sont toujours servis par le même processus, dont le RoomState fait donc autorité.
+    Les requêtes qui ne visent pas de room sont réparties à tour de rôle. Les octets sont
+    ensuite recopiés dans les deux sens au rythme du lecteur, sans tampon supplémentaire.
+
+    Un worker qui meurt est relancé sur le même socket. SIGHUP recharge les workers un par
+    un, en arrêtant l'ancien avant de démarrer le nouveau : deux processus ne servent jamais
+    la même room. Les connexions qui arrivent entre-temps attendent le nouveau worker
+    (CONNECT_TIMEOUT). SIGTERM et SIGINT arrêtent tous les workers.
+    """
+
+    def __init__(self, command, host, port, workers):
+        """
+        @brief Prépare le superviseur.
+
+        @param command Commande de gestion (pour les sorties).
+        @param host Adresse d'écoute.
+        @param port Port d'écoute.
+        @param workers Nombre de workers.
+        """
+        self.command = command
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.slots = [None] * workers
+        self.next_slot = itertools.cycle(range(workers))
+        self.reload_requested = False
+        self.stopping = False
+
+    def socket_path(self, slot):
+        return os.path.join(self.directory, f"worker-{slot}.sock")
+
+    def spawn(self, slot):
+        """
+        @brief Lance le worker d'un emplacement sur son socket Unix.
+
+        @param slot Indice du worker.
+
+        @return Le processus lancé.
+        """
+        path = self.socket_path(slot)
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(path)
+        env = dict(os.environ, POKER_WORKER_INDEX=str(slot), POKER_WORKER_COUNT=str(self.workers))
+        process = subprocess.Popen(
+            [sys.executable, os.path.abspath(sys.argv[0]), 'runasgi',
+             '--unix-socket', path, '--workers', '1', '--proxy-headers'],
+            env=env,
+        )
+        self.slots[slot] = (process, time.monotonic())
+        self.command.stdout.write(f"Worker {slot} démarré (pid {process.pid})")
+        return process
+
+    async def stop(self, process, timeout=15):
+        """
+        @brief Arrête un worker (SIGTERM, puis SIGKILL après le délai).
+
+        @param process Processus à arrêter.
+        @param timeout Délai laissé au worker pour fermer ses connexions.
+        """
+        if process.poll() is None:
+            process.terminate()
+        try:
+            await asyncio.wait_for(asyncio.to_thread(process.wait), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await asyncio.to_thread(process.wait)
+
+    async def reload(self):
+        """
+        @brief Remplace les workers un par un : l'ancien est arrêté avant que le nouveau démarre.
+        """
+        self.command.stdout.write("Rechargement des workers")
+        for slot in range(self.workers):
+            process, _ = self.slots[slot]
+            # vidé d'abord, pour que la boucle de supervision ne le relance pas
+            self.slots[slot] = None
+            await self.stop(process)
+            self.spawn(slot)
+
+    async def connect(self, slot):
+        """
+        @brief Ouvre une connexion vers un worker, en attendant qu'il (re)démarre si besoin.
+
+        @param slot Indice du worker.
+
+        @return Tuple (reader, writer) asyncio.
+        """
+        deadline = time.monotonic() + CONNECT_TIMEOUT
+        while True:
+            try:
+                return await asyncio.open_unix_connection(self.socket_path(slot), limit=MAX_HEADER_SIZE)
+            except (FileNotFoundError, ConnectionRefusedError):
+                if self.stopping or time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.05)
+
+    async def handle_connection(self, client_reader, client_writer):
+        """
+        @brief Transmet une connexion cliente au worker de sa room.
+        """
+        worker_writer = None
+        try:
+            try:
+                head = await client_reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                return
+            target, head = prepare_request(head, client_writer.get_extra_info('peername'))
+            room_name = room_of(target)
+            slot = worker_for(room_name, self.workers) if room_name is not None else next(self.next_slot)
+            try:
+                worker_reader, worker_writer = await self.connect(slot)
+            except OSError:
+                client_writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                return
+            worker_writer.write(head)
+            await asyncio.gather(pipe(client_reader, worker_writer), pipe(worker_reader, client_writer))
+        finally:
+            for writer in (client_writer, worker_writer):
+                if writer is not None:
+                    writer.close()
+
+    async def supervise(self):
+        """
+        @brief Boucle de supervision : relance les workers morts et traite SIGHUP.
+        """
+        while not self.stopping:
+            if self.reload_requested:
+                self.reload_requested = False
+                await self.reload()
+            for slot, entry in enumerate(self.slots):
+                if entry is None or entry[0].poll() is None:
+                    continue
+                process, started = entry
+                self.command.stderr.write(f"Worker {slot} terminé (code {process.returncode}), relance")
+                if time.monotonic() - started < RESTART_DELAY:
+                    await asyncio.sleep(RESTART_DELAY)
+                self.spawn(slot)
+            await asyncio.sleep(0.2)
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, self._request_stop)
+        loop.add_signal_handler(signal.SIGINT, self._request_stop)
+        loop.add_signal_handler(signal.SIGHUP, self._request_reload)
+
+        server = await asyncio.start_server(
+            self.handle_connection, self.host, self.port, limit=MAX_HEADER_SIZE, reuse_address=True,
+        )
+        self.command.stdout.write(
+            f"Écoute sur {self.host}:{self.port} avec {self.workers} workers (superviseur {os.getpid()})"
+        )
+        for slot in range(self.workers):
+            self.spawn(slot)
+        try:
+            await self.supervise()
+        finally:
+            server.close()
+            await asyncio.gather(*(self.stop(entry[0]) for entry in self.slots if entry is not None))
+
+    def run(self):
+        """
+        @brief Lance les workers et répartit les connexions, jusqu'à SIGTERM ou SIGINT.
+        """
+        # les workers partagent ce répertoire pour agréger /metrics
+        if not os.environ.get('POKER_METRICS_DIR'):
+            os.environ['POKER_METRICS_DIR'] = tempfile.mkdtemp(prefix='poker-metrics-')
+        self.directory = tempfile.mkdtemp(prefix='poker-workers-')
+        try:
+            asyncio.run(self.serve())
+        finally:
+            shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _request_stop(self):
+        self.stopping = True
+
+    def _request_reload(self):
+        self.reload_requested = True
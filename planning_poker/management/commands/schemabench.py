@@ -0,0 +1,60 @@
+import json
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from planning_poker.schema import clear_schema_cache, validate_backlog_json, validate_document
+
+
+def legacy_validate(document):
+    """
+    @brief Vérifications faites à la main par create_room avant schema.py (référence du benchmark).
+
+    @param document Document décodé.
+
+    @return True si le document est valide.
+    """
+    if 'backlog' not in document or not isinstance(document['backlog'], list):
+        return False
+    if not all(isinstance(item, dict) and 'feature' in item for item in document['backlog']):
+        return False
+    if 'all_features' in document:
+        if not isinstance(document['all_features'], list):
+            return False
+        if not all(isinstance(item, dict) and 'feature' in item for item in document['all_features']):
+            return False
+    return True
+
+
+class Command(BaseCommand):
+    help = "Mesure la validation d'un backlog volumineux : ancien code, validateur du schéma et cache."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=10000, help="Fonctionnalités du document.")
+        parser.add_argument('--repeat', type=int, default=20, help="Exécutions par mesure.")
+
+    def handle(self, *args, **options):
+        items, repeat = options['items'], options['repeat']
+        document = {
+            "backlog": [{"feature": f"Story {index}", "owner": "alice"} for index in range(items)],
+            "all_features": [{"feature": f"Done {index}", "priority": "5"} for index in range(items // 10)],
+        }
+        raw = json.dumps(document).encode()
+
+        def cold():
+            clear_schema_cache()
+            validate_backlog_json(raw)
+
+        cases = [
+            ("décodage JSON seul", lambda: json.loads(raw)),
+            ("ancienne validation", lambda: legacy_validate(document)),
+            ("validateur du schéma", lambda: validate_document(document)),
+            ("décodage + validation", cold),
+            ("document en cache", lambda: validate_backlog_json(raw)),
+        ]
+        self.stdout.write(f"{items} fonctionnalités, {len(raw) / 1024:.0f} Kio, {repeat} exécutions")
+        self.stdout.write(f"{'mesure':<24}{'ms':>10}")
+        validate_backlog_json(raw)
+        for label, func in cases:
+            elapsed = min(timeit.repeat(func, number=1, repeat=repeat))
+            self.stdout.write(f"{label:<24}{elapsed * 1000:>10.3f}")
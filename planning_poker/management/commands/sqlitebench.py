@@ -0,0 +1,133 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from planning_poker.management.commands.loadtest import percentile
+
+PROFILES = ('default', 'tuned')
+"""@var PROFILES
+@brief Profils comparés : réglages standard de Django, puis POKER_SQLITE_PRAGMAS.
+"""
+
+
+def connect(path, profile):
+    """
+    @brief Ouvre une connexion configurée comme le ferait Django pour le profil donné.
+
+    @param path Chemin de la base.
+    @param profile 'default' ou 'tuned'.
+
+    @return Tuple (connexion, instruction de début de transaction).
+    """
+    # isolation_level=None : transactions explicites, comme le backend SQLite de Django
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+    if profile == 'tuned':
+        for name, value in settings.POKER_SQLITE_PRAGMAS.items():
+            connection.execute(f"PRAGMA {name}={value}")
+        return connection, "BEGIN IMMEDIATE"
+    return connection, "BEGIN"
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare la contention des écritures concurrentes sur SQLite entre le profil "
+        "par défaut et le profil réglé (WAL, busy_timeout, BEGIN IMMEDIATE)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=16, help="Threads écrivains.")
+        parser.add_argument('--readers', type=int, default=4, help="Threads lecteurs.")
+        parser.add_argument('--duration', type=float, default=3.0, help="Durée par profil (s).")
+        parser.add_argument('--players', type=int, default=50, help="Joueurs de la room simulée.")
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{options['writers']} écrivains, {options['readers']} lecteurs, {options['duration']} s par profil"
+        )
+        self.stdout.write(
+            f"{'profil':<10}{'écritures':>11}{'écr./s':>10}{'verrous':>10}{'taux':>9}{'p95 (ms)':>11}{'lectures':>10}"
+        )
+        for profile in PROFILES:
+            with tempfile.TemporaryDirectory() as directory:
+                result = self.run_profile(os.path.join(directory, 'bench.sqlite3'), profile, options)
+            attempts = result['writes'] + result['locked']
+            rate = result['locked'] / attempts if attempts else 0
+            p95 = (percentile(result['latencies'], 95) or 0) * 1000
+            self.stdout.write(
+                f"{profile:<10}{result['writes']:>11}{result['writes'] / options['duration']:>10.0f}"
+                f"{result['locked']:>10}{rate:>9.1%}{p95:>11.2f}{result['reads']:>10}"
+            )
+
+    def run_profile(self, path, profile, options):
+        """
+        @brief Fait tourner écrivains et lecteurs sur une base neuve pendant la durée demandée.
+
+        @details Chaque écriture reproduit une transition de round : lecture des joueurs de
+        la room puis mise à jour de votes dans la même transaction.
+
+        @return Dictionnaire {writes, locked, reads, latencies}.
+        """
+        setup, _ = connect(path, profile)
+        setup.execute("CREATE TABLE player (id INTEGER PRIMARY KEY, room INTEGER, name TEXT, vote INTEGER)")
+        setup.executemany(
+            "INSERT INTO player (room, name, vote) VALUES (1, ?, NULL)",
+            [(f"joueur-{index}",) for index in range(options['players'])],
+        )
+        setup.close()
+
+        result = {'writes': 0, 'locked': 0, 'reads': 0, 'latencies': []}
+        lock = threading.Lock()
+        deadline = time.monotonic() + options['duration']
+
+        def writer(index):
+            connection, begin = connect(path, profile)
+            writes, locked, latencies = 0, 0, []
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    connection.execute(begin)
+                    connection.execute("SELECT count(*) FROM player WHERE room = 1 AND vote IS NULL").fetchone()
+                    connection.execute(
+                        "UPDATE player SET vote = ? WHERE room = 1 AND name = ?",
+                        (writes % 13, f"joueur-{index % options['players']}"),
+                    )
+                    connection.execute("COMMIT")
+                    writes += 1
+                    latencies.append(time.perf_counter() - start)
+                except sqlite3.OperationalError as error:
+                    if 'locked' not in str(error) and 'busy' not in str(error):
+                        raise
+                    locked += 1
+                    if connection.in_transaction:
+                        connection.execute("ROLLBACK")
+            connection.close()
+            with lock:
+                result['writes'] += writes
+                result['locked'] += locked
+                result['latencies'].extend(latencies)
+
+        def reader():
+            connection, _ = connect(path, profile)
+            reads = 0
+            while time.monotonic() < deadline:
+                try:
+                    connection.execute("SELECT name, vote FROM player WHERE room = 1").fetchall()
+                    reads += 1
+                except sqlite3.OperationalError:
+                    pass
+            connection.close()
+            with lock:
+                result['reads'] += reads
+
+        threads = [threading.Thread(target=writer, args=(index,)) for index in range(options['writers'])]
+        threads += [threading.Thread(target=reader) for _ in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return result
@@ -0,0 +1,393 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+"""@var DEFAULT_BUCKETS
+@brief Bornes (en secondes) des histogrammes de latence.
+"""
+
+current_handler = contextvars.ContextVar('current_handler', default='other')
+"""@var current_handler
+@brief Handler en cours d'exécution, utilisé pour attribuer les requêtes SQL.
+
+@details Les variables de contexte sont recopiées par sync_to_async : les requêtes exécutées
+dans le thread de la base sont donc attribuées au handler asynchrone qui les a déclenchées.
+"""
+
+
+class Metric:
+    """
+    @brief Métrique de base : un ensemble de valeurs indexées par les valeurs des labels.
+
+    @details Les mises à jour sont protégées par un verrou : elles sont sûres depuis la
+    boucle asyncio comme depuis les threads de sync_to_async.
+    """
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        """
+        @brief Crée et enregistre la métrique.
+
+        @param name Nom de la métrique (format Prometheus).
+        @param documentation Description affichée dans la ligne HELP.
+        @param labelnames Noms des labels.
+        @param registry Registre dans lequel l'enregistrer (REGISTRY par défaut).
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} attend les labels {self.labelnames}")
+        return tuple(str(label) for label in labels)
+
+    def samples(self):
+        """
+        @brief Copie des valeurs courantes.
+
+        @return Dictionnaire {tuple des labels: valeur}.
+        """
+        with self._lock:
+            return {labels: self._copy(value) for labels, value in self._values.items()}
+
+    def _copy(self, value):
+        return value
+
+
+class Counter(Metric):
+    """
+    @brief Compteur monotone.
+    """
+    kind = 'counter'
+
+    def inc(self, *labels, amount=1):
+        """
+        @brief Incrémente le compteur.
+
+        @param labels Valeurs des labels.
+        @param amount Incrément.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """
+    @brief Jauge pouvant monter et descendre.
+    """
+    kind = 'gauge'
+
+    def inc(self, *labels, amount=1):
+        """
+        @brief Augmente la jauge.
+
+        @param labels Valeurs des labels.
+        @param amount Incrément.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        """
+        @brief Diminue la jauge.
+
+        @param labels Valeurs des labels.
+        @param amount Décrément.
+        """
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value, *labels):
+        """
+        @brief Fixe la valeur de la jauge.
+
+        @param value Nouvelle valeur.
+        @param labels Valeurs des labels.
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    """
+    @brief Histogramme à bornes fixes (compteurs par borne, somme et nombre d'observations).
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        """
+        @brief Crée et enregistre l'histogramme.
+
+        @param buckets Bornes supérieures des intervalles, triées.
+        """
+        self.buckets = tuple(buckets)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, *labels):
+        """
+        @brief Enregistre une observation.
+
+        @param value Valeur observée.
+        @param labels Valeurs des labels.
+        """
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # compteurs par borne (non cumulés), +Inf, somme
+                entry = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[index] += 1
+                    break
+            else:
+                entry[len(self.buckets)] += 1
+            entry[-1] += value
+
+    @contextmanager
+    def time(self, *labels):
+        """
+        @brief Mesure la durée du bloc `with` et l'enregistre.
+
+        @param labels Valeurs des labels.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def _copy(self, value):
+        return list(value)
+
+
+class Registry:
+    """
+    @brief Registre des métriques d'un processus, et agrégation entre processus.
+
+    @details Si le réglage POKER_METRICS_DIR est défini, chaque processus y écrit
+    périodiquement un instantané de ses métriques (`<pid>.json`), et render() additionne
+    les instantanés des autres processus à ses propres valeurs. Les compteurs et
+    histogrammes des processus terminés restent comptés ; leurs jauges sont ignorées.
+    """
+
+    def __init__(self):
+        """
+        @brief Crée un registre vide.
+        """
+        self._metrics = {}
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """
+        @brief Enregistre une métrique.
+
+        @param metric Instance de Metric.
+        """
+        self._metrics[metric.name] = metric
+
+    @property
+    def directory(self):
+        """
+        @brief Répertoire partagé entre processus, ou None en mode mono-processus.
+        """
+        return getattr(settings, 'POKER_METRICS_DIR', None)
+
+    def snapshot(self):
+        """
+        @brief Instantané sérialisable des métriques de ce processus.
+        """
+        return {
+            name: [[list(labels), value] for labels, value in metric.samples().items()]
+            for name, metric in self._metrics.items()
+        }
+
+    def start_writer(self, interval=1.0):
+        """
+        @brief Démarre (une fois) le thread qui publie l'instantané du processus.
+
+        @param interval Période d'écriture en secondes.
+        """
+        if not self.directory:
+            return
+        with self._lock:
+            if self._writer is not None and self._writer.is_alive():
+                return
+            self._writer = threading.Thread(target=self._write_loop, args=(interval,), daemon=True)
+            self._writer.start()
+        atexit.register(self.write_snapshot)
+
+    def _write_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            self.write_snapshot()
+
+    def write_snapshot(self):
+        """
+        @brief Écrit atomiquement l'instantané de ce processus dans le répertoire partagé.
+        """
+        directory = self.directory
+        if not directory:
+            return
+        path = os.path.join(directory, f"{os.getpid()}.json")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(path + '.tmp', 'w') as handle:
+                json.dump(self.snapshot(), handle)
+            os.replace(path + '.tmp', path)
+        except OSError:
+            logger.exception("Impossible d'écrire les métriques dans %s", directory)
+
+    def _other_processes(self):
+        """
+        @brief Instantanés des autres processus : liste de tuples (vivant, instantané).
+        """
+        directory = self.directory
+        if not directory or not os.path.isdir(directory):
+            return []
+        snapshots = []
+        for filename in os.listdir(directory):
+            pid, extension = os.path.splitext(filename)
+            if extension != '.json' or not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as handle:
+                    snapshots.append((_is_alive(int(pid)), json.load(handle)))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def collect(self):
+        """
+        @brief Valeurs agrégées sur tous les processus.
+
+        @return Liste de tuples (métrique, {labels: valeur}).
+        """
+        others = self._other_processes()
+        collected = []
+        for name, metric in self._metrics.items():
+            values = metric.samples()
+            for alive, snapshot in others:
+                if metric.kind == 'gauge' and not alive:
+                    continue
+                for labels, value in snapshot.get(name, []):
+                    key = tuple(labels)
+                    if metric.kind == 'histogram':
+                        current = values.setdefault(key, [0] * len(value))
+                        values[key] = [a + b for a, b in zip(current, value)]
+                    else:
+                        values[key] = values.get(key, 0) + value
+            collected.append((metric, values))
+        return collected
+
+    def render(self):
+        """
+        @brief Exposition des métriques au format texte Prometheus.
+
+        @return Chaîne de caractères.
+        """
+        lines = []
+        for metric, values in self.collect():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for labels, value in sorted(values.items()):
+                pairs = list(zip(metric.labelnames, labels))
+                if metric.kind != 'histogram':
+                    lines.append(f"{metric.name}{_format_labels(pairs)} {value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(metric.buckets + (float('inf'),), value[:-1]):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(f"{metric.name}_bucket{_format_labels(pairs + [('le', le)])} {cumulative}")
+                lines.append(f"{metric.name}_sum{_format_labels(pairs)} {value[-1]}")
+                lines.append(f"{metric.name}_count{_format_labels(pairs)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+REGISTRY = Registry()
+
+ACTIVE_CONNECTIONS = Gauge('poker_ws_connections', "Connexions websocket ouvertes.")
+ACTIVE_ROOMS = Gauge('poker_rooms_active', "Rooms dont l'état est chargé en mémoire.")
+MESSAGES_RECEIVED = Counter('poker_ws_messages_received_total', "Messages reçus par type.", ['type'])
+GROUP_SENDS = Counter('poker_group_sends_total', "Appels à group_send.")
+OUTBOX_DEPTH = Gauge('poker_ws_outbox_messages', "Messages en attente d'envoi, toutes connexions confondues.")
+OUTBOX_DEPTH_AT_PUT = Histogram(
+    'poker_ws_outbox_depth', "Taille de la file d'envoi d'une connexion à chaque ajout.",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+OUTBOX_COALESCED = Counter('poker_ws_outbox_coalesced_total', "Mises à jour remplacées par une plus récente avant leur envoi.")
+SLOW_DISCONNECTS = Counter('poker_ws_slow_disconnects_total', "Connexions fermées car leur file d'envoi débordait.")
+LAYER_GROUP_SENDS = Counter('poker_layer_group_sends_total', "Diffusions du channel layer hybride, locales ou relayées par Redis.", ['scope'])
+HANDLER_LATENCY = Histogram('poker_handler_latency_seconds', "Durée de traitement des messages par handler.", ['handler'])
+VOTE_BROADCAST_LATENCY = Histogram('poker_vote_broadcast_latency_seconds', "Délai entre la réception d'un vote et sa diffusion.")
+ROOM_CACHE_REQUESTS = Counter('poker_room_cache_requests_total', "Lectures du cache des rooms par résultat.", ['result'])
+DB_QUERIES = Counter('poker_db_queries_total', "Requêtes SQL exécutées par handler.", ['handler'])
+
+
+@contextmanager
+def track_handler(handler):
+    """
+    @brief Attribue au handler les requêtes SQL du bloc `with` et mesure sa durée.
+
+    @param handler Nom du handler (type du message traité).
+    """
+    token = current_handler.set(handler)
+    try:
+        with HANDLER_LATENCY.time(handler):
+            yield
+    finally:
+        current_handler.reset(token)
+
+
+def count_queries(execute, sql, params, many, context):
+    """
+    @brief Enrobeur d'exécution SQL (connection.execute_wrapper) comptant les requêtes par handler.
+    """
+    DB_QUERIES.inc(current_handler.get())
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """
+    @brief Récepteur du signal connection_created : installe count_queries sur la connexion.
+    """
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
@@ -0,0 +1,34 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    @brief WhiteNoiseMiddleware utilisable dans une chaîne de middlewares asynchrone.
+
+    @details WhiteNoiseMiddleware est synchrone seulement : sous ASGI, Django exécute alors
+    toute la chaîne (et chaque vue) dans le thread partagé de sync_to_async. La recherche
+    d'un fichier statique n'est qu'une lecture de dictionnaire (hors DEBUG) : elle peut
+    se faire directement dans la boucle asyncio.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return self.serve(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,83 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:29
+
+import json
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def _load(value):
+    try:
+        items = json.loads(value) if value else []
+    except ValueError:
+        return []
+    return [item for item in items if isinstance(item, dict) and 'feature' in item] if isinstance(items, list) else []
+
+
+def backlog_to_features(apps, schema_editor):
+    """
+    Copie les champs JSON `all_features` puis `backlog` de chaque room dans la table Feature.
+    """
+    PokerRoom = apps.get_model('planning_poker', 'PokerRoom')
+    Feature = apps.get_model('planning_poker', 'Feature')
+    features = []
+    for room in PokerRoom.objects.all().iterator():
+        items = [(item, 'estimated') for item in _load(room.all_features)]
+        items += [(item, 'pending') for item in _load(room.backlog)]
+        for ordinal, (item, status) in enumerate(items):
+            priority = item.get('priority')
+            features.append(Feature(
+                room=room,
+                ordinal=ordinal,
+                status=status,
+                title=str(item['feature']),
+                priority=None if priority is None else str(priority),
+                extra={key: value for key, value in item.items() if key not in ('feature', 'priority')},
+            ))
+    Feature.objects.bulk_create(features, batch_size=500)
+
+
+def features_to_backlog(apps, schema_editor):
+    """
+    Reconstruit les champs JSON `backlog` et `all_features` à partir de la table Feature.
+    """
+    PokerRoom = apps.get_model('planning_poker', 'PokerRoom')
+    Feature = apps.get_model('planning_poker', 'Feature')
+    for room in PokerRoom.objects.all().iterator():
+        backlog, all_features = [], []
+        for feature in Feature.objects.filter(room=room).order_by('ordinal'):
+            item = {'feature': feature.title, **feature.extra}
+            if feature.priority is not None:
+                item['priority'] = feature.priority
+            (all_features if feature.status == 'estimated' else backlog).append(item)
+        room.backlog = json.dumps(backlog)
+        room.all_features = json.dumps(all_features)
+        room.save(update_fields=['backlog', 'all_features'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning_poker', '0009_pokerroom_all_features'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Feature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ordinal', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'À estimer'), ('estimated', 'Estimée')], default='pending', max_length=10)),
+                ('title', models.TextField()),
+                ('priority', models.CharField(blank=True, max_length=20, null=True)),
+                ('extra', models.JSONField(blank=True, default=dict)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='features', to='planning_poker.pokerroom')),
+            ],
+            options={
+                'ordering': ['ordinal'],
+                'indexes': [models.Index(fields=['room', 'status', 'ordinal'], name='feature_room_status_ordinal')],
+                'constraints': [models.UniqueConstraint(fields=('room', 'ordinal'), name='unique_feature_ordinal')],
+            },
+        ),
+        migrations.RunPython(backlog_to_features, features_to_backlog),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning_poker', '0010_feature'),
+    ]
+
+    operations = [
+        # valeur par défaut pour que la migration inverse puisse recréer la colonne
+        migrations.AlterField(
+            model_name='pokerroom',
+            name='backlog',
+            field=models.TextField(default='[]'),
+        ),
+        migrations.RemoveField(
+            model_name='pokerroom',
+            name='all_features',
+        ),
+        migrations.RemoveField(
+            model_name='pokerroom',
+            name='backlog',
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:43
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_players(apps, schema_editor):
+    """
+    Supprime les doublons (room, name) de Player en gardant la ligne la plus récente.
+    """
+    Player = apps.get_model('planning_poker', 'Player')
+    duplicates = (
+        Player.objects.values('room_id', 'name')
+        .annotate(count=Count('id'), keep=Max('id'))
+        .filter(count__gt=1)
+    )
+    for duplicate in duplicates.iterator():
+        Player.objects.filter(room_id=duplicate['room_id'], name=duplicate['name']).exclude(
+            pk=duplicate['keep']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning_poker', '0011_remove_pokerroom_backlog_all_features'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_players, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='player',
+            index=models.Index(condition=models.Q(('vote__isnull', True)), fields=['room'], name='player_room_not_voted'),
+        ),
+        migrations.AddConstraint(
+            model_name='player',
+            constraint=models.UniqueConstraint(fields=('room', 'name'), name='unique_player_room_name'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning_poker', '0012_player_unique_room_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='pokerroom',
+            name='mode',
+            field=models.CharField(choices=[('unanimity', 'Unanimité'), ('absolute_majority', 'Majorité absolue'), ('relative_majority', 'Majorité relative'), ('median', 'Médiane'), ('average', 'Moyenne')], default='unanimity', max_length=20),
+        ),
+    ]
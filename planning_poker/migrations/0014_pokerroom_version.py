@@ -0,0 +1,24 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:58
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planning_poker', '0013_pokerroom_consensus_modes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pokerroom',
+            name='updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='pokerroom',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
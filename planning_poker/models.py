@@ -1,21 +1,185 @@
 from django.db import models
-import json
+from django.utils import timezone
+
+
+class PokerRoomManager(models.Manager):
+    """
+    @brief Manager des rooms, capable de créer une room avec son backlog.
+    """
+
+    def create_with_backlog(self, backlog=(), all_features=(), **fields):
+        """
+        @brief Crée une room et ses fonctionnalités.
+
+        @param backlog Liste des fonctionnalités à estimer (objets avec une clé 'feature').
+        @param all_features Liste des fonctionnalités déjà estimées.
+        @param fields Champs de la PokerRoom.
+
+        @return La PokerRoom créée.
+        """
+        room = self.create(**fields)
+        room.add_features(backlog, all_features)
+        return room
+
+    def bump_version(self, room_id):
+        """
+        @brief Signale une modification du backlog d'une room (version et date de modification).
+
+        @details À appeler après toute écriture groupée sur les Feature d'une room : la
+        version sert de validateur aux exports (ETag / Last-Modified).
+
+        @param room_id Identifiant de la room.
+        """
+        self.filter(pk=room_id).update(version=models.F('version') + 1, updated_at=timezone.now())
 
 
 class PokerRoom(models.Model):
     name = models.CharField(max_length=50, unique=True)
     creator = models.CharField(max_length=50)
     created_at = models.DateTimeField(auto_now_add=True)
-    mode = models.CharField(max_length=20, choices=[('unanimity', 'Unanimité'), ('absolute_majority', 'Majorité absolue')], default='unanimity')
-    backlog = models.TextField()
-    all_features = models.TextField(default="[]")
+    mode = models.CharField(max_length=20, choices=[
+        ('unanimity', 'Unanimité'),
+        ('absolute_majority', 'Majorité absolue'),
+        ('relative_majority', 'Majorité relative'),
+        ('median', 'Médiane'),
+        ('average', 'Moyenne'),
+    ], default='unanimity')
+    version = models.PositiveIntegerField(default=0)
+    """@var version
+    @brief Incrémentée à chaque modification du backlog (voir PokerRoomManager.bump_version).
+    """
+    updated_at = models.DateTimeField(default=timezone.now)
+    """@var updated_at
+    @brief Date de la dernière modification du backlog.
+    """
+
+    objects = PokerRoomManager()
+
+    def add_features(self, backlog=(), all_features=()):
+        """
+        @brief Ajoute des fonctionnalités à la fin du backlog de la room.
+
+        @details Les fonctionnalités déjà estimées sont numérotées avant celles à estimer,
+        afin que l'ordre des ordinaux corresponde à l'ordre d'estimation.
+
+        @param backlog Liste des fonctionnalités à estimer.
+        @param all_features Liste des fonctionnalités déjà estimées.
+
+        @return Liste des Feature créées.
+        """
+        last = self.features.aggregate(last=models.Max('ordinal'))['last']
+        start = 0 if last is None else last + 1
+        items = [(item, Feature.ESTIMATED) for item in all_features] + [(item, Feature.PENDING) for item in backlog]
+        features = Feature.objects.bulk_create([
+            Feature.from_dict(item, room=self, ordinal=start + offset, status=status)
+            for offset, (item, status) in enumerate(items)
+        ])
+        if features:
+            PokerRoom.objects.bump_version(self.pk)
+        return features
+
+    def backlog(self):
+        """
+        @brief Fonctionnalités restant à estimer, dans l'ordre.
+
+        @return Liste de dictionnaires au format du backlog JSON.
+        """
+        return [feature.as_dict() for feature in self.features.filter(status=Feature.PENDING)]
+
+    def all_features(self):
+        """
+        @brief Fonctionnalités déjà estimées, dans l'ordre d'estimation.
+
+        @return Liste de dictionnaires au format du backlog JSON.
+        """
+        return [feature.as_dict() for feature in self.features.filter(status=Feature.ESTIMATED)]
+
+
+class Feature(models.Model):
+    """
+    @brief Modèle représentant une fonctionnalité du backlog d'une room.
+
+    @details Remplace les champs JSON `backlog` et `all_features` de PokerRoom : passer à la
+    fonctionnalité suivante se fait par un UPDATE indexé au lieu de réécrire tout le backlog.
+    """
+    PENDING = 'pending'
+    ESTIMATED = 'estimated'
+
+    room = models.ForeignKey(PokerRoom, on_delete=models.CASCADE, related_name='features')
+    """@var room
+    @brief Room à laquelle appartient la fonctionnalité.
+    """
 
+    ordinal = models.PositiveIntegerField()
+    """@var ordinal
+    @brief Position de la fonctionnalité dans le backlog de la room.
+    """
+
+    status = models.CharField(max_length=10, choices=[(PENDING, 'À estimer'), (ESTIMATED, 'Estimée')], default=PENDING)
+    """@var status
+    @brief État de la fonctionnalité : à estimer ou estimée.
+    """
 
+    title = models.TextField()
+    """@var title
+    @brief Intitulé de la fonctionnalité (clé 'feature' du JSON).
+    """
 
-    def save(self, *args, **kwargs):
-        if isinstance(self.backlog, list):
-            self.backlog = json.dumps(self.backlog)
-        super().save(*args, **kwargs)
+    priority = models.CharField(max_length=20, null=True, blank=True)
+    """@var priority
+    @brief Priorité votée, `null` tant que la fonctionnalité n'est pas estimée.
+    """
+
+    extra = models.JSONField(default=dict, blank=True)
+    """@var extra
+    @brief Autres clés de l'objet JSON d'origine, restituées telles quelles.
+    """
+
+    class Meta:
+        ordering = ['ordinal']
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'ordinal'], name='unique_feature_ordinal'),
+        ]
+        indexes = [
+            models.Index(fields=['room', 'status', 'ordinal'], name='feature_room_status_ordinal'),
+        ]
+
+    @classmethod
+    def from_dict(cls, item, **fields):
+        """
+        @brief Construit une Feature (non sauvegardée) à partir d'un objet du backlog JSON.
+
+        @param item Dictionnaire contenant au moins la clé 'feature'.
+        @param fields Autres champs du modèle (room, ordinal, status).
+
+        @return Une instance de Feature.
+        """
+        title, priority, extra = cls.split_dict(item)
+        return cls(title=title, priority=priority, extra=extra, **fields)
+
+    @staticmethod
+    def split_dict(item):
+        """
+        @brief Répartit un objet du backlog JSON entre les champs du modèle.
+
+        @param item Dictionnaire contenant au moins la clé 'feature'.
+
+        @return Tuple (title, priority, extra).
+        """
+        extra = {key: value for key, value in item.items() if key not in ('feature', 'priority')}
+        priority = item.get('priority')
+        return str(item['feature']), None if priority is None else str(priority), extra
+
+    def as_dict(self):
+        """
+        @brief Représentation au format du backlog JSON.
+
+        @return Dictionnaire {'feature': ..., [autres clés], ['priority': ...]}.
+        """
+        data = {'feature': self.title, **self.extra}
+        if self.priority is not None:
+            data['priority'] = self.priority
+        return data
 
 class Player(models.Model):
     """
@@ -37,3 +201,12 @@ class Player(models.Model):
     """@var vote
     @brief Vote du joueur, peut être `null` si le joueur n'a pas encore voté.
     """
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'name'], name='unique_player_room_name'),
+        ]
+        indexes = [
+            # index partiel (SQLite, PostgreSQL) : joueurs sans vote d'une room
+            models.Index(fields=['room'], condition=models.Q(vote__isnull=True), name='player_room_not_voted'),
+        ]
@@ -0,0 +1,130 @@
+import asyncio
+import logging
+from collections import deque
+
+from django.conf import settings
+
+from .metrics import OUTBOX_COALESCED, OUTBOX_DEPTH, OUTBOX_DEPTH_AT_PUT
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_LIMIT = getattr(settings, 'POKER_OUTBOX_LIMIT', 64)
+"""@var OUTBOX_LIMIT
+@brief Messages en attente d'envoi au-delà desquels une connexion est jugée trop lente et fermée.
+"""
+
+SLOW_CLOSE_CODE = 4008
+"""@var SLOW_CLOSE_CODE
+@brief Code de fermeture websocket d'une connexion trop lente ; la raison donne la position
+de reprise `resume=<époque>:<seq>`.
+"""
+
+STATE_KEYS = frozenset({'not_voted', 'all_voted'})
+"""@var STATE_KEYS
+@brief Clés de `changes` décrivant un état : seule la dernière valeur compte, les valeurs
+encore en attente sont remplacées par les plus récentes.
+"""
+
+CRITICAL_KEYS = frozenset({'reveal', 'redirect', 'feature', 'final_backlog'})
+"""@var CRITICAL_KEYS
+@brief Clés de `changes` marquant un changement de tour : aucune fusion ne les traverse.
+"""
+
+
+class Outbox:
+    """
+    @brief File d'envoi bornée d'une connexion websocket.
+
+    @details Les messages sont envoyés dans l'ordre par une tâche dédiée : le consommateur
+    vide son channel sans attendre le client. Tant qu'un `room_update` attend son envoi, un
+    plus récent qui porte les mêmes clés d'état (STATE_KEYS) les lui retire, et il est
+    abandonné s'il ne lui reste rien ; la recherche s'arrête au premier message de
+    changement de tour (CRITICAL_KEYS), si bien que révélations et redirections restent
+    dans l'ordre, chacune avec son propre état. Le client tolère les numéros de séquence
+    manquants.
+
+    La file ne se remplit que si l'envoi attend le client : c'est le cas sous runasgi, dont
+    le serveur (voir server.py) suspend chaque envoi tant que le tampon d'écriture de la
+    connexion est plein.
+    """
+
+    def __init__(self, send, limit=OUTBOX_LIMIT):
+        """
+        @param send Coroutine d'envoi d'un message au client.
+        @param limit Taille maximale de la file.
+        """
+        self._send = send
+        self.limit = limit
+        self._pending = deque()
+        self._task = None
+        self.closed = False
+        self.position = None
+        """@var position
+        @brief Numéro de séquence du dernier message transmis au client (instantané ou mise à jour).
+        """
+
+    def __len__(self):
+        return len(self._pending)
+
+    def put(self, message):
+        """
+        @brief Ajoute un message à la file, après fusion des états qu'il remplace.
+
+        @param message Message à envoyer.
+
+        @return False si la file dépasse sa taille maximale (client trop lent), True sinon.
+        """
+        if self.closed:
+            return True
+        if message.get("type") == "room_update":
+            self._coalesce(message["changes"])
+        self._pending.append(message)
+        OUTBOX_DEPTH.inc()
+        OUTBOX_DEPTH_AT_PUT.observe(len(self._pending))
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._drain())
+        return len(self._pending) <= self.limit
+
+    def _coalesce(self, changes):
+        superseded = STATE_KEYS & changes.keys()
+        if not superseded:
+            return
+        for earlier in reversed(self._pending.copy()):
+            if earlier.get("type") != "room_update" or CRITICAL_KEYS & earlier["changes"].keys():
+                break
+            if superseded & earlier["changes"].keys():
+                remaining = {key: value for key, value in earlier["changes"].items() if key not in superseded}
+                if remaining:
+                    earlier["changes"] = remaining
+                else:
+                    self._pending.remove(earlier)
+                    OUTBOX_DEPTH.dec()
+                    OUTBOX_COALESCED.inc()
+
+    async def _drain(self):
+        try:
+            while self._pending:
+                message = self._pending.popleft()
+                OUTBOX_DEPTH.dec()
+                await self._send(message)
+                if "seq" in message:
+                    self.position = message["seq"]
+        except Exception:
+            logger.exception("Envoi au client impossible")
+            self._discard()
+        finally:
+            self._task = None
+
+    def _discard(self):
+        OUTBOX_DEPTH.dec(amount=len(self._pending))
+        self._pending.clear()
+
+    def close(self):
+        """
+        @brief Abandonne les messages en attente et arrête l'envoi.
+        """
+        self.closed = True
+        self._discard()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
@@ -0,0 +1,82 @@
+import hashlib
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.template.loader import render_to_string
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+PAGE_CACHE_TTL = getattr(settings, 'POKER_PAGE_CACHE_TTL', 600)
+"""@var PAGE_CACHE_TTL
+@brief Durée de vie (en secondes) des pages rendues en cache.
+"""
+
+
+def _templates_release():
+    directory = os.path.join(os.path.dirname(__file__), 'templates')
+    mtimes = [os.stat(os.path.join(directory, name)).st_mtime_ns for name in sorted(os.listdir(directory))]
+    # les pages contiennent les URL empreintées des fichiers statiques
+    mtimes.append(getattr(staticfiles_storage, 'manifest_hash', ''))
+    return hashlib.blake2b(str(mtimes).encode(), digest_size=6).hexdigest()
+
+
+RELEASE = getattr(settings, 'POKER_RELEASE', None) or _templates_release()
+"""@var RELEASE
+@brief Identifiant de la version des templates, inclus dans les clés de cache et les ETag
+pour qu'un déploiement invalide les pages (réglage POKER_RELEASE, par défaut une empreinte
+des dates de modification des templates et du manifeste des fichiers statiques, identique
+dans tous les workers).
+"""
+
+
+def page_etag(*parts):
+    """
+    @brief ETag d'une page, calculé à partir des valeurs dont elle dépend.
+
+    @param parts Valeurs dont dépend la page (nom de room, version, pseudo...).
+
+    @return ETag entre guillemets.
+    """
+    digest = hashlib.blake2b(repr((RELEASE,) + parts).encode(), digest_size=12).hexdigest()
+    return quote_etag(digest)
+
+
+def cached_page(request, template_name, context, key_parts, etag, last_modified=None):
+    """
+    @brief Rend une page dont le contenu ne dépend que de `key_parts`, avec validation HTTP.
+
+    @details Une requête conditionnelle dont l'ETag (ou la date) correspond reçoit un 304 ;
+    sinon le HTML est lu dans le cache par défaut, et la template n'est rendue qu'au
+    premier affichage de chaque version. `context` peut être une fonction, appelée
+    seulement si la page doit être rendue.
+
+    La page reste privée (elle peut dépendre de la session) et le navigateur doit la
+    revalider à chaque affichage.
+
+    @param request Requête HTTP.
+    @param template_name Template de la page.
+    @param context Dictionnaire de contexte, ou fonction sans argument le renvoyant.
+    @param key_parts Valeurs dont dépend la page (incluant la version de la room).
+    @param etag ETag de la page (voir page_etag()).
+    @param last_modified Timestamp de dernière modification, ou None.
+
+    @return Une HttpResponse.
+    """
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        cache = caches['default']
+        key = "poker:page:" + hashlib.blake2b(repr((RELEASE, template_name) + key_parts).encode(), digest_size=16).hexdigest()
+        html = cache.get(key)
+        if html is None:
+            html = render_to_string(template_name, context() if callable(context) else context)
+            cache.set(key, html, PAGE_CACHE_TTL)
+        response = HttpResponse(html)
+    response.headers['ETag'] = etag
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Cookie',))
+    return response
@@ -0,0 +1,119 @@
+import heapq
+import time
+from collections import Counter
+
+from django.conf import settings
+
+PRESENCE_TTL = getattr(settings, 'POKER_PRESENCE_TTL', 45)
+"""@var PRESENCE_TTL
+@brief Délai (en secondes) sans heartbeat au bout duquel un joueur est considéré parti.
+Le client envoie un heartbeat toutes les 15 secondes.
+"""
+
+PRESENCE_GRACE = getattr(settings, 'POKER_PRESENCE_GRACE', 10)
+"""@var PRESENCE_GRACE
+@brief Délai (en secondes) laissé à un joueur dont le dernier websocket s'est fermé pour se
+reconnecter avant d'être considéré parti.
+"""
+
+SWEEP_BATCH = getattr(settings, 'POKER_PRESENCE_SWEEP_BATCH', 500)
+"""@var SWEEP_BATCH
+@brief Nombre maximal d'entrées examinées par balayage, pour borner le coût d'un message.
+"""
+
+
+class Presence:
+    """
+    @brief Ensemble des joueurs présents d'une room, avec une échéance par joueur.
+
+    @details Équivalent en mémoire d'un sorted set Redis : un tas (échéance, nom) permet
+    de retrouver les échéances dépassées sans parcourir tous les joueurs. Les entrées
+    périmées du tas (échéance repoussée depuis) sont ignorées au balayage, et le tas est
+    reconstruit quand elles deviennent trop nombreuses.
+
+    Les appels doivent être protégés par le verrou de la room.
+    """
+
+    def __init__(self, ttl=None, grace=None):
+        """
+        @brief Crée un ensemble vide.
+
+        @param ttl Durée de présence accordée par un heartbeat (PRESENCE_TTL par défaut).
+        @param grace Délai de reconnexion après fermeture du dernier websocket (PRESENCE_GRACE par défaut).
+        """
+        self.ttl = PRESENCE_TTL if ttl is None else ttl
+        self.grace = PRESENCE_GRACE if grace is None else grace
+        self._deadlines = {}
+        self._heap = []
+        self._sockets = Counter()
+
+    def __contains__(self, name):
+        return name in self._deadlines
+
+    def __len__(self):
+        return len(self._deadlines)
+
+    def _set_deadline(self, name, deadline):
+        self._deadlines[name] = deadline
+        heapq.heappush(self._heap, (deadline, name))
+        if len(self._heap) > 2 * len(self._deadlines) + 64:
+            self._heap = [(deadline, name) for name, deadline in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    def touch(self, name):
+        """
+        @brief Prolonge la présence d'un joueur (heartbeat ou action).
+
+        @param name Pseudo du joueur.
+        """
+        self._set_deadline(name, time.monotonic() + self.ttl)
+
+    def connect(self, name):
+        """
+        @brief Enregistre l'ouverture d'un websocket du joueur.
+
+        @param name Pseudo du joueur.
+        """
+        self._sockets[name] += 1
+        self.touch(name)
+
+    def disconnect(self, name):
+        """
+        @brief Enregistre la fermeture d'un websocket du joueur ; s'il n'en a plus d'ouvert,
+        sa présence expire après le délai de grâce.
+
+        @param name Pseudo du joueur.
+        """
+        self._sockets[name] -= 1
+        if self._sockets[name] > 0:
+            return
+        del self._sockets[name]
+        if name in self._deadlines:
+            self._set_deadline(name, min(self._deadlines[name], time.monotonic() + self.grace))
+
+    def remove(self, name):
+        """
+        @brief Retire un joueur de l'ensemble.
+
+        @param name Pseudo du joueur.
+        """
+        self._deadlines.pop(name, None)
+
+    def expired(self, batch=None):
+        """
+        @brief Retire et renvoie les joueurs dont l'échéance est dépassée.
+
+        @param batch Nombre maximal d'entrées du tas examinées (SWEEP_BATCH par défaut).
+
+        @return Liste des pseudos expirés.
+        """
+        batch = SWEEP_BATCH if batch is None else batch
+        now = time.monotonic()
+        expired = []
+        while self._heap and batch > 0 and self._heap[0][0] <= now:
+            deadline, name = heapq.heappop(self._heap)
+            batch -= 1
+            if self._deadlines.get(name) == deadline:
+                del self._deadlines[name]
+                expired.append(name)
+        return expired
@@ -0,0 +1,160 @@
+import json
+import zlib
+
+import msgpack
+from django.conf import settings
+
+JSON_SUBPROTOCOL = 'poker.json'
+"""@var JSON_SUBPROTOCOL
+@brief Sous-protocole websocket des trames texte JSON (protocole par défaut).
+"""
+
+MSGPACK_SUBPROTOCOL = 'poker.msgpack'
+"""@var MSGPACK_SUBPROTOCOL
+@brief Sous-protocole websocket des trames binaires MessagePack.
+"""
+
+TYPE_CODES = {
+    'room_update': 1,
+    'error': 2,
+    'snapshot': 3,
+    'vote': 10,
+    'reveal': 11,
+    'start_feature': 12,
+    'heartbeat': 13,
+}
+"""@var TYPE_CODES
+@brief Codes courts des types de message, utilisés à la place de la clé "type" en MessagePack.
+"""
+
+TYPE_NAMES = {code: name for name, code in TYPE_CODES.items()}
+
+FLAG_RAW = 0
+FLAG_DEFLATE = 1
+
+MAX_DECODED_SIZE = getattr(settings, 'POKER_WS_MAX_DECODED_SIZE', 64 * 1024)
+"""@var MAX_DECODED_SIZE
+@brief Taille maximale (en octets) d'une trame compressée reçue une fois décompressée :
+au-delà, la trame est refusée sans être décompressée entièrement.
+"""
+
+
+def _as_message(data):
+    if not isinstance(data, dict):
+        raise ValueError(f"Message attendu sous forme de dictionnaire, {type(data).__name__} reçu.")
+    return data
+
+
+class JsonCodec:
+    """
+    @brief Encodage des messages en trames texte JSON.
+    """
+
+    def __init__(self, subprotocol=None):
+        """
+        @brief Construit le codec.
+
+        @param subprotocol Sous-protocole à annoncer au client (None si le client n'en a proposé aucun).
+        """
+        self.subprotocol = subprotocol
+
+    def encode(self, message):
+        """
+        @brief Encode un message.
+
+        @param message Dictionnaire contenant une clé "type".
+
+        @return Tuple (text_data, bytes_data) à passer à send().
+        """
+        return json.dumps(message), None
+
+    def decode(self, text_data=None, bytes_data=None):
+        """
+        @brief Décode une trame reçue.
+
+        @return Le message sous forme de dictionnaire.
+
+        @exception ValueError Si la trame n'est pas un objet JSON valide.
+        """
+        return _as_message(json.loads(text_data if text_data is not None else bytes_data))
+
+
+class MsgpackCodec:
+    """
+    @brief Encodage des messages en trames binaires MessagePack.
+
+    @details Chaque trame commence par un octet de drapeau (FLAG_RAW ou FLAG_DEFLATE) suivi
+    de la charge MessagePack, compressée avec zlib au-delà de `compression_threshold` octets.
+    La clé "type" est remplacée par la clé "t" contenant le code de TYPE_CODES.
+    """
+    subprotocol = MSGPACK_SUBPROTOCOL
+
+    def __init__(self, compression_threshold=None):
+        """
+        @brief Construit le codec.
+
+        @param compression_threshold Taille (en octets) à partir de laquelle la charge est
+        compressée ; par défaut le réglage POKER_WS_COMPRESSION_THRESHOLD (1024).
+        """
+        if compression_threshold is None:
+            compression_threshold = getattr(settings, 'POKER_WS_COMPRESSION_THRESHOLD', 1024)
+        self.compression_threshold = compression_threshold
+
+    def encode(self, message):
+        """
+        @brief Encode un message.
+
+        @param message Dictionnaire contenant une clé "type".
+
+        @return Tuple (text_data, bytes_data) à passer à send().
+        """
+        message = dict(message)
+        message_type = message.pop('type')
+        message['t'] = TYPE_CODES.get(message_type, message_type)
+        payload = msgpack.packb(message, use_bin_type=True)
+        if len(payload) > self.compression_threshold:
+            return None, bytes([FLAG_DEFLATE]) + zlib.compress(payload)
+        return None, bytes([FLAG_RAW]) + payload
+
+    def decode(self, text_data=None, bytes_data=None):
+        """
+        @brief Décode une trame reçue ; les trames texte sont acceptées en JSON.
+
+        @return Le message sous forme de dictionnaire.
+
+        @exception ValueError Si la trame est vide, son drapeau inconnu, si elle dépasse
+        MAX_DECODED_SIZE octets une fois décompressée ou si elle n'est pas un dictionnaire
+        MessagePack (ou JSON) valide.
+        """
+        if text_data is not None:
+            return _as_message(json.loads(text_data))
+        if not bytes_data:
+            raise ValueError("Trame binaire vide.")
+        flag, payload = bytes_data[0], bytes_data[1:]
+        if flag == FLAG_DEFLATE:
+            decompressor = zlib.decompressobj()
+            payload = decompressor.decompress(payload, MAX_DECODED_SIZE)
+            if decompressor.unconsumed_tail:
+                raise ValueError(f"Trame décompressée trop volumineuse (plus de {MAX_DECODED_SIZE} octets).")
+        elif flag != FLAG_RAW:
+            raise ValueError(f"Drapeau de trame inconnu : {flag}")
+        message = _as_message(msgpack.unpackb(payload, raw=False))
+        code = message.pop('t', None)
+        message['type'] = TYPE_NAMES.get(code, code)
+        return message
+
+
+def negotiate(subprotocols):
+    """
+    @brief Choisit le codec d'une connexion à partir des sous-protocoles proposés par le client.
+
+    @param subprotocols Liste des sous-protocoles de la requête websocket (par ordre de préférence).
+
+    @return Une instance de JsonCodec ou MsgpackCodec ; JSON si aucun protocole connu n'est proposé.
+    """
+    for subprotocol in subprotocols or ():
+        if subprotocol == MSGPACK_SUBPROTOCOL:
+            return MsgpackCodec()
+        if subprotocol == JSON_SUBPROTOCOL:
+            return JsonCodec(JSON_SUBPROTOCOL)
+    return JsonCodec()
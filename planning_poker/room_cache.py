@@ -0,0 +1,221 @@
+import logging
+import threading
+import time
+from collections import namedtuple
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import PokerRoom, Feature
+from .metrics import ROOM_CACHE_REQUESTS
+from .db import db_sync_to_async
+
+logger = logging.getLogger(__name__)
+
+RoomInfo = namedtuple(
+    'RoomInfo',
+    ['id', 'name', 'creator', 'mode', 'backlog', 'backlog_ids', 'all_features', 'version', 'updated_at'],
+    defaults=(0, None),
+)
+"""@var RoomInfo
+@brief Métadonnées d'une room mises en cache.
+
+@details
+- backlog : fonctionnalités restant à estimer, dans l'ordre ;
+- backlog_ids : identifiants des Feature du backlog, dans le même ordre ;
+- all_features : fonctionnalités déjà estimées ;
+- version, updated_at : PokerRoom.version et PokerRoom.updated_at, qui identifient le
+  contenu du backlog (clés des pages en cache, ETag).
+
+Les listes sont partagées par tous les lecteurs du cache du processus : elles doivent
+être copiées avant toute modification.
+"""
+
+LOCAL_TTL = getattr(settings, 'POKER_ROOM_CACHE_LOCAL_TTL', 5)
+"""@var LOCAL_TTL
+@brief Durée de vie (en secondes) d'une entrée du cache du processus ; borne le délai
+pendant lequel une modification faite par un autre processus peut être ignorée.
+"""
+
+SHARED_TTL = getattr(settings, 'POKER_ROOM_CACHE_SHARED_TTL', 300)
+"""@var SHARED_TTL
+@brief Durée de vie (en secondes) d'une entrée du cache partagé.
+"""
+
+_local = {}
+_local_lock = threading.Lock()
+
+
+def _shared_cache():
+    alias = getattr(settings, 'POKER_ROOM_CACHE_ALIAS', None)
+    return caches[alias] if alias else None
+
+
+def _version_key(name):
+    return f"poker:room:{name}:version"
+
+
+def _data_key(name, version):
+    return f"poker:room:{name}:{version}"
+
+
+def load_room_info(room_name):
+    """
+    @brief Lit les métadonnées d'une room en base (deux requêtes).
+
+    @param room_name Nom de la room.
+
+    @return Un RoomInfo.
+
+    @exception PokerRoom.DoesNotExist Si la room n'existe pas.
+    """
+    room = PokerRoom.objects.get(name=room_name)
+    backlog, backlog_ids, all_features = [], [], []
+    for feature in room.features.all():
+        if feature.status == Feature.ESTIMATED:
+            all_features.append(feature.as_dict())
+        else:
+            backlog.append(feature.as_dict())
+            backlog_ids.append(feature.pk)
+    return RoomInfo(
+        room.pk, room.name, room.creator, room.mode, backlog, backlog_ids, all_features, room.version, room.updated_at
+    )
+
+
+def get_room_info(room_name):
+    """
+    @brief Métadonnées d'une room, lues dans le cache du processus, puis dans le cache
+    partagé (réglage POKER_ROOM_CACHE_ALIAS, optionnel), puis en base.
+
+    @details L'entrée du cache partagé est indexée par le numéro de version de la room :
+    invalidate_room() incrémente ce numéro, ce qui rend les anciennes entrées inaccessibles
+    dans tous les processus.
+
+    @param room_name Nom de la room.
+
+    @return Un RoomInfo.
+
+    @exception PokerRoom.DoesNotExist Si la room n'existe pas (les absences ne sont pas mises en cache).
+    """
+    info = _get_local(room_name)
+    if info is not None:
+        return info
+
+    shared = _shared_cache()
+    version = 0
+    if shared is not None:
+        try:
+            version = shared.get_or_set(_version_key(room_name), 0, None)
+            info = shared.get(_data_key(room_name, version))
+        except Exception:
+            logger.exception("Cache partagé des rooms indisponible")
+            shared, info = None, None
+        if info is not None:
+            ROOM_CACHE_REQUESTS.inc('shared_hit')
+            _store_local(room_name, info)
+            return info
+
+    ROOM_CACHE_REQUESTS.inc('miss')
+    info = load_room_info(room_name)
+    _store_local(room_name, info)
+    if shared is not None:
+        try:
+            shared.set(_data_key(room_name, version), info, SHARED_TTL)
+        except Exception:
+            logger.exception("Cache partagé des rooms indisponible")
+    return info
+
+
+async def aget_room_info(room_name):
+    """
+    @brief Version asynchrone de get_room_info().
+
+    @details Un succès du cache du processus est servi sans quitter la boucle asyncio ;
+    sinon la lecture (cache partagé, base) est faite dans le pool de planning_poker.db.
+
+    @param room_name Nom de la room.
+
+    @return Un RoomInfo.
+
+    @exception PokerRoom.DoesNotExist Si la room n'existe pas.
+    """
+    info = _get_local(room_name)
+    if info is not None:
+        return info
+    return await db_sync_to_async(get_room_info)(room_name)
+
+
+def _get_local(room_name):
+    with _local_lock:
+        entry = _local.get(room_name)
+    if entry is None or entry[0] <= time.monotonic():
+        return None
+    ROOM_CACHE_REQUESTS.inc('local_hit')
+    return entry[1]
+
+
+def _store_local(room_name, info):
+    with _local_lock:
+        _local[room_name] = (time.monotonic() + LOCAL_TTL, info)
+
+
+def invalidate_room(room_name):
+    """
+    @brief Invalide immédiatement les métadonnées d'une room dans les deux niveaux de cache.
+
+    @param room_name Nom de la room.
+    """
+    with _local_lock:
+        _local.pop(room_name, None)
+    shared = _shared_cache()
+    if shared is None:
+        return
+    try:
+        shared.add(_version_key(room_name), 0, None)
+        shared.incr(_version_key(room_name))
+    except Exception:
+        logger.exception("Cache partagé des rooms indisponible")
+
+
+def invalidate_room_on_commit(room_name):
+    """
+    @brief Invalide une room tout de suite, puis de nouveau après la validation de la
+    transaction courante : un lecteur qui aurait remis en cache l'état d'avant l'écriture
+    entre-temps ne le garde pas.
+
+    @param room_name Nom de la room.
+    """
+    invalidate_room(room_name)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(partial(invalidate_room, room_name))
+
+
+def room_changed(sender, instance, **kwargs):
+    """
+    @brief Récepteur des signaux post_save / post_delete de PokerRoom et post_save de Feature.
+
+    @details Les écritures groupées (bulk_create, update) n'émettent pas ces signaux :
+    elles appellent invalidate_room_on_commit() explicitement.
+    """
+    room = instance if isinstance(instance, PokerRoom) else instance.room
+    invalidate_room_on_commit(room.name)
+
+
+def cache_stats():
+    """
+    @brief Statistiques du cache depuis le démarrage du processus.
+
+    @return Dictionnaire {'local_hit': ..., 'shared_hit': ..., 'miss': ...}.
+    """
+    samples = ROOM_CACHE_REQUESTS.samples()
+    return {result: samples.get((result,), 0) for result in ('local_hit', 'shared_hit', 'miss')}
+
+
+def clear_room_cache():
+    """
+    @brief Vide le cache du processus (utilisé par les tests).
+    """
+    with _local_lock:
+        _local.clear()
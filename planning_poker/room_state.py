@@ -0,0 +1,518 @@
+import asyncio
+import logging
+import threading
+import uuid
+from collections import deque
+
+from django.conf import settings
+
+from .models import Feature, Player
+from .room_cache import get_room_info
+from .db import db_sync_to_async
+from .presence import Presence
+from .metrics import ACTIVE_ROOMS
+from .affinity import RoomNotServedHere, serves_room
+
+logger = logging.getLogger(__name__)
+
+FLUSH_DELAY = 0.5
+"""@var FLUSH_DELAY
+@brief Délai (en secondes) pendant lequel les écritures sont regroupées avant d'être persistées.
+"""
+
+FLUSH_RETRY_DELAY = 5
+"""@var FLUSH_RETRY_DELAY
+@brief Délai (en secondes) avant une nouvelle tentative après un échec de persistance.
+"""
+
+RESUME_BUFFER_SIZE = getattr(settings, 'POKER_RESUME_BUFFER_SIZE', 256)
+"""@var RESUME_BUFFER_SIZE
+@brief Nombre de mises à jour conservées par room pour la reprise après reconnexion.
+"""
+
+
+class RoomState:
+    """
+    @brief État autoritaire d'une room, conservé en mémoire.
+
+    @details Tous les consommateurs d'une même room partagent cette instance : les votes,
+    la liste des joueurs, la fonctionnalité courante et le curseur du backlog y sont lus
+    sans passer par la base. Les votes sont persistés en différé (write-behind) dans SQLite
+    par flush() ; les transitions de round sont persistées immédiatement par le module rounds.
+
+    L'état n'existe que dans le processus auquel la room est confiée : sous
+    `runasgi --workers N`, le superviseur envoie au même worker toutes les connexions d'une
+    room (websockets, pages, import), et get_room_state() refuse de charger une room confiée
+    à un autre worker (voir affinity.py). Les mises à jour d'une room passent donc par un
+    seul RoomState et un seul groupe du channel layer, quel que soit le nombre de workers.
+
+    Seuls les joueurs présents (voir Presence) figurent dans `players` et comptent dans les
+    votes : un joueur sans heartbeat depuis PRESENCE_TTL secondes, ou dont le dernier
+    websocket est fermé depuis PRESENCE_GRACE secondes, est retiré par sweep(). Sa ligne
+    Player n'est supprimée au flush suivant que si le joueur s'est connecté à ce processus :
+    un joueur seulement chargé depuis la base (connecté avant un redémarrage du worker)
+    garde sa ligne jusqu'à son retour.
+
+    Chaque mise à jour diffusée reçoit un numéro de séquence croissant et est conservée
+    dans un tampon circulaire, pour qu'un client reconnecté ne reçoive que ce qu'il a manqué.
+    L'époque identifie l'instance : un numéro de séquence n'a de sens que dans son époque.
+    """
+
+    def __init__(self, room_id, name, creator, mode, backlog, all_features, players, backlog_ids=None):
+        """
+        @brief Construit l'état d'une room.
+
+        @param room_id Identifiant de la PokerRoom.
+        @param name Nom de la room.
+        @param creator Pseudo du créateur.
+        @param mode Mode de vote de la room.
+        @param backlog Liste des fonctionnalités restant à estimer.
+        @param all_features Liste des fonctionnalités déjà estimées.
+        @param players Dictionnaire {nom: vote} des joueurs connus.
+        @param backlog_ids Identifiants des Feature correspondant au backlog, dans le même ordre.
+        """
+        self.room_id = room_id
+        self.name = name
+        self.creator = creator
+        self.mode = mode
+        self.backlog = backlog
+        self.backlog_ids = backlog_ids if backlog_ids is not None else [None] * len(backlog)
+        self.cursor = 0
+        self.all_features = all_features
+        self.players = dict(players)
+        # ensemble ordonné des joueurs sans vote, tenu à jour à chaque vote
+        self._not_voted = dict.fromkeys(name for name, vote in self.players.items() if vote is None)
+        self.version = 0
+        self.connections = 0
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self._updates = deque(maxlen=RESUME_BUFFER_SIZE)
+
+        self.lock = threading.RLock()
+        """@var lock
+        @brief Verrou protégeant l'état, à prendre pour lire un instantané cohérent.
+        """
+        self._dirty_players = set()
+        self._departed_players = set()
+        self._connected_players = set()
+        self._flush_handle = None
+
+        # les joueurs connus en base disposent d'un délai de présence pour se reconnecter
+        self.presence = Presence()
+        for name in self.players:
+            self.presence.touch(name)
+
+        self.db_lock = asyncio.Lock()
+        """@var db_lock
+        @brief Sérialise les écritures en base de la room (flush et transitions de round),
+        exécutées dans un pool de threads : une écriture ne peut pas en dépasser une autre.
+        """
+        self.broadcast_lock = asyncio.Lock()
+        """@var broadcast_lock
+        @brief Tenu de publish() jusqu'à la fin de l'envoi au groupe : les mises à jour
+        partent dans l'ordre de leur numéro de séquence.
+        """
+
+    @classmethod
+    def load(cls, room_name):
+        """
+        @brief Charge l'état d'une room (appel synchrone) : métadonnées via le cache des rooms,
+        joueurs depuis la base.
+
+        @param room_name Nom de la room.
+
+        @return Une instance de RoomState.
+
+        @exception PokerRoom.DoesNotExist Si la room n'existe pas.
+        """
+        room = get_room_info(room_name)
+        players = {
+            name: (None if vote is None else str(vote))
+            for name, vote in Player.objects.filter(room_id=room.id).values_list('name', 'vote')
+        }
+        # copies : l'état modifie ses fonctionnalités, le cache est partagé
+        return cls(
+            room_id=room.id,
+            name=room.name,
+            creator=room.creator,
+            mode=room.mode,
+            backlog=[dict(feature) for feature in room.backlog],
+            all_features=[dict(feature) for feature in room.all_features],
+            players=players,
+            backlog_ids=list(room.backlog_ids),
+        )
+
+    @property
+    def current_feature(self):
+        """
+        @brief Fonctionnalité en cours de vote, ou None si le backlog est épuisé.
+        """
+        if self.cursor < len(self.backlog):
+            return self.backlog[self.cursor]
+        return None
+
+    @property
+    def current_feature_id(self):
+        """
+        @brief Identifiant de la Feature en cours de vote, ou None.
+        """
+        if self.cursor < len(self.backlog_ids):
+            return self.backlog_ids[self.cursor]
+        return None
+
+    def remaining_backlog(self):
+        """
+        @brief Fonctionnalités restant à estimer (courante incluse).
+        """
+        return self.backlog[self.cursor:]
+
+    def join(self, name):
+        """
+        @brief Enregistre un joueur et réinitialise son vote.
+
+        @param name Pseudo du joueur.
+        """
+        with self.lock:
+            self.players[name] = None
+            self._not_voted[name] = None
+            self._dirty_players.add(name)
+            self._departed_players.discard(name)
+            self._connected_players.add(name)
+            self.presence.connect(name)
+            self._touch()
+
+    def reattach(self, name):
+        """
+        @brief Enregistre un nouveau websocket d'un joueur présent, sans toucher à son vote
+        (reprise après coupure).
+
+        @param name Pseudo du joueur.
+        """
+        with self.lock:
+            self._connected_players.add(name)
+            self.presence.connect(name)
+
+    def detach(self, name):
+        """
+        @brief Enregistre la fermeture d'un websocket du joueur.
+
+        @param name Pseudo du joueur.
+        """
+        with self.lock:
+            self.presence.disconnect(name)
+
+    def heartbeat(self, name):
+        """
+        @brief Prolonge la présence d'un joueur.
+
+        @param name Pseudo du joueur.
+
+        @return True si le joueur avait été retiré et revient dans la room (sans vote).
+        """
+        with self.lock:
+            self._connected_players.add(name)
+            if name in self.players:
+                self.presence.touch(name)
+                return False
+            self.players[name] = None
+            self._not_voted[name] = None
+            self._dirty_players.add(name)
+            self._departed_players.discard(name)
+            self.presence.touch(name)
+            self._touch()
+            return True
+
+    def sweep(self, batch=None):
+        """
+        @brief Retire les joueurs dont la présence a expiré (au plus `batch` entrées examinées).
+
+        @details Seuls les joueurs connectés à ce processus sont supprimés de la base ; les
+        autres ne sont retirés que de l'état en mémoire.
+
+        @param batch Taille maximale du lot (SWEEP_BATCH par défaut).
+
+        @return Liste des joueurs retirés.
+        """
+        with self.lock:
+            departed = self.presence.expired(batch)
+            for name in departed:
+                self.players.pop(name, None)
+                self._not_voted.pop(name, None)
+                self._dirty_players.discard(name)
+                if name in self._connected_players:
+                    self._departed_players.add(name)
+            if departed:
+                self._touch()
+            return departed
+
+    def record_vote(self, name, vote):
+        """
+        @brief Enregistre le vote d'un joueur.
+
+        @details Le décompte est incrémental : le coût ne dépend pas du nombre de joueurs
+        ayant déjà voté.
+
+        @param name Pseudo du joueur.
+        @param vote Valeur du vote.
+
+        @return Tuple (joueurs sans vote, tous ont voté) calculé atomiquement avec le vote.
+        """
+        with self.lock:
+            self.players[name] = vote
+            self._not_voted.pop(name, None)
+            self._dirty_players.add(name)
+            self._departed_players.discard(name)
+            self.presence.touch(name)
+            self._touch()
+            return list(self._not_voted), not self._not_voted
+
+    def reset_votes(self):
+        """
+        @brief Réinitialise les votes de tous les joueurs (en mémoire uniquement).
+        """
+        with self.lock:
+            self._clear_votes()
+            self._touch()
+
+    def advance(self, priority):
+        """
+        @brief Clôt la fonctionnalité courante avec la priorité votée et passe à la suivante.
+
+        @details Modifie uniquement l'état en mémoire : voir rounds.complete_round() pour
+        la transition persistée.
+
+        @param priority Priorité retenue pour la fonctionnalité courante.
+
+        @return La nouvelle fonctionnalité courante, ou None si le backlog est épuisé.
+        """
+        with self.lock:
+            feature = self.backlog[self.cursor]
+            feature["priority"] = priority
+            self.all_features.append(feature)
+            self.cursor += 1
+            self._clear_votes()
+            self._touch()
+        return self.current_feature
+
+    def extend(self, features):
+        """
+        @brief Ajoute des fonctionnalités importées en fin de backlog (en mémoire uniquement,
+        elles sont déjà en base).
+
+        @param features Liste de Feature dans l'ordre de leurs ordinaux : les estimées
+        rejoignent all_features, les autres le backlog.
+        """
+        with self.lock:
+            for feature in features:
+                if feature.status == Feature.ESTIMATED:
+                    self.all_features.append(feature.as_dict())
+                else:
+                    self.backlog.append(feature.as_dict())
+                    self.backlog_ids.append(feature.pk)
+            self._touch()
+
+    def votes(self):
+        """
+        @brief Liste des votes sous la forme [{"name": ..., "vote": ...}].
+        """
+        return [{"name": name, "vote": str(vote).strip()} for name, vote in self.players.items()]
+
+    def not_voted(self):
+        """
+        @brief Noms des joueurs n'ayant pas encore voté.
+        """
+        return list(self._not_voted)
+
+    @property
+    def all_voted(self):
+        """
+        @brief Indique si tous les joueurs ont voté.
+        """
+        return not self._not_voted
+
+    def publish(self, changes):
+        """
+        @brief Numérote une mise à jour diffusée et la conserve pour les reprises.
+
+        @param changes Modifications envoyées aux joueurs.
+
+        @return Le numéro de séquence attribué.
+        """
+        with self.lock:
+            self.seq += 1
+            self._updates.append((self.seq, changes))
+            return self.seq
+
+    def updates_since(self, epoch, seq):
+        """
+        @brief Mises à jour diffusées après un numéro de séquence donné.
+
+        @param epoch Époque connue du client.
+        @param seq Dernier numéro de séquence reçu par le client.
+
+        @return Liste de tuples (seq, changes), ou None si le client est d'une autre époque
+        ou trop en retard pour que le tampon suffise (il lui faut alors un instantané).
+        """
+        with self.lock:
+            if epoch != self.epoch or seq > self.seq:
+                return None
+            if seq == self.seq:
+                return []
+            if not self._updates or self._updates[0][0] > seq + 1:
+                return None
+            return [update for update in self._updates if update[0] > seq]
+
+    def snapshot(self, name):
+        """
+        @brief Instantané compact de la room, vu par un joueur.
+
+        @param name Pseudo du joueur destinataire.
+
+        @return Dictionnaire avec la position (époque, séquence), la fonctionnalité courante,
+        les joueurs sans vote et le vote du joueur.
+        """
+        with self.lock:
+            return {
+                "epoch": self.epoch,
+                "seq": self.seq,
+                "feature": self.current_feature,
+                "not_voted": self.not_voted(),
+                "all_voted": self.all_voted,
+                "vote": self.players.get(name),
+            }
+
+    def _clear_votes(self):
+        """
+        @brief Remet à zéro les votes (appelé sous verrou).
+        """
+        for name in self.players:
+            self.players[name] = None
+        self._not_voted = dict.fromkeys(self.players)
+
+    def _touch(self):
+        """
+        @brief Incrémente la version et programme une persistance différée.
+        """
+        self.version += 1
+        self._schedule_flush(FLUSH_DELAY)
+
+    def _schedule_flush(self, delay):
+        """
+        @brief Programme un flush dans `delay` secondes, sauf s'il y en a déjà un de prévu.
+
+        @param delay Délai en secondes.
+        """
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._flush_handle = loop.call_later(delay, lambda: loop.create_task(self.flush()))
+
+    async def flush(self):
+        """
+        @brief Persiste en base les joueurs et votes modifiés depuis le dernier flush.
+
+        @details En cas d'échec, les joueurs du lot sont remis parmi les modifications en
+        attente (sauf ceux dont l'état a changé depuis) et un nouveau flush est programmé
+        dans FLUSH_RETRY_DELAY secondes.
+        """
+        async with self.db_lock:
+            with self.lock:
+                if self._flush_handle is not None:
+                    self._flush_handle.cancel()
+                    self._flush_handle = None
+                players = {name: self.players.get(name) for name in self._dirty_players}
+                departed = self._departed_players
+                self._dirty_players = set()
+                self._departed_players = set()
+
+            if not players and not departed:
+                return
+            try:
+                await db_sync_to_async(self._write)(players, departed)
+            except Exception:
+                logger.exception("Échec de la persistance de la room %s", self.name)
+                with self.lock:
+                    # un joueur revenu depuis ne doit pas être supprimé, un joueur parti pas réécrit
+                    self._dirty_players |= {name for name in players if name in self.players}
+                    self._departed_players |= {name for name in departed if name not in self.players}
+                    self._schedule_flush(FLUSH_RETRY_DELAY)
+
+    def _write(self, players, departed=()):
+        """
+        @brief Écrit en base les joueurs modifiés et supprime les joueurs partis (appel synchrone).
+
+        @details Un seul INSERT ... ON CONFLICT (room, name) DO UPDATE : pas de lecture
+        préalable, et deux processus écrivant le même joueur ne créent pas de doublon.
+
+        @param players Dictionnaire {nom: vote} des joueurs à persister.
+        @param departed Noms des joueurs à supprimer.
+        """
+        if departed:
+            Player.objects.filter(room_id=self.room_id, name__in=departed).delete()
+        if not players:
+            return
+        Player.objects.bulk_create(
+            [Player(room_id=self.room_id, name=name, vote=vote) for name, vote in players.items()],
+            update_conflicts=True,
+            unique_fields=['room', 'name'],
+            update_fields=['vote'],
+        )
+
+
+_room_states = {}
+
+
+async def get_room_state(room_name):
+    """
+    @brief Renvoie l'état partagé d'une room, en le chargeant depuis la base au premier accès.
+
+    @param room_name Nom de la room.
+
+    @return L'instance de RoomState de la room.
+
+    @exception PokerRoom.DoesNotExist Si la room n'existe pas.
+    @exception RoomNotServedHere Si la room est confiée à un autre worker : deux états
+    autoritaires de la même room divergeraient.
+    """
+    state = _room_states.get(room_name)
+    if state is None:
+        if not serves_room(room_name):
+            raise RoomNotServedHere(f"La room {room_name} est servie par un autre worker.")
+        loaded = await db_sync_to_async(RoomState.load)(room_name)
+        state = _room_states.setdefault(room_name, loaded)
+        ACTIVE_ROOMS.set(len(_room_states))
+    return state
+
+
+def loaded_room_state(room_name):
+    """
+    @brief Renvoie l'état d'une room s'il est chargé dans ce processus, sans le charger.
+
+    @param room_name Nom de la room.
+
+    @return L'instance de RoomState, ou None.
+    """
+    return _room_states.get(room_name)
+
+
+async def release_room_state(state):
+    """
+    @brief Persiste et oublie l'état d'une room quand plus aucune connexion ne l'utilise.
+
+    @param state Instance de RoomState à libérer.
+    """
+    await state.flush()
+    if state.connections <= 0 and _room_states.get(state.name) is state:
+        del _room_states[state.name]
+        ACTIVE_ROOMS.set(len(_room_states))
+
+
+def clear_room_states():
+    """
+    @brief Vide le registre des états de room (utilisé par les tests).
+    """
+    _room_states.clear()
+    ACTIVE_ROOMS.set(0)
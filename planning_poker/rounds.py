@@ -0,0 +1,82 @@
+from collections import namedtuple
+
+from django.db import transaction
+
+from .models import PokerRoom, Player, Feature
+from .room_cache import invalidate_room_on_commit
+from .db import db_sync_to_async
+
+RoundResult = namedtuple('RoundResult', ['advanced', 'next_feature', 'all_features', 'not_voted', 'version'])
+"""@var RoundResult
+@brief Nouvel état d'une room après une transition de round.
+
+@details
+- advanced : la fonctionnalité courante a été estimée et retirée du backlog ;
+- next_feature : fonctionnalité désormais en cours (None si le backlog est épuisé) ;
+- all_features : fonctionnalités estimées ;
+- not_voted : joueurs sans vote (tous, après la remise à zéro) ;
+- version : version de l'état en mémoire après la transition.
+"""
+
+
+def persist_round(room_id, feature_id=None, priority=None, room_name=None):
+    """
+    @brief Persiste une transition de round dans une seule transaction.
+
+    @details Trois UPDATE groupés au plus : le passage de la fonctionnalité courante à
+    l'état estimé et la nouvelle version de la room (si elle a été estimée), puis la
+    remise à zéro des votes de tous les joueurs.
+
+    @param room_id Identifiant de la PokerRoom.
+    @param feature_id Identifiant de la Feature estimée, ou None si le backlog n'a pas changé.
+    @param priority Priorité retenue pour la Feature estimée.
+    @param room_name Nom de la room, dont les métadonnées en cache sont invalidées si le backlog change.
+    """
+    with transaction.atomic():
+        if feature_id is not None:
+            Feature.objects.filter(pk=feature_id, room_id=room_id, status=Feature.PENDING).update(
+                status=Feature.ESTIMATED, priority=priority
+            )
+            PokerRoom.objects.bump_version(room_id)
+            if room_name is not None:
+                invalidate_room_on_commit(room_name)
+        Player.objects.filter(room_id=room_id).update(vote=None)
+
+
+async def complete_round(state, priority=None):
+    """
+    @brief Termine le round courant d'une room.
+
+    @details Si une priorité est fournie, la fonctionnalité courante est estimée et le
+    curseur avance ; dans tous les cas les votes sont remis à zéro. La transition est
+    d'abord persistée en une transaction, puis appliquée atomiquement en mémoire : si
+    l'écriture échoue, l'état en mémoire reste celui d'avant le round. db_lock est tenu
+    de bout en bout, une autre transition ne peut donc pas déplacer le curseur entretemps.
+
+    @param state Instance de RoomState de la room.
+    @param priority Priorité retenue, ou None pour simplement relancer le vote.
+
+    @return Un RoundResult décrivant le nouvel état.
+
+    @exception DatabaseError Si la transition n'a pas pu être persistée (mémoire inchangée).
+    """
+    async with state.db_lock:
+        with state.lock:
+            advanced = priority is not None and state.current_feature is not None
+            feature_id = state.current_feature_id if advanced else None
+
+        await db_sync_to_async(persist_round)(state.room_id, feature_id, priority if advanced else None, state.name)
+
+        with state.lock:
+            if advanced:
+                state.advance(priority)
+            else:
+                state.reset_votes()
+
+            return RoundResult(
+                advanced=advanced,
+                next_feature=state.current_feature,
+                all_features=list(state.all_features),
+                not_voted=state.not_voted(),
+                version=state.version,
+            )
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+
+Field = namedtuple('Field', ['types', 'required', 'non_empty'])
+"""@var Field
+@brief Règle d'une clé d'un objet : types JSON acceptés (comparaison exacte, un booléen
+n'est donc pas un nombre), présence obligatoire, chaîne non vide.
+"""
+
+ITEM_SCHEMA = {
+    'feature': Field((str, int, float), required=True, non_empty=True),
+    'priority': Field((str, int, float, type(None)), required=False, non_empty=False),
+}
+"""@var ITEM_SCHEMA
+@brief Schéma d'une fonctionnalité du backlog ; les autres clés sont libres et conservées
+telles quelles (Feature.extra).
+"""
+
+DOCUMENT_SCHEMA = {
+    'backlog': True,
+    'all_features': False,
+}
+"""@var DOCUMENT_SCHEMA
+@brief Listes de fonctionnalités d'un document de backlog, et leur caractère obligatoire.
+"""
+
+CACHE_SIZE = getattr(settings, 'POKER_SCHEMA_CACHE_SIZE', 256)
+"""@var CACHE_SIZE
+@brief Nombre de résultats de validation conservés, indexés par empreinte du document.
+"""
+
+TYPE_NAMES = {str: 'chaîne', int: 'nombre', float: 'nombre', type(None): 'null', dict: 'objet', list: 'liste', bool: 'booléen'}
+
+_MISSING = object()
+
+
+class BacklogSchemaError(ValueError):
+    """
+    @brief Document de backlog invalide.
+
+    @details `errors` contient toutes les erreurs, sous forme de tuples (chemin JSON, message).
+    """
+
+    def __init__(self, errors):
+        """
+        @param errors Liste de tuples (chemin JSON, message).
+        """
+        self.errors = errors
+        shown = "; ".join(f"{path} : {message}" for path, message in errors[:5])
+        if len(errors) > 5:
+            shown += f" (et {len(errors) - 5} autre(s) erreur(s))"
+        super().__init__(shown)
+
+
+def _type_name(value):
+    return TYPE_NAMES.get(type(value), type(value).__name__)
+
+
+def compile_item_schema(schema):
+    """
+    @brief Prépare le validateur d'un schéma d'objet.
+
+    @details Les règles sont converties une fois pour toutes en un tuple (clé, types,
+    obligatoire, non vide) parcouru pour chaque objet. Les chemins JSON et les messages ne
+    sont construits qu'en cas d'erreur.
+
+    @param schema Dictionnaire {clé: Field}.
+
+    @return Fonction check_items(items, section, errors, start=0) qui ajoute à `errors` les
+    erreurs des objets de la liste `section` (`start` : indice du premier objet).
+    """
+    rules = tuple((name, frozenset(field.types), field.required, field.non_empty) for name, field in schema.items())
+    expected = {
+        name: " ou ".join(dict.fromkeys(TYPE_NAMES.get(kind, kind.__name__) for kind in field.types))
+        for name, field in schema.items()
+    }
+
+    def check_items(items, section, errors, start=0):
+        missing = _MISSING
+        for index, item in enumerate(items, start):
+            if type(item) is not dict:
+                errors.append((f"$.{section}[{index}]", f"objet attendu, {_type_name(item)} trouvé"))
+                continue
+            for name, types, required, non_empty in rules:
+                value = item.get(name, missing)
+                if value is missing:
+                    if required:
+                        errors.append((f"$.{section}[{index}].{name}", "clé requise"))
+                elif type(value) not in types:
+                    errors.append((f"$.{section}[{index}].{name}", f"{expected[name]} attendu, {_type_name(value)} trouvé"))
+                elif non_empty and type(value) is str and not value.strip():
+                    errors.append((f"$.{section}[{index}].{name}", "valeur vide"))
+
+    return check_items
+
+
+check_items = compile_item_schema(ITEM_SCHEMA)
+"""@var check_items
+@brief Validateur des listes de fonctionnalités (voir compile_item_schema()).
+"""
+
+
+def check_item(item, section, index, errors):
+    """
+    @brief Valide un seul objet (imports ligne à ligne).
+
+    @param item Objet décodé.
+    @param section Liste de l'objet.
+    @param index Position de l'objet dans sa liste.
+    @param errors Liste à laquelle ajouter les erreurs (chemin JSON, message).
+    """
+    check_items((item,), section, errors, index)
+
+
+def validate_document(document):
+    """
+    @brief Valide un document de backlog déjà décodé, en un seul parcours.
+
+    @param document Valeur JSON décodée.
+
+    @return Liste de toutes les erreurs (chemin JSON, message), vide si le document est valide.
+    """
+    errors = []
+    if type(document) is not dict:
+        return [("$", f"objet attendu, {_type_name(document)} trouvé")]
+    for section, required in DOCUMENT_SCHEMA.items():
+        items = document.get(section, _MISSING)
+        if items is _MISSING:
+            if required:
+                errors.append((f"$.{section}", "clé requise"))
+            continue
+        if type(items) is not list:
+            errors.append((f"$.{section}", f"liste attendue, {_type_name(items)} trouvé"))
+            continue
+        check_items(items, section, errors)
+    return errors
+
+
+class _ResultCache:
+    """
+    @brief Résultats de validation (LRU), indexés par empreinte BLAKE2 du document brut.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            errors = self._entries.get(key)
+            if errors is not None:
+                self._entries.move_to_end(key)
+            return errors
+
+    def set(self, key, errors):
+        with self._lock:
+            self._entries[key] = errors
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_results = _ResultCache(CACHE_SIZE)
+
+
+def _check(raw):
+    if isinstance(raw, str):
+        raw = raw.encode()
+    key = hashlib.blake2b(raw, digest_size=16).digest()
+    errors = _results.get(key)
+    if errors is not None:
+        return errors, None
+    try:
+        document = json.loads(raw)
+    except ValueError:
+        document, errors = None, [("$", "le backlog doit être un JSON valide")]
+    else:
+        errors = validate_document(document)
+    _results.set(key, errors)
+    return errors, document
+
+
+def validate_backlog_json(raw):
+    """
+    @brief Valide un document de backlog brut.
+
+    @details Le résultat est mémorisé par empreinte du contenu : revalider le même
+    document ne coûte que son hachage.
+
+    @param raw Document JSON (str ou bytes).
+
+    @return Liste de toutes les erreurs (chemin JSON, message).
+    """
+    return list(_check(raw)[0])
+
+
+def load_backlog(raw):
+    """
+    @brief Décode et valide un document de backlog.
+
+    @param raw Document JSON (str ou bytes).
+
+    @return Le document décodé.
+
+    @exception BacklogSchemaError Si le document est invalide.
+    """
+    errors, document = _check(raw)
+    if errors:
+        raise BacklogSchemaError(errors)
+    return json.loads(raw) if document is None else document
+
+
+def clear_schema_cache():
+    """
+    @brief Vide le cache des résultats (utilisé par les tests et les benchmarks).
+    """
+    _results.clear()
@@ -0,0 +1,111 @@
+"""
+Serveur Daphne avec contre-pression sur les websockets.
+
+Daphne transmet chaque `websocket.send` au transport Twisted sans jamais faire attendre
+l'application : un client qui ne lit plus fait grossir le tampon d'écriture de Twisted
+sans limite, et la file d'envoi du consommateur (voir outbox.py) ne se remplit jamais.
+PokerServer enregistre sur le transport de chaque websocket un producteur (WriteGate) que
+Twisted met en pause quand son tampon dépasse sa taille (64 Ko) et relance une fois vidé :
+un envoi attend alors la reprise, la file du consommateur grossit et le client est fermé
+avec SLOW_CLOSE_CODE.
+
+Daphne ignore aussi la raison d'un `websocket.close` ; PokerServer la transmet au client
+(position de reprise des clients lents).
+"""
+
+# daphne.server installe le réacteur asyncio de Twisted : il doit être importé en premier
+from daphne.server import Server  # isort:skip
+
+import asyncio
+import logging
+import socket
+
+from daphne.ws_protocol import WebSocketProtocol
+from django.conf import settings
+from twisted.internet.interfaces import IPushProducer
+from zope.interface import implementer
+
+logger = logging.getLogger(__name__)
+
+SEND_BUFFER = getattr(settings, 'POKER_WS_SEND_BUFFER', None)
+"""@var SEND_BUFFER
+@brief Taille (octets) du tampon d'envoi noyau de chaque websocket, ou None pour le réglage
+du système : plus il est petit, plus tôt un client lent est détecté.
+"""
+
+
+@implementer(IPushProducer)
+class WriteGate:
+    """
+    @brief Producteur Twisted d'une websocket : ouvert tant que le transport accepte des
+    écritures, fermé quand son tampon est plein.
+    """
+
+    def __init__(self):
+        self.writable = asyncio.Event()
+        self.writable.set()
+
+    def pauseProducing(self):
+        self.writable.clear()
+
+    def resumeProducing(self):
+        self.writable.set()
+
+    def stopProducing(self):
+        # connexion perdue : libérer les envois en attente, ils seront ignorés
+        self.writable.set()
+
+
+class PokerServer(Server):
+    """
+    @brief Serveur Daphne dont les envois websocket attendent que le transport se vide.
+    """
+
+    async def handle_reply(self, protocol, message):
+        """
+        @brief Transmet une réponse de l'application au protocole (voir daphne.server.Server).
+
+        @details Après un `websocket.accept`, installe la WriteGate du transport ; après un
+        `websocket.send`, attend qu'elle soit ouverte. Un `websocket.close` avec une raison
+        sur une connexion ouverte est envoyé tel quel.
+
+        @param protocol Protocole Twisted de la connexion.
+        @param message Message ASGI envoyé par l'application.
+        """
+        if not isinstance(protocol, WebSocketProtocol):
+            await super().handle_reply(protocol, message)
+            return
+        connection = self.connections.get(protocol)
+        if connection is None or connection.get("disconnected", None):
+            return
+
+        if message.get("type") == "websocket.close" and message.get("reason") and protocol.state == protocol.STATE_OPEN:
+            protocol.sendClose(code=message.get("code") or 1000, reason=message["reason"])
+            return
+
+        await super().handle_reply(protocol, message)
+        if message.get("type") == "websocket.accept":
+            connection["write_gate"] = self.install_write_gate(protocol)
+        elif message.get("type") == "websocket.send" and "write_gate" in connection:
+            await connection["write_gate"].writable.wait()
+
+    @staticmethod
+    def install_write_gate(protocol):
+        """
+        @brief Enregistre une WriteGate comme producteur du transport d'une websocket.
+
+        @param protocol Protocole websocket, après la poignée de main.
+
+        @return La WriteGate.
+        """
+        transport = protocol.transport
+        gate = WriteGate()
+        # le canal HTTP de la poignée de main reste enregistré comme producteur du transport
+        transport.unregisterProducer()
+        transport.registerProducer(gate, True)
+        if SEND_BUFFER:
+            try:
+                transport.getHandle().setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+            except (AttributeError, OSError):
+                logger.warning("Taille du tampon d'envoi non appliquée à %s", protocol.client_addr)
+        return gate
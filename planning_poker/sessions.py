@@ -0,0 +1,197 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+logger = logging.getLogger(__name__)
+
+
+class LocalSessionCache:
+    """
+    @brief Cache LRU de sessions propre au processus, avec durée de vie.
+
+    @details Les entrées sont des copies des données de session : une session chargée
+    peut être modifiée sans altérer le cache avant son enregistrement.
+    """
+
+    def __init__(self, max_entries, ttl):
+        """
+        @brief Crée un cache vide.
+
+        @param max_entries Nombre maximal de sessions conservées.
+        @param ttl Durée de vie (en secondes) d'une entrée.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        @brief Lit une session.
+
+        @param key Clé de cache de la session.
+
+        @return Une copie des données, ou None si absente ou expirée.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, data = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return dict(data)
+
+    def set(self, key, data, ttl=None):
+        """
+        @brief Enregistre une session.
+
+        @param key Clé de cache de la session.
+        @param data Données de la session.
+        @param ttl Durée de vie si elle est plus courte que celle du cache (expiration de la session).
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            self.delete(key)
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, dict(data))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """
+        @brief Oublie une session.
+
+        @param key Clé de cache de la session.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        @brief Vide le cache (utilisé par les tests).
+        """
+        with self._lock:
+            self._entries.clear()
+
+
+local_sessions = LocalSessionCache(
+    getattr(settings, 'POKER_SESSION_LOCAL_MAX_ENTRIES', 10000),
+    getattr(settings, 'POKER_SESSION_LOCAL_TTL', 30),
+)
+"""@var local_sessions
+@brief Cache de sessions du processus, partagé par toutes les instances de SessionStore.
+"""
+
+
+class FailSafeCache:
+    """
+    @brief Enveloppe du cache partagé qui traite une panne (Redis injoignable) comme un défaut
+    de cache : les sessions sont alors lues et écrites en base seulement.
+    """
+
+    def __init__(self, cache):
+        """
+        @brief Enveloppe un cache Django.
+
+        @param cache Instance de cache (caches[SESSION_CACHE_ALIAS]).
+        """
+        self.cache = cache
+
+    def _call(self, method, default, *args, **kwargs):
+        try:
+            return getattr(self.cache, method)(*args, **kwargs)
+        except Exception as error:
+            logger.warning("Cache des sessions indisponible (%s) : repli sur la base", error)
+            return default
+
+    async def _acall(self, method, default, *args, **kwargs):
+        try:
+            return await getattr(self.cache, method)(*args, **kwargs)
+        except Exception as error:
+            logger.warning("Cache des sessions indisponible (%s) : repli sur la base", error)
+            return default
+
+    def get(self, *args, **kwargs):
+        return self._call('get', None, *args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        return self._call('set', None, *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._call('delete', False, *args, **kwargs)
+
+    def __contains__(self, key):
+        return self._call('has_key', False, key)
+
+    async def aget(self, *args, **kwargs):
+        return await self._acall('aget', None, *args, **kwargs)
+
+    async def aset(self, *args, **kwargs):
+        return await self._acall('aset', None, *args, **kwargs)
+
+    async def adelete(self, *args, **kwargs):
+        return await self._acall('adelete', False, *args, **kwargs)
+
+
+class SessionStore(CachedDBStore):
+    """
+    @brief Sessions lues d'abord dans le cache du processus, puis dans le cache partagé
+    (SESSION_CACHE_ALIAS, Redis en production) et enfin en base.
+
+    @details Les écritures traversent les trois niveaux ; une session modifiée par un autre
+    processus peut rester périmée dans ce processus pendant au plus POKER_SESSION_LOCAL_TTL
+    secondes. La poignée de main websocket et la page de room ne touchent donc la base
+    qu'au premier accès à une session.
+
+    Si le cache partagé est injoignable, les sessions restent servies par la base.
+    """
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        self._cache = FailSafeCache(self._cache)
+
+    def load(self):
+        data = local_sessions.get(self.cache_key)
+        if data is None:
+            data = super().load()
+            if data:
+                local_sessions.set(self.cache_key, data, self.get_expiry_age(expiry=data.get('_session_expiry')))
+        return data
+
+    async def aload(self):
+        key = await self.acache_key()
+        data = local_sessions.get(key)
+        if data is None:
+            data = await super().aload()
+            if data:
+                local_sessions.set(key, data, await self.aget_expiry_age(expiry=data.get('_session_expiry')))
+        return data
+
+    def save(self, must_create=False):
+        super().save(must_create)
+        local_sessions.set(self.cache_key, self._session, self.get_expiry_age())
+
+    async def asave(self, must_create=False):
+        await super().asave(must_create)
+        local_sessions.set(await self.acache_key(), self._session, await self.aget_expiry_age())
+
+    def delete(self, session_key=None):
+        key = session_key or self.session_key
+        super().delete(session_key)
+        if key:
+            local_sessions.delete(self.cache_key_prefix + key)
+
+    async def adelete(self, session_key=None):
+        key = session_key or self.session_key
+        await super().adelete(session_key)
+        if key:
+            local_sessions.delete(self.cache_key_prefix + key)
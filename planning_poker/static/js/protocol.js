@@ -0,0 +1,211 @@
+/**
+ * Protocole websocket du planning poker.
+ *
+ * Le client propose le sous-protocole binaire "poker.msgpack" (MessagePack, drapeau de
+ * compression zlib en tête de trame) quand le navigateur sait décompresser, et se replie
+ * sur "poker.json" sinon. Voir planning_poker/protocol.py pour le format côté serveur.
+ */
+const PokerProtocol = (() => {
+    const MSGPACK = 'poker.msgpack';
+    const JSON_PROTOCOL = 'poker.json';
+
+    const TYPE_CODES = {
+        room_update: 1,
+        error: 2,
+        snapshot: 3,
+        vote: 10,
+        reveal: 11,
+        start_feature: 12,
+        heartbeat: 13,
+    };
+    const TYPE_NAMES = {};
+    Object.keys(TYPE_CODES).forEach(name => { TYPE_NAMES[TYPE_CODES[name]] = name; });
+
+    const FLAG_RAW = 0;
+    const FLAG_DEFLATE = 1;
+
+    const textDecoder = new TextDecoder();
+    const textEncoder = new TextEncoder();
+
+    function supportsMsgpack() {
+        return typeof DecompressionStream !== 'undefined';
+    }
+
+    function subprotocols() {
+        return supportsMsgpack() ? [MSGPACK, JSON_PROTOCOL] : [JSON_PROTOCOL];
+    }
+
+    // --- Décodage MessagePack ---
+
+    function unpack(bytes) {
+        const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+        let offset = 0;
+
+        function str(length) {
+            const value = textDecoder.decode(bytes.subarray(offset, offset + length));
+            offset += length;
+            return value;
+        }
+
+        function array(length) {
+            const result = new Array(length);
+            for (let i = 0; i < length; i++) result[i] = read();
+            return result;
+        }
+
+        function map(length) {
+            const result = {};
+            for (let i = 0; i < length; i++) {
+                const key = read();
+                result[key] = read();
+            }
+            return result;
+        }
+
+        function read() {
+            const byte = view.getUint8(offset++);
+            let value;
+
+            if (byte <= 0x7f) return byte;
+            if (byte >= 0xe0) return byte - 0x100;
+            if ((byte & 0xf0) === 0x80) return map(byte & 0x0f);
+            if ((byte & 0xf0) === 0x90) return array(byte & 0x0f);
+            if ((byte & 0xe0) === 0xa0) return str(byte & 0x1f);
+
+            switch (byte) {
+                case 0xc0: return null;
+                case 0xc2: return false;
+                case 0xc3: return true;
+                case 0xc4: value = view.getUint8(offset); offset += 1; break;
+                case 0xc5: value = view.getUint16(offset); offset += 2; break;
+                case 0xc6: value = view.getUint32(offset); offset += 4; break;
+                case 0xca: value = view.getFloat32(offset); offset += 4; return value;
+                case 0xcb: value = view.getFloat64(offset); offset += 8; return value;
+                case 0xcc: value = view.getUint8(offset); offset += 1; return value;
+                case 0xcd: value = view.getUint16(offset); offset += 2; return value;
+                case 0xce: value = view.getUint32(offset); offset += 4; return value;
+                case 0xcf: value = Number(view.getBigUint64(offset)); offset += 8; return value;
+                case 0xd0: value = view.getInt8(offset); offset += 1; return value;
+                case 0xd1: value = view.getInt16(offset); offset += 2; return value;
+                case 0xd2: value = view.getInt32(offset); offset += 4; return value;
+                case 0xd3: value = Number(view.getBigInt64(offset)); offset += 8; return value;
+                case 0xd9: value = view.getUint8(offset); offset += 1; return str(value);
+                case 0xda: value = view.getUint16(offset); offset += 2; return str(value);
+                case 0xdb: value = view.getUint32(offset); offset += 4; return str(value);
+                case 0xdc: value = view.getUint16(offset); offset += 2; return array(value);
+                case 0xdd: value = view.getUint32(offset); offset += 4; return array(value);
+                case 0xde: value = view.getUint16(offset); offset += 2; return map(value);
+                case 0xdf: value = view.getUint32(offset); offset += 4; return map(value);
+                default: throw new Error(`Type MessagePack non supporté : 0x${byte.toString(16)}`);
+            }
+            // données binaires (bin 8/16/32)
+            const data = bytes.slice(offset, offset + value);
+            offset += value;
+            return data;
+        }
+
+        return read();
+    }
+
+    // --- Encodage MessagePack (messages envoyés par le client) ---
+
+    function pack(value) {
+        const chunks = [];
+
+        function push(...bytes) {
+            chunks.push(Uint8Array.from(bytes));
+        }
+
+        function header(length, fix, fixMax, codes) {
+            if (length <= fixMax) push(fix | length);
+            else if (length <= 0xffff) push(codes[0], length >> 8, length & 0xff);
+            else push(codes[1], length >>> 24, (length >> 16) & 0xff, (length >> 8) & 0xff, length & 0xff);
+        }
+
+        function write(item) {
+            if (item === null || item === undefined) {
+                push(0xc0);
+            } else if (typeof item === 'boolean') {
+                push(item ? 0xc3 : 0xc2);
+            } else if (typeof item === 'number') {
+                if (Number.isInteger(item) && item >= -32 && item <= 0x7f) {
+                    push(item & 0xff);
+                } else if (Number.isInteger(item) && item >= -0x80000000 && item <= 0x7fffffff) {
+                    const buffer = new DataView(new ArrayBuffer(5));
+                    buffer.setUint8(0, 0xd2);
+                    buffer.setInt32(1, item);
+                    chunks.push(new Uint8Array(buffer.buffer));
+                } else {
+                    const buffer = new DataView(new ArrayBuffer(9));
+                    buffer.setUint8(0, 0xcb);
+                    buffer.setFloat64(1, item);
+                    chunks.push(new Uint8Array(buffer.buffer));
+                }
+            } else if (typeof item === 'string') {
+                const encoded = textEncoder.encode(item);
+                if (encoded.length <= 31) push(0xa0 | encoded.length);
+                else if (encoded.length <= 0xff) push(0xd9, encoded.length);
+                else header(encoded.length, 0, -1, [0xda, 0xdb]);
+                chunks.push(encoded);
+            } else if (Array.isArray(item)) {
+                header(item.length, 0x90, 15, [0xdc, 0xdd]);
+                item.forEach(write);
+            } else {
+                const keys = Object.keys(item);
+                header(keys.length, 0x80, 15, [0xde, 0xdf]);
+                keys.forEach(key => { write(key); write(item[key]); });
+            }
+        }
+
+        write(value);
+        const size = chunks.reduce((total, chunk) => total + chunk.length, 0);
+        const result = new Uint8Array(size);
+        let offset = 0;
+        chunks.forEach(chunk => { result.set(chunk, offset); offset += chunk.length; });
+        return result;
+    }
+
+    async function inflate(bytes) {
+        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate'));
+        return new Uint8Array(await new Response(stream).arrayBuffer());
+    }
+
+    /**
+     * Décode une trame reçue (texte JSON ou binaire MessagePack).
+     * Renvoie une promesse car la décompression est asynchrone.
+     */
+    async function decode(data) {
+        if (typeof data === 'string') {
+            return JSON.parse(data);
+        }
+        const frame = new Uint8Array(data);
+        let payload = frame.subarray(1);
+        if (frame[0] === FLAG_DEFLATE) {
+            payload = await inflate(payload);
+        } else if (frame[0] !== FLAG_RAW) {
+            throw new Error(`Drapeau de trame inconnu : ${frame[0]}`);
+        }
+        const message = unpack(payload);
+        message.type = TYPE_NAMES[message.t] || message.t;
+        delete message.t;
+        return message;
+    }
+
+    /**
+     * Encode un message pour le sous-protocole négocié par le websocket.
+     */
+    function encode(ws, message) {
+        if (ws.protocol !== MSGPACK) {
+            return JSON.stringify(message);
+        }
+        const body = Object.assign({}, message, { t: TYPE_CODES[message.type] || message.type });
+        delete body.type;
+        const payload = pack(body);
+        const frame = new Uint8Array(payload.length + 1);
+        frame[0] = FLAG_RAW;
+        frame.set(payload, 1);
+        return frame;
+    }
+
+    return { subprotocols, decode, encode };
+})();
@@ -1,8 +1,14 @@
 let ws;
 
+// position du client dans le flux de mises à jour de la room, pour la reprise après coupure
+let position = null;
+let reconnectDelay = 1000;
+
+// URL des cartes par valeur de vote, lues dans la page au premier affichage
+let cardUrls = null;
+
 document.addEventListener('DOMContentLoaded', () => {
     const roomName = window.location.pathname.split('/')[2];
-    ws = new WebSocket(`ws://${window.location.host}/ws/poker/${roomName}/`);
 
     const userInfoElement = document.getElementById('user-info');
     const pseudo = userInfoElement.getAttribute('data-pseudo');
@@ -22,7 +28,7 @@ document.addEventListener('DOMContentLoaded', () => {
     if (revealButton) {
         revealButton.addEventListener('click', () => {
             if (ws) {
-                ws.send(JSON.stringify({
+                ws.send(PokerProtocol.encode(ws, {
                     type: "reveal",
                 }));
             } else {
@@ -31,99 +37,162 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
 
-    ws.onopen = () => {
-        console.log("Websocket connecté");
-    };
-
-ws.onmessage = (event) => {
-    const data = JSON.parse(event.data);
+const handleMessage = (data) => {
     console.log("Message reçu :", data);
 
     switch (data.type) {
-        case "vote":
-            console.log(`EVENT : ${data.player} a voté ${data.vote}`);
-            updateNotVotedList(data.not_voted);
-
-            if (data.all_voted && pseudo === creator && revealButton) {
-                revealButton.disabled = false;
-                revealButton.classList.remove('btn-secondary');
-                revealButton.classList.add('btn-danger');
-            }
+        case "snapshot":
+            position = { epoch: data.epoch, seq: data.seq };
+            applySnapshot(data, pseudo, creator);
             break;
 
-        case "reveal":
-            console.log("Votes reçus :", data.votes);
+        case "room_update":
+            if (position && data.seq <= position.seq) {
+                break; // déjà reçue (rejouée lors d'une reprise)
+            }
+            if (position) {
+                position.seq = data.seq;
+            }
+            applyRoomUpdate(data.changes, pseudo, creator);
+            break;
 
-            displayVotes(data.votes);
+        case "error":
+            alert(`⚠️ Erreur : ${data.message}`);
+            break;
 
-            if (data.unanimity) {
-                console.log("✅ Passage à la prochaine fonctionnalité :", data.next_feature);
-                loadNextFeature(data.next_feature);
-                alert("✅ Passage à la prochaine fonctionnalité.");
-                hideVoteSelection();
-                clearNotVotedList();
-            } else {
-                console.log("❌ Condition non atteinte. On revote pour la fonctionnalité actuelle.");
-                alert("❌ Condition non atteinte. Revote pour cette fonctionnalité.");
-                restartVoteUI();
-            }
+        default:
+            console.error(`Type d'événement inconnu : ${data.type}`);
             break;
+    }
+};
 
+function connect() {
+    const resume = position ? `?resume=${position.epoch}:${position.seq}` : '';
+    ws = new WebSocket(`ws://${window.location.host}/ws/poker/${roomName}/${resume}`, PokerProtocol.subprotocols());
+    ws.binaryType = 'arraybuffer';
 
+    // la décompression est asynchrone : on chaîne les décodages pour conserver l'ordre des messages
+    let pending = Promise.resolve();
 
-        case "final_backlog":
-            alert("🎉 Toutes les fonctionnalités ont été votées !");
-            console.log("Final backlog : ", data.final_backlog);
+    ws.onopen = () => {
+        console.log(`Websocket connecté (protocole : ${ws.protocol || "json"})`);
+        reconnectDelay = 1000;
+    };
 
-            if (data.url) {
-                window.location.href = data.url;
-            } else {
-                displayFinalBacklog(data.final_backlog);
-            }
-            break;
+    ws.onmessage = (event) => {
+        pending = pending
+            .then(() => PokerProtocol.decode(event.data))
+            .then(handleMessage)
+            .catch(error => console.error("Message illisible :", error));
+    };
 
+    ws.onclose = (event) => {
+        if (event.code === 4008) {
+            // connexion trop lente fermée par le serveur : la reprise repart de `position`
+            console.log(`Connexion trop lente fermée par le serveur (${event.reason})`);
+        }
+        console.log(`Websocket déconnecté, reconnexion dans ${reconnectDelay} ms`);
+        setTimeout(connect, reconnectDelay);
+        reconnectDelay = Math.min(reconnectDelay * 2, 30000);
+    };
+}
 
+    connect();
 
-        case "not_voted_update":
-            updateNotVotedList(data.not_voted);
-            break;
+    // heartbeat de présence : sans lui, le joueur est retiré de la room (voir presence.py)
+    setInterval(() => {
+        if (ws && ws.readyState === WebSocket.OPEN) {
+            ws.send(PokerProtocol.encode(ws, { type: "heartbeat" }));
+        }
+    }, 15000);
 
-        case "feature_update":
-            console.log("Prochaine fonctionnalité reçue :", data.feature);
-            loadNextFeature(data.feature);
-            clearNotVotedList();
-            break;
+});
 
-        case "redirect":
-            console.log("Redirection vers :", data.url);
-            window.location.href = data.url;
-            break;
+/**
+ * Applique un instantané de la room (connexion, ou reprise après une longue coupure).
+ */
+function applySnapshot(snapshot, pseudo, creator) {
+    loadNextFeature(snapshot.feature);
+    updateNotVotedList(snapshot.not_voted);
+
+    if (snapshot.vote !== null && snapshot.vote !== undefined) {
+        highlightSelectedCard(snapshot.vote);
+    } else {
+        clearSelectedCard();
+    }
+
+    const revealButton = document.getElementById('reveal');
+    if (pseudo === creator && revealButton) {
+        revealButton.disabled = !snapshot.all_voted;
+        revealButton.classList.toggle('btn-danger', snapshot.all_voted);
+        revealButton.classList.toggle('btn-secondary', !snapshot.all_voted);
+    }
+}
 
+/**
+ * Applique en une fois toutes les modifications d'un message room_update :
+ * le DOM est mis à jour avant les éventuelles alertes ou redirections.
+ */
+function applyRoomUpdate(changes, pseudo, creator) {
+    const revealButton = document.getElementById('reveal');
+    let message = null;
 
+    if (changes.vote) {
+        console.log(`EVENT : ${changes.vote.player} a voté ${changes.vote.vote}`);
+    }
 
-        case "error":
-            alert(`⚠️ Erreur : ${data.message}`);
-            break;
+    if (changes.departed) {
+        console.log("Joueurs partis :", changes.departed);
+    }
 
-        default:
-            console.error(`Type d'événement inconnu : ${data.type}`);
-            break;
+    if (changes.all_voted && pseudo === creator && revealButton) {
+        revealButton.disabled = false;
+        revealButton.classList.remove('btn-secondary');
+        revealButton.classList.add('btn-danger');
     }
-};
 
+    if (changes.reveal) {
+        console.log("Votes reçus :", changes.reveal.votes);
+        displayVotes(changes.reveal.votes);
+        displayStats(changes.reveal.stats);
+
+        if (changes.reveal.unanimity) {
+            hideVoteSelection();
+            message = "✅ Passage à la prochaine fonctionnalité.";
+        } else {
+            restartVoteUI();
+            message = "❌ Condition non atteinte. Revote pour cette fonctionnalité.";
+        }
+    }
 
+    if ('feature' in changes) {
+        console.log("Fonctionnalité en cours :", changes.feature);
+        loadNextFeature(changes.feature);
+    }
 
+    if (changes.not_voted) {
+        updateNotVotedList(changes.not_voted);
+    }
 
+    if (message) {
+        alert(message);
+    }
 
-    ws.onclose = () => {
-        console.log("Websocket déconnecté");
-    };
+    if (changes.final_backlog) {
+        alert("🎉 Toutes les fonctionnalités ont été votées !");
+        console.log("Final backlog : ", changes.final_backlog);
+        displayFinalBacklog(changes.final_backlog);
+    }
 
-});
+    if (changes.redirect) {
+        console.log("Redirection vers :", changes.redirect);
+        window.location.href = changes.redirect;
+    }
+}
 
 function sendVote(player, vote) {
     if (ws) {
-        ws.send(JSON.stringify({
+        ws.send(PokerProtocol.encode(ws, {
             type: "vote",
             player: player,
             vote: vote,
@@ -159,6 +228,21 @@ function displayVotes(votes) {
     }
 }
 
+/**
+ * Affiche les statistiques du round calculées par le serveur.
+ */
+function displayStats(stats) {
+    const statsLine = document.getElementById('vote-stats');
+    if (!statsLine || !stats) {
+        return;
+    }
+    if (stats.mean === null) {
+        statsLine.textContent = '';
+        return;
+    }
+    statsLine.textContent = `Moyenne : ${stats.mean} · Médiane : ${stats.median} · Écart : ${stats.spread}`;
+}
+
 function updateNotVotedList(notVotedPlayers) {
     const notVotedList = document.getElementById('not-voted-list');
     if (notVotedList) {
@@ -192,22 +276,21 @@ function highlightSelectedCard(vote) {
     }
 }
 
+function clearSelectedCard() {
+    document.querySelectorAll('.vote-card img').forEach(card => {
+        card.style.opacity = "1";
+    });
+}
+
+/**
+ * URL de l'image d'une carte, fournie par la page (planche de cartes une fois
+ * collectstatic passé, fichiers séparés sinon).
+ */
 function getCardImage(voteValue) {
-    const basePath = '/static/images/cards/';
-    const cardMap = {
-        0: 'cartes_0.svg',
-        1: 'cartes_1.svg',
-        2: 'cartes_2.svg',
-        3: 'cartes_3.svg',
-        5: 'cartes_5.svg',
-        8: 'cartes_8.svg',
-        13: 'cartes_13.svg',
-        20: 'cartes_20.svg',
-        40: 'cartes_40.svg',
-        100: 'cartes_100.svg',
-        200: 'cartes_cafe.svg'
-    };
-    return basePath + (cardMap[voteValue]);
+    if (!cardUrls) {
+        cardUrls = JSON.parse(document.getElementById('card-urls').textContent);
+    }
+    return cardUrls[voteValue];
 }
 
 function hideVoteSelection() {
@@ -0,0 +1,224 @@
+import re
+import xml.etree.ElementTree as ET
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+from .tally import CARDS, COFFEE_CARD
+
+SVG_NS = 'http://www.w3.org/2000/svg'
+XLINK_NS = 'http://www.w3.org/1999/xlink'
+KEPT_NAMESPACES = (SVG_NS, XLINK_NS, 'http://www.w3.org/XML/1998/namespace')
+
+CARDS_DIR = 'images/cards/'
+"""@var CARDS_DIR
+@brief Répertoire statique des cartes (une image SVG par carte, `cartes_<nom>.svg`).
+"""
+
+SPRITE_NAME = CARDS_DIR + 'deck.svg'
+"""@var SPRITE_NAME
+@brief Planche regroupant toutes les cartes, générée par collectstatic ; chaque carte y est
+désignée par un fragment `#card-<nom>` (élément <view>).
+"""
+
+SPRITE_GAP = 1
+"""@var SPRITE_GAP
+@brief Espace (en unités SVG) entre deux cartes de la planche, pour qu'une vue ne déborde
+pas sur sa voisine.
+"""
+
+CARD_FILE_RE = re.compile(r'^' + re.escape(CARDS_DIR) + r'cartes_([\w-]+)\.svg$')
+REFERENCE_RE = re.compile(r'url\(#([^)]+)\)')
+TEXT_TAGS = {f'{{{SVG_NS}}}text', f'{{{SVG_NS}}}tspan', f'{{{SVG_NS}}}textPath', f'{{{SVG_NS}}}style'}
+
+
+def _number(value):
+    return f"{value:.6f}".rstrip('0').rstrip('.')
+
+
+def _namespace(name):
+    return name[1:].split('}', 1)[0] if name.startswith('{') else ''
+
+
+def _serialize(root):
+    for element in root.iter():
+        element.tag = element.tag.rsplit('}', 1)[-1]
+        for name in list(element.attrib):
+            if name.startswith(f'{{{XLINK_NS}}}'):
+                element.set('xlink:' + name.rsplit('}', 1)[-1], element.attrib.pop(name))
+                root.set('xmlns:xlink', XLINK_NS)
+    root.set('xmlns', SVG_NS)
+    return ET.tostring(root, encoding='unicode').encode()
+
+
+def _references(root):
+    referenced = set()
+    for element in root.iter():
+        for name, value in element.attrib.items():
+            referenced.update(REFERENCE_RE.findall(value))
+            if name.endswith('href') and value.startswith('#'):
+                referenced.add(value[1:])
+    return referenced
+
+
+def _clean(element, referenced):
+    for child in list(element):
+        if not isinstance(child.tag, str) or _namespace(child.tag) not in KEPT_NAMESPACES \
+                or child.tag == f'{{{SVG_NS}}}metadata':
+            element.remove(child)
+        else:
+            _clean(child, referenced)
+    for name in list(element.attrib):
+        if name.startswith('{') and _namespace(name) not in KEPT_NAMESPACES:
+            del element.attrib[name]
+    if element.get('id') is not None and element.get('id') not in referenced:
+        del element.attrib['id']
+    style = element.get('style')
+    if style is not None:
+        declarations = [part.strip() for part in style.split(';')]
+        style = ';'.join(part for part in declarations if part and not part.startswith('-inkscape'))
+        if style:
+            element.set('style', style)
+        else:
+            del element.attrib['style']
+    if element.tag not in TEXT_TAGS:
+        if element.text is not None and not element.text.strip():
+            element.text = None
+        for child in element:
+            if child.tail is not None and not child.tail.strip():
+                child.tail = None
+
+
+def minify_svg(content):
+    """
+    @brief Minifie une image SVG produite par un éditeur (Inkscape...).
+
+    @details Supprime les commentaires, l'en-tête XML, les éléments et attributs propres à
+    l'éditeur, les identifiants inutilisés, les propriétés `-inkscape-*` des styles et les
+    espaces entre balises ; le texte des éléments <text> est conservé tel quel.
+
+    @param content Contenu SVG (bytes).
+
+    @return Contenu minifié (bytes).
+    """
+    root = ET.fromstring(content)
+    _clean(root, _references(root))
+    return _serialize(root)
+
+
+def _prefix_ids(root, prefix):
+    renamed = {}
+    for element in root.iter():
+        if element.get('id') is not None:
+            renamed[element.get('id')] = prefix + element.get('id')
+            element.set('id', renamed[element.get('id')])
+    if not renamed:
+        return
+    for element in root.iter():
+        for name, value in element.attrib.items():
+            value = REFERENCE_RE.sub(lambda match: f"url(#{renamed.get(match[1], match[1])})", value)
+            if name.endswith('href') and value[1:] in renamed:
+                value = '#' + renamed[value[1:]]
+            element.set(name, value)
+
+
+def build_sprite(cards):
+    """
+    @brief Assemble des cartes SVG en une seule planche.
+
+    @details Les cartes sont placées côte à côte ; pour chacune, un élément
+    `<view id="card-<nom>">` cadre la carte, si bien que `deck.svg#card-5` s'affiche comme
+    l'ancienne `cartes_5.svg`. Les identifiants internes de chaque carte sont préfixés par
+    son nom pour rester uniques dans la planche.
+
+    @param cards Liste de tuples (nom, contenu SVG en bytes) ; chaque carte doit avoir un viewBox.
+
+    @return Contenu de la planche (bytes).
+    """
+    sprite = ET.Element(f'{{{SVG_NS}}}svg')
+    offset = height = 0.0
+    for name, content in cards:
+        card = ET.fromstring(content)
+        _, _, card_width, card_height = (float(value) for value in card.get('viewBox').replace(',', ' ').split())
+        _prefix_ids(card, f"{name}-")
+        frame = ET.SubElement(sprite, f'{{{SVG_NS}}}svg', {
+            'x': _number(offset),
+            'width': _number(card_width),
+            'height': _number(card_height),
+            'viewBox': card.get('viewBox'),
+        })
+        frame.extend(card)
+        ET.SubElement(sprite, f'{{{SVG_NS}}}view', {
+            'id': f"card-{name}",
+            'viewBox': f"{_number(offset)} 0 {_number(card_width)} {_number(card_height)}",
+        })
+        offset += card_width + SPRITE_GAP
+        height = max(height, card_height)
+    width = max(offset - SPRITE_GAP, 0)
+    sprite.set('width', _number(width))
+    sprite.set('height', _number(height))
+    sprite.set('viewBox', f"0 0 {_number(width)} {_number(height)}")
+    return _serialize(sprite)
+
+
+class PokerStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """
+    @brief Stockage des fichiers statiques : minification des SVG et planche de cartes,
+    puis empreinte dans le nom (manifeste) et précompression gzip/brotli par WhiteNoise.
+
+    @details Avant le calcul des empreintes, collectstatic réécrit chaque SVG collecté sous
+    sa forme minifiée et génère SPRITE_NAME à partir des cartes. Les fichiers hachés sont
+    servis par WhiteNoise avec un en-tête `Cache-Control: immutable`.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        """
+        @brief Minifie les SVG et génère la planche, puis délègue au manifeste WhiteNoise.
+
+        @param paths Dictionnaire {chemin: (stockage source, chemin source)} de collectstatic.
+        @param dry_run Simulation : aucun fichier n'est écrit.
+
+        @return Générateur de tuples (nom, nom haché, traité) comme celui de Django.
+        """
+        if not dry_run:
+            paths = dict(paths)
+            cards = []
+            for path, (storage, source) in sorted(paths.items()):
+                if not path.endswith('.svg') or path == SPRITE_NAME:
+                    continue
+                with storage.open(source) as original:
+                    content = minify_svg(original.read())
+                self._replace(path, content)
+                paths[path] = (self, path)
+                match = CARD_FILE_RE.match(path)
+                if match:
+                    cards.append((match[1], content))
+            if cards:
+                self._replace(SPRITE_NAME, build_sprite(cards))
+                paths[SPRITE_NAME] = (self, SPRITE_NAME)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def _replace(self, path, content):
+        if self.exists(path):
+            self.delete(path)
+        self._save(path, ContentFile(content))
+
+
+def card_urls():
+    """
+    @brief URL de l'image de chaque valeur de vote.
+
+    @details Une fois collectstatic passé (hors DEBUG), les cartes pointent toutes vers la
+    planche empreintée (`deck.<hash>.svg#card-5`) : une seule requête, mise en cache
+    définitivement. Sinon, chaque carte garde son propre fichier.
+
+    @return Dictionnaire {valeur du vote (str): URL}.
+    """
+    names = {str(card): str(card) for card in CARDS}
+    names[COFFEE_CARD] = 'cafe'
+    if not settings.DEBUG and SPRITE_NAME in getattr(staticfiles_storage, 'hashed_files', {}):
+        sprite = staticfiles_storage.url(SPRITE_NAME)
+        return {value: f"{sprite}#card-{name}" for value, name in names.items()}
+    return {value: staticfiles_storage.url(f"{CARDS_DIR}cartes_{name}.svg") for value, name in names.items()}
@@ -0,0 +1,172 @@
+import logging
+from collections import Counter, namedtuple
+
+logger = logging.getLogger(__name__)
+
+CARDS = (0, 1, 2, 3, 5, 8, 13, 20, 40, 100)
+"""@var CARDS
+@brief Valeurs numériques du jeu de cartes.
+"""
+
+COFFEE_CARD = "200"
+"""@var COFFEE_CARD
+@brief Valeur de la carte café : retenue comme résultat, elle met la partie en pause
+(export du backlog).
+"""
+
+VOTE_VALUES = frozenset(str(card) for card in CARDS) | {COFFEE_CARD}
+"""@var VOTE_VALUES
+@brief Valeurs de vote acceptées d'un joueur (cartes du jeu, sous forme de chaînes).
+"""
+
+Tally = namedtuple('Tally', ['count', 'distribution', 'modes', 'mode_count', 'median', 'mean', 'spread'])
+"""@var Tally
+@brief Décompte des votes d'un round.
+
+@details
+- count : nombre de votes ;
+- distribution : {valeur: nombre de votes}, valeurs numériques croissantes puis les autres ;
+- modes : valeurs les plus votées (plusieurs en cas d'égalité) ;
+- mode_count : nombre de votes de ces valeurs ;
+- median : médiane basse des cartes numériques (toujours une carte jouée), ou None ;
+- mean : moyenne des cartes numériques, ou None ;
+- spread : écart entre la plus forte et la plus faible carte numérique, ou None.
+
+La carte café et les valeurs non numériques comptent dans la distribution mais pas
+dans les statistiques.
+"""
+
+RULES = {}
+"""@var RULES
+@brief Règles de consensus, indexées par valeur de PokerRoom.mode.
+"""
+
+
+def _as_number(value):
+    if value == COFFEE_CARD:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def compute_tally(values):
+    """
+    @brief Calcule le décompte d'un round en un seul parcours des votes.
+
+    @details Le parcours des votes alimente un Counter ; les statistiques sont ensuite
+    calculées sur les k valeurs distinctes (au plus la taille du jeu de cartes).
+
+    @param values Valeurs des votes (chaînes ou entiers).
+
+    @return Un Tally.
+    """
+    counts = Counter(str(value) for value in values)
+    count = sum(counts.values())
+
+    numeric = sorted((number, value) for value in counts if (number := _as_number(value)) is not None)
+    others = sorted(value for value in counts if _as_number(value) is None)
+    distribution = {value: counts[value] for _, value in numeric}
+    distribution.update((value, counts[value]) for value in others)
+
+    mode_count = max(counts.values(), default=0)
+    modes = [value for value, votes in distribution.items() if votes == mode_count]
+
+    median = mean = spread = None
+    numeric_count = sum(counts[value] for _, value in numeric)
+    if numeric_count:
+        middle = (numeric_count - 1) // 2
+        seen, total = 0, 0
+        for number, value in numeric:
+            if median is None and seen + counts[value] > middle:
+                median = number
+            seen += counts[value]
+            total += number * counts[value]
+        mean = round(total / numeric_count, 2)
+        spread = numeric[-1][0] - numeric[0][0]
+
+    return Tally(count, distribution, modes, mode_count, median, mean, spread)
+
+
+def consensus_rule(name):
+    """
+    @brief Décorateur enregistrant une règle de consensus dans RULES.
+
+    @details Une règle reçoit un Tally et renvoie la valeur retenue (chaîne), ou None si
+    le consensus n'est pas atteint.
+
+    @param name Valeur de PokerRoom.mode associée à la règle.
+    """
+    def register(func):
+        RULES[name] = func
+        return func
+    return register
+
+
+@consensus_rule('unanimity')
+def unanimity(tally):
+    return tally.modes[0] if len(tally.distribution) == 1 else None
+
+
+@consensus_rule('absolute_majority')
+def absolute_majority(tally):
+    return tally.modes[0] if tally.mode_count * 2 > tally.count else None
+
+
+@consensus_rule('relative_majority')
+def relative_majority(tally):
+    return tally.modes[0] if len(tally.modes) == 1 else None
+
+
+@consensus_rule('median')
+def median(tally):
+    return None if tally.median is None else str(tally.median)
+
+
+@consensus_rule('average')
+def average(tally):
+    if tally.mean is None:
+        return None
+    # carte la plus proche de la moyenne, la plus forte en cas d'égalité
+    return str(min(CARDS, key=lambda card: (abs(card - tally.mean), -card)))
+
+
+def decide(mode, tally):
+    """
+    @brief Applique la règle de consensus du mode de la room.
+
+    @details Une pause café unanime est retenue quel que soit le mode.
+
+    @param mode Valeur de PokerRoom.mode.
+    @param tally Décompte du round (compute_tally()).
+
+    @return La valeur retenue, ou None si le consensus n'est pas atteint.
+    """
+    if not tally.count:
+        return None
+    if list(tally.distribution) == [COFFEE_CARD]:
+        return COFFEE_CARD
+    rule = RULES.get(mode)
+    if rule is None:
+        logger.warning("Mode de jeu inconnu : %s", mode)
+        return None
+    return rule(tally)
+
+
+def stats_payload(tally):
+    """
+    @brief Statistiques d'un round telles qu'envoyées aux clients dans `reveal`.
+
+    @param tally Décompte du round.
+
+    @return Dictionnaire sérialisable.
+    """
+    return {
+        "count": tally.count,
+        "distribution": tally.distribution,
+        "modes": tally.modes,
+        "median": tally.median,
+        "mean": tally.mean,
+        "spread": tally.spread,
+    }
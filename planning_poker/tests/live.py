@@ -0,0 +1,97 @@
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from django.contrib.sessions.backends.signed_cookies import SessionStore as SignedCookieSession
+from django.test import SimpleTestCase
+
+
+class RunAsgiTestCase(SimpleTestCase):
+    """
+    Base des tests sur un vrai serveur : `runasgi` lancé dans un sous-processus, sur une base
+    SQLite temporaire contenant les rooms `rooms`.
+
+    @param SimpleTestCase: Classe de test Django.
+    """
+    rooms = ()
+    environ = {}
+
+    def setUp(self):
+        """
+        Initialisation du test : base temporaire migrée et rooms créées.
+
+        @param self: Instance de la classe.
+        """
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.env = dict(
+            os.environ,
+            POKER_DB_NAME=os.path.join(self.directory.name, "db.sqlite3"),
+            POKER_CHANNEL_LAYER="memory",
+            POKER_SESSION_ENGINE="django.contrib.sessions.backends.signed_cookies",
+            **self.environ,
+        )
+        for name in ("POKER_METRICS_DIR", "POKER_WORKERS"):
+            self.env.pop(name, None)
+        self.manage("migrate", "--noinput")
+        self.manage("shell", "-c", (
+            "from planning_poker.models import PokerRoom\n"
+            f"for name in {list(self.rooms)!r}:\n"
+            "    PokerRoom.objects.create_with_backlog(name=name, creator='bob', backlog=[{'feature': 'A'}])"
+        ))
+
+    def manage(self, *args):
+        subprocess.run([sys.executable, "manage.py", *args], env=self.env, check=True, capture_output=True)
+
+    def start_server(self, *args):
+        """
+        @brief Lance runasgi sur un port libre et attend qu'il accepte les connexions.
+
+        @param args Options supplémentaires de runasgi.
+
+        @return Le processus.
+        """
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.port = probe.getsockname()[1]
+        self.log_path = os.path.join(self.directory.name, "server.log")
+        log = open(self.log_path, "w")
+        self.addCleanup(log.close)
+        server = subprocess.Popen(
+            [sys.executable, "manage.py", "runasgi", "--port", str(self.port), *args],
+            env=self.env, stdout=log, stderr=subprocess.STDOUT,
+        )
+        self.addCleanup(server.wait)
+        self.addCleanup(server.terminate)
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=1).close()
+                return server
+            except OSError:
+                if time.monotonic() > deadline or server.poll() is not None:
+                    self.fail("runasgi n'a pas démarré")
+                time.sleep(0.1)
+
+    def server_log(self):
+        with open(self.log_path) as log:
+            return log.read()
+
+    def uri(self, room_name):
+        return f"ws://127.0.0.1:{self.port}/ws/poker/{room_name}/"
+
+    def cookie(self, pseudo):
+        session = SignedCookieSession()
+        session["pseudo"] = pseudo
+        session.save()
+        return {"Cookie": f"sessionid={session.session_key}"}
+
+    def metric(self, name):
+        with urllib.request.urlopen(f"http://127.0.0.1:{self.port}/metrics", timeout=5) as response:
+            for line in response.read().decode().splitlines():
+                if line.startswith(f"{name} "):
+                    return float(line.split()[1])
+        return 0.0
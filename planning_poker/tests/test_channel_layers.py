@@ -0,0 +1,63 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase
+from planningpoker.channel_layers import channel_layers_from_env, redis_hosts, redis_url
+
+
+class ChannelLayerConfigTestCase(SimpleTestCase):
+    """
+    Test pour la configuration du channel layer par l'environnement.
+
+    @param SimpleTestCase: Classe de test Django.
+    """
+    def test_default_hosts(self):
+        """
+        Test des instances Redis par défaut : REDIS_HOST/REDIS_PORT, puis Docker, puis localhost.
+
+        @param self: Instance de la classe.
+        """
+        self.assertEqual(redis_hosts({}), ["redis://localhost:6379"])
+        self.assertEqual(redis_hosts({'dockerenable': 'true'}), ["redis://redis:6379"])
+        self.assertEqual(redis_hosts({'REDIS_HOST': 'cache', 'REDIS_PORT': '6380'}), ["redis://cache:6380"])
+        self.assertEqual(redis_url(1, {'REDIS_HOST': 'cache'}), "redis://cache:6379/1")
+
+    def test_sharded_redis_layer(self):
+        """
+        Test d'un layer Redis réparti sur plusieurs instances, avec ses options de file.
+
+        @param self: Instance de la classe.
+        """
+        layers = channel_layers_from_env({
+            'POKER_REDIS_HOSTS': 'redis://r1:6379/0, r2:6379',
+            'POKER_LAYER_CAPACITY': '500',
+            'POKER_LAYER_GROUP_EXPIRY': '3600',
+            'POKER_LAYER_PREFIX': 'poker',
+        })
+        self.assertEqual(layers["default"], {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": ["redis://r1:6379/0", "redis://r2:6379"],
+                "prefix": "poker",
+                "capacity": 500,
+                "expiry": 60,
+                "group_expiry": 3600,
+            },
+        })
+
+    def test_pubsub_memory_and_errors(self):
+        """
+        Test du layer pubsub (sans options de file), du layer en mémoire imposé en test,
+        et des valeurs invalides.
+
+        @param self: Instance de la classe.
+        """
+        pubsub = channel_layers_from_env({'POKER_CHANNEL_LAYER': 'pubsub', 'POKER_LAYER_CAPACITY': '5'})["default"]
+        self.assertEqual(pubsub["BACKEND"], "channels_redis.pubsub.RedisPubSubChannelLayer")
+        self.assertEqual(pubsub["CONFIG"], {"hosts": ["redis://localhost:6379"], "prefix": "asgi"})
+
+        memory = channel_layers_from_env({'POKER_CHANNEL_LAYER': 'pubsub'}, testing=True)["default"]
+        self.assertEqual(memory["BACKEND"], "channels.layers.InMemoryChannelLayer")
+
+        with self.assertRaises(ImproperlyConfigured):
+            channel_layers_from_env({'POKER_CHANNEL_LAYER': 'rabbitmq'})
+        with self.assertRaises(ImproperlyConfigured):
+            channel_layers_from_env({'POKER_LAYER_EXPIRY': 'une minute'})
@@ -1,8 +1,10 @@
-import json
+from unittest import mock
+from channels.layers import get_channel_layer
 from channels.testing import WebsocketCommunicator
 from django.test import TestCase
 from planningpoker.asgi import application
 from planning_poker.models import PokerRoom, Player
+from planning_poker.room_state import clear_room_states
 from channels.sessions import SessionMiddlewareStack
 from django.contrib.sessions.backends.db import SessionStore
 from asgiref.sync import sync_to_async
@@ -22,17 +24,17 @@ class PokerConsumerTestCase(TestCase):
         @param self: Instance de la classe.
         """
         print("DEBUG: Initialisation du test.")
-        self.room = PokerRoom.objects.create(
+        clear_room_states()
+        self.room = PokerRoom.objects.create_with_backlog(
             name="test_room",
             creator="test_creator",
-            backlog=json.dumps([
+            backlog=[
                 {"feature": "Connexion utilisateur"},
                 {"feature": "Recherche avancée"},
                 {"feature": "Ajout au panier"}
-            ]),
-            all_features=json.dumps([])
+            ]
         )
-        print(f"DEBUG: Room créée avec backlog : {self.room.backlog}")
+        print(f"DEBUG: Room créée avec backlog : {self.room.backlog()}")
 
         self.player = Player.objects.create(
             room=self.room,
@@ -78,14 +80,16 @@ class PokerConsumerTestCase(TestCase):
 
         response = await communicator.receive_json_from()
         print(f"DEBUG: Première réponse reçue après le vote : {response}")
-        self.assertEqual(response["type"], "feature_update")
+        self.assertEqual(response["type"], "snapshot")
         self.assertEqual(response["feature"]["feature"], "Connexion utilisateur")
 
         not_voted_updated = False
         for _ in range(10):
             response = await communicator.receive_json_from()
             print(f"DEBUG: Réponse reçue : {response}")
-            if response["type"] == "not_voted_update" and "test_player" not in response["not_voted"]:
+            changes = response["changes"]
+            if "vote" in changes and "test_player" not in changes["not_voted"]:
+                self.assertTrue(changes["all_voted"])
                 not_voted_updated = True
                 break
             await asyncio.sleep(0.1)
@@ -100,13 +104,157 @@ class PokerConsumerTestCase(TestCase):
 
         reveal_response = await communicator.receive_json_from()
         print(f"DEBUG: Réponse reçue après la révélation : {reveal_response}")
-        self.assertEqual(reveal_response["type"], "reveal")
-        self.assertTrue("votes" in reveal_response)
-        self.assertEqual(reveal_response["unanimity"], True)
+        changes = reveal_response["changes"]
+        self.assertEqual(reveal_response["type"], "room_update")
+        self.assertTrue("votes" in changes["reveal"])
+        self.assertEqual(changes["reveal"]["unanimity"], True)
+        self.assertEqual(changes["not_voted"], ["test_player"])
+        self.assertEqual(changes["feature"]["feature"], "Recherche avancée")
 
-        next_feature_response = await communicator.receive_json_from()
-        print(f"DEBUG: Réponse reçue pour la fonctionnalité suivante : {next_feature_response}")
+        self.assertTrue(await communicator.receive_nothing())
 
         await communicator.disconnect()
         print("DEBUG: Connexion WebSocket fermée.")
 
+
+    async def connect_player(self, pseudo, resume=None):
+        """
+        Connecte un joueur au websocket de la room.
+
+        @param self: Instance de la classe.
+        @param pseudo: Pseudo du joueur.
+        @param resume: Position de reprise "<époque>:<seq>", ou None.
+
+        @return Le WebsocketCommunicator connecté.
+        """
+        session = await sync_to_async(SessionStore)()
+        session["pseudo"] = pseudo
+        await sync_to_async(session.save)()
+
+        path = f"/ws/poker/{self.room.name}/"
+        if resume:
+            path += f"?resume={resume}"
+        communicator = WebsocketCommunicator(SessionMiddlewareStack(application), path)
+        communicator.scope["session"] = session
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def test_resume_sends_only_missed_updates(self):
+        """
+        Test de reprise : le joueur reconnecté reçoit uniquement les mises à jour manquées,
+        garde son vote, et rien n'est diffusé aux autres joueurs.
+
+        @param self: Instance de la classe.
+        """
+        alice = await self.connect_player("test_player")
+        bob = await self.connect_player("bob")
+
+        snapshot = await bob.receive_json_from()
+        self.assertEqual(snapshot["type"], "snapshot")
+        join = await bob.receive_json_from()
+        self.assertEqual(join["seq"], snapshot["seq"])  # déjà couvert par l'instantané
+        await bob.send_json_to({"type": "vote", "player": "bob", "vote": 3})
+        update = await bob.receive_json_from()
+        self.assertEqual(update["changes"]["vote"]["player"], "bob")
+        resume = f"{snapshot['epoch']}:{update['seq']}"
+        await bob.disconnect()
+
+        await alice.receive_json_from()  # snapshot
+        await alice.receive_json_from()  # arrivée d'alice
+        await alice.receive_json_from()  # arrivée de bob
+        await alice.receive_json_from()  # vote de bob
+        await alice.send_json_to({"type": "vote", "player": "test_player", "vote": 5})
+        missed = await alice.receive_json_from()
+
+        bob = await self.connect_player("bob", resume=resume)
+        replayed = await bob.receive_json_from()
+        self.assertEqual(replayed["seq"], missed["seq"])
+        self.assertEqual(replayed["changes"]["vote"], {"player": "test_player", "vote": "5"})
+        self.assertTrue(replayed["changes"]["all_voted"])
+        self.assertTrue(await bob.receive_nothing())
+        self.assertTrue(await alice.receive_nothing())
+
+        await alice.disconnect()
+        await bob.disconnect()
+
+    async def test_resume_from_unknown_position_sends_snapshot(self):
+        """
+        Test de reprise trop ancienne (autre époque) : le joueur reçoit un instantané.
+
+        @param self: Instance de la classe.
+        """
+        alice = await self.connect_player("test_player")
+        await alice.receive_json_from()
+        await alice.send_json_to({"type": "vote", "player": "test_player", "vote": 8})
+        await alice.receive_json_from()
+        await alice.receive_json_from()
+
+        bob = await self.connect_player("test_player", resume="ancienne:42")
+        snapshot = await bob.receive_json_from()
+        self.assertEqual(snapshot["type"], "snapshot")
+        self.assertEqual(snapshot["vote"], "8")
+        self.assertEqual(snapshot["not_voted"], [])
+        self.assertTrue(await alice.receive_nothing())
+
+        await alice.disconnect()
+        await bob.disconnect()
+
+    async def test_vote_is_checked(self):
+        """
+        Test qu'un vote est attribué au joueur de la session et qu'une valeur hors du jeu
+        est refusée sans modifier la room.
+
+        @param self: Instance de la classe.
+        """
+        alice = await self.connect_player("test_player")
+        await alice.receive_json_from()  # snapshot
+        await alice.receive_json_from()  # arrivée
+
+        await alice.send_json_to({"type": "vote", "player": "fantome", "vote": "abc"})
+        error = await alice.receive_json_from()
+        self.assertEqual(error, {"type": "error", "message": "Vote invalide"})
+        self.assertTrue(await alice.receive_nothing())
+
+        await alice.send_json_to({"type": "vote", "player": "fantome", "vote": 13})
+        update = await alice.receive_json_from()
+        self.assertEqual(update["changes"]["vote"], {"player": "test_player", "vote": "13"})
+        self.assertEqual(update["changes"]["not_voted"], [])
+
+        await alice.disconnect()
+        names = await sync_to_async(list)(Player.objects.filter(room=self.room).values_list('name', flat=True))
+        self.assertEqual(names, ["test_player"])
+
+    async def test_concurrent_broadcasts_stay_in_order(self):
+        """
+        Test que deux diffusions concurrentes arrivent dans l'ordre de leur numéro de
+        séquence, même si le premier envoi au groupe est lent.
+
+        @param self: Instance de la classe.
+        """
+        alice = await self.connect_player("test_player")
+        bob = await self.connect_player("bob")
+        for _ in range(3):  # snapshot, arrivée d'alice, arrivée de bob
+            await alice.receive_json_from()
+
+        layer = get_channel_layer()
+        group_send = layer.group_send
+        delays = iter([0.1])
+
+        async def slow_group_send(group, message):
+            await asyncio.sleep(next(delays, 0))
+            await group_send(group, message)
+
+        with mock.patch.object(layer, 'group_send', slow_group_send):
+            await alice.send_json_to({"type": "vote", "player": "test_player", "vote": 5})
+            await asyncio.sleep(0.01)
+            await bob.send_json_to({"type": "vote", "player": "bob", "vote": 3})
+            first = await alice.receive_json_from()
+            second = await alice.receive_json_from()
+
+        self.assertEqual(second["seq"], first["seq"] + 1)
+        self.assertEqual(first["changes"]["vote"]["player"], "test_player")
+        self.assertTrue(second["changes"]["all_voted"])
+
+        await alice.disconnect()
+        await bob.disconnect()
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+import time
+from django.test import SimpleTestCase, override_settings
+from planning_poker.db import db_sync_to_async
+
+
+class DatabasePoolTestCase(SimpleTestCase):
+    """
+    Test pour le pool de threads d'accès à la base.
+
+    @param SimpleTestCase: Classe de test Django sans base.
+    """
+    @override_settings(POKER_DB_THREADS=4)
+    async def test_calls_run_in_parallel_in_pool(self):
+        """
+        Test que des appels bloquants concurrents ne sont pas sérialisés dans un seul thread.
+
+        @param self: Instance de la classe.
+        """
+        def blocking():
+            time.sleep(0.2)
+            return threading.current_thread().name
+
+        start = time.perf_counter()
+        names = await asyncio.gather(*[db_sync_to_async(blocking)() for _ in range(4)])
+        elapsed = time.perf_counter() - start
+
+        self.assertTrue(all(name.startswith("poker-db") for name in names))
+        self.assertLess(elapsed, 0.6)
+
+    @override_settings(POKER_DB_THREADS=0)
+    async def test_zero_threads_keeps_shared_thread(self):
+        """
+        Test qu'avec POKER_DB_THREADS = 0 les appels restent dans le thread partagé.
+
+        @param self: Instance de la classe.
+        """
+        name = await db_sync_to_async(lambda: threading.current_thread().name)()
+        self.assertFalse(name.startswith("poker-db"))
@@ -0,0 +1,144 @@
+import csv
+import gzip
+import io
+import json
+from django.test import TestCase
+from django.urls import reverse
+from asgiref.sync import sync_to_async
+from planning_poker.models import PokerRoom
+from planning_poker.rounds import persist_round
+from planning_poker import export
+
+
+class ExportTestCase(TestCase):
+    """
+    Test pour l'export du backlog en streaming.
+
+    @param TestCase: Classe de test Django.
+    """
+    def setUp(self):
+        """
+        Initialisation du test.
+
+        @param self: Instance de la classe.
+        """
+        self.room = PokerRoom.objects.create_with_backlog(
+            name="export_room",
+            creator="alice",
+            backlog=[{"feature": "A", "owner": "bob"}, {"feature": "B"}, {"feature": "C"}],
+            all_features=[{"feature": "Z", "priority": "3"}],
+        )
+
+    def url(self, export_format):
+        return reverse('export_backlog_download', args=["export_room", export_format])
+
+    async def download(self, export_format, **headers):
+        response = await self.async_client.get(self.url(export_format), headers=headers)
+        body = b"".join([chunk async for chunk in response.streaming_content]) if response.streaming else b""
+        return response, body
+
+    async def test_json_matches_backlog_format(self):
+        """
+        Test que l'export JSON reprend le format du backlog, y compris sur plusieurs lots.
+
+        @param self: Instance de la classe.
+        """
+        original = export.CHUNK_SIZE
+        export.CHUNK_SIZE = 2
+        try:
+            response, body = await self.download("json")
+        finally:
+            export.CHUNK_SIZE = original
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(body), {
+            "backlog": [{"feature": "A", "owner": "bob"}, {"feature": "B"}, {"feature": "C"}],
+            "all_features": [{"feature": "Z", "priority": "3"}],
+        })
+
+    async def test_ndjson_and_csv(self):
+        """
+        Test des exports NDJSON et CSV.
+
+        @param self: Instance de la classe.
+        """
+        _, body = await self.download("ndjson")
+        lines = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual(lines[0], {"section": "all_features", "feature": "Z", "priority": "3"})
+        self.assertEqual(len(lines), 4)
+
+        _, body = await self.download("csv")
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(rows[0], ["section", "feature", "priority", "extra"])
+        self.assertEqual(rows[2], ["backlog", "A", "", '{"owner": "bob"}'])
+
+    async def test_gzip(self):
+        """
+        Test de la compression gzip à la demande du client.
+
+        @param self: Instance de la classe.
+        """
+        response, body = await self.download("json", accept_encoding="gzip, deflate")
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response.headers["Vary"])
+        self.assertIn(b'"feature": "A"', gzip.decompress(body))
+
+    async def test_conditional_get(self):
+        """
+        Test qu'un export inchangé renvoie 304 sans lire les fonctionnalités, et que
+        l'estimation d'une fonctionnalité change l'ETag.
+
+        @param self: Instance de la classe.
+        """
+        response, _ = await self.download("csv")
+        etag = response.headers["ETag"]
+        self.assertIn("Last-Modified", response.headers)
+
+        response, body = await self.download("csv", if_none_match=etag)
+        self.assertEqual(response.status_code, 304)
+
+        feature = await self.room.features.aget(title="A")
+        await sync_to_async(persist_round)(self.room.pk, feature.pk, "5")
+        response, _ = await self.download("csv", if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    async def test_change_during_export_aborts_stream(self):
+        """
+        Test qu'un round validé pendant un export interrompt le flux au lieu de mêler
+        deux versions sous l'ETag de la première.
+
+        @param self: Instance de la classe.
+        """
+        original = export.CHUNK_SIZE
+        export.CHUNK_SIZE = 1
+        try:
+            response = await self.async_client.get(self.url("ndjson"))
+            chunks = aiter(response.streaming_content)
+            first = json.loads(await anext(chunks))
+            self.assertEqual(first["feature"], "Z")
+            feature = await self.room.features.aget(title="A")
+            await sync_to_async(persist_round)(self.room.pk, feature.pk, "5")
+            with self.assertRaises(export.ExportChanged):
+                async for _ in chunks:
+                    pass
+        finally:
+            export.CHUNK_SIZE = original
+
+    def test_not_modified_reads_only_the_room(self):
+        """
+        Test qu'une requête conditionnelle coûte une seule requête en base.
+
+        @param self: Instance de la classe.
+        """
+        etag = self.client.get(self.url("json")).headers["ETag"]
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url("json"), headers={"if-none-match": etag})
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_format(self):
+        """
+        Test qu'un format inconnu renvoie 404.
+
+        @param self: Instance de la classe.
+        """
+        self.assertEqual(self.client.get(self.url("xml")).status_code, 404)
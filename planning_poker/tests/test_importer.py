@@ -0,0 +1,171 @@
+import io
+import json
+import time
+from asgiref.sync import async_to_sync
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from planning_poker.models import PokerRoom, Feature
+from planning_poker import importer
+from planning_poker.importer import BacklogImportError, detect_format, import_backlog, parse_json
+from planning_poker.room_cache import get_room_info, clear_room_cache
+from planning_poker.room_state import clear_room_states, get_room_state
+
+
+class ImporterTestCase(TestCase):
+    """
+    Test pour l'import de backlog par fichier.
+
+    @param TestCase: Classe de test Django.
+    """
+    def setUp(self):
+        """
+        Initialisation du test.
+
+        @param self: Instance de la classe.
+        """
+        clear_room_cache()
+        clear_room_states()
+        self.room = PokerRoom.objects.create(name="import_room", creator="alice")
+
+    def test_json_is_parsed_incrementally(self):
+        """
+        Test de l'analyse du JSON par petits blocs, avec les numéros de ligne.
+
+        @param self: Instance de la classe.
+        """
+        document = b'{\n  "backlog": [\n    {"feature": "A \\u00e9"},\n    {"feature": "B"}\n  ],\n  "all_features": []\n}'
+        original, importer.READ_SIZE = importer.READ_SIZE, 7
+        try:
+            records = list(parse_json(io.BytesIO(document)))
+        finally:
+            importer.READ_SIZE = original
+        self.assertEqual(records, [(3, 'backlog', {"feature": "A é"}), (4, 'backlog', {"feature": "B"})])
+
+    def test_estimated_features_come_first(self):
+        """
+        Test que les fonctionnalités estimées sont numérotées avant celles à estimer,
+        quel que soit l'ordre du fichier, et que le cache de la room est invalidé.
+
+        @param self: Instance de la classe.
+        """
+        get_room_info("import_room")
+        content = b'{"feature": "A"}\n{"section": "all_features", "feature": "Z", "priority": "8"}\n{"feature": "B"}\n'
+        self.assertEqual(import_backlog(self.room, SimpleUploadedFile("b.ndjson", content), 'ndjson'), 3)
+
+        self.assertEqual(list(self.room.features.values_list('title', 'ordinal')), [("Z", 0), ("A", 1), ("B", 2)])
+        info = get_room_info("import_room")
+        self.assertEqual([item["feature"] for item in info.backlog], ["A", "B"])
+        self.assertEqual(info.all_features, [{"feature": "Z", "priority": "8"}])
+
+    def test_import_extends_open_room(self):
+        """
+        Test qu'un import dans une room ouverte complète le backlog de son état en mémoire.
+
+        @param self: Instance de la classe.
+        """
+        self.room.add_features(backlog=[{"feature": "A"}])
+        state = async_to_sync(get_room_state)("import_room")
+        content = b'{"feature": "B"}\n{"section": "all_features", "feature": "Z", "priority": "8"}\n'
+        with self.captureOnCommitCallbacks(execute=True):
+            import_backlog(self.room, SimpleUploadedFile("b.ndjson", content), 'ndjson')
+
+        self.assertEqual(state.remaining_backlog(), [{"feature": "A"}, {"feature": "B"}])
+        pending = self.room.features.filter(status=Feature.PENDING).values_list('pk', flat=True)
+        self.assertEqual(state.backlog_ids, list(pending))
+        self.assertEqual(state.all_features, [{"feature": "Z", "priority": "8"}])
+
+    def test_errors_are_line_numbered_and_nothing_is_imported(self):
+        """
+        Test que les erreurs indiquent leur ligne et annulent tout l'import.
+
+        @param self: Instance de la classe.
+        """
+        content = b"section,feature,priority,extra\nbacklog,A,,\nbacklog,,,\nautre,C,,\n"
+        with self.assertRaises(BacklogImportError) as context:
+            import_backlog(self.room, SimpleUploadedFile("b.csv", content), 'csv')
+        self.assertEqual([line for line, _ in context.exception.errors], [3, 4])
+        self.assertFalse(self.room.features.exists())
+
+    def test_malformed_files_are_reported(self):
+        """
+        Test qu'une section ou une clé qui n'est pas une chaîne, et un fichier qui n'est pas
+        en UTF-8, sont signalés avec leur ligne au lieu de faire échouer l'import.
+
+        @param self: Instance de la classe.
+        """
+        cases = [
+            ("b.ndjson", b'{"feature": "A"}\n{"section": [], "feature": "B"}\n', 2),
+            ("b.json", b'{\n  "backlog": [],\n  []: 1\n}', 3),
+            ("b.csv", "feature\nA\nCafé\n".encode('latin-1'), 3),
+            ("b.json", '{"backlog": [\n  {"feature": "A"},\n  {"feature": "Café"}\n]}'.encode('latin-1'), 3),
+        ]
+        for name, content, line in cases:
+            with self.subTest(name=name, content=content):
+                with self.assertRaises(BacklogImportError) as context:
+                    import_backlog(self.room, SimpleUploadedFile(name, content), detect_format(name))
+                self.assertEqual(context.exception.errors[-1][0], line)
+        self.assertFalse(self.room.features.exists())
+
+        session = self.client.session
+        session["pseudo"] = "alice"
+        session.save()
+        url = reverse('import_backlog_api', args=["import_room"])
+        response = self.client.post(url, {"file": SimpleUploadedFile("b.csv", "feature\nCafé\n".encode('latin-1'))})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"], [{"line": 2, "message": "encodage invalide (UTF-8 attendu)."}])
+
+    def test_large_import(self):
+        """
+        Test de l'import de 10 000 fonctionnalités par lots.
+
+        @param self: Instance de la classe.
+        """
+        content = json.dumps({"backlog": [{"feature": f"Story {index}", "points": index} for index in range(10000)]})
+        started = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            imported = import_backlog(self.room, SimpleUploadedFile("b.json", content.encode()), 'json')
+        self.assertLess(time.perf_counter() - started, 5)
+        # agrégat, 10 lots, décalage des ordinaux et version de la room
+        self.assertLess(len(queries), 20)
+        self.assertEqual(imported, 10000)
+        self.assertEqual(Feature.objects.filter(room=self.room, status=Feature.PENDING).count(), 10000)
+
+    def test_api_and_create_room_upload(self):
+        """
+        Test de l'API d'import (réservée au créateur, avec jeton CSRF) et de l'envoi d'un
+        fichier à la création d'une room.
+
+        @param self: Instance de la classe.
+        """
+        url = reverse('import_backlog_api', args=["import_room"])
+        response = self.client.post(url, {"file": SimpleUploadedFile("b.ndjson", b'{"feature": "A"}\n')})
+        self.assertEqual(response.status_code, 403)
+
+        session = self.client.session
+        session["pseudo"] = "alice"
+        session.save()
+        csrf_client = Client(enforce_csrf_checks=True)
+        csrf_client.cookies = self.client.cookies
+        response = csrf_client.post(url, {"file": SimpleUploadedFile("b.ndjson", b'{"feature": "A"}\n')})
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(Feature.objects.filter(room=self.room).exists())
+
+        response = self.client.post(url, {"file": SimpleUploadedFile("b.ndjson", b'{"feature": "A"}\n')})
+        self.assertEqual(response.json(), {"success": True, "imported": 1})
+
+        response = self.client.post(url, {"file": SimpleUploadedFile("b.ndjson", b'{"title": "A"}\n')})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"][0]["line"], 1)
+
+        response = self.client.post(reverse('create_room'), {
+            "room_name": "uploaded_room",
+            "pseudo": "alice",
+            "mode": "unanimity",
+            "backlog_file": SimpleUploadedFile("b.csv", b"feature\nA\nB\n"),
+        })
+        self.assertEqual(response.status_code, 302)
+        room = PokerRoom.objects.get(name="uploaded_room")
+        self.assertEqual(room.backlog(), [{"feature": "A"}, {"feature": "B"}])
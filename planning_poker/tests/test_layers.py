@@ -0,0 +1,138 @@
+import asyncio
+from unittest import mock
+from asgiref.sync import sync_to_async
+from channels.layers import InMemoryChannelLayer
+from channels.sessions import SessionMiddlewareStack
+from channels.testing import WebsocketCommunicator
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import SimpleTestCase, TestCase, override_settings
+from planningpoker.asgi import application
+from planning_poker.models import PokerRoom
+from planning_poker.room_state import clear_room_states
+from planning_poker.layers import HybridChannelLayer
+from planning_poker.metrics import LAYER_GROUP_SENDS
+
+
+class HybridChannelLayerTestCase(SimpleTestCase):
+    """
+    Test pour le channel layer hybride ; deux instances partageant un layer en mémoire
+    jouent le rôle de deux processus reliés par Redis.
+
+    @param SimpleTestCase: Classe de test Django.
+    """
+    def setUp(self):
+        """
+        Initialisation du test : deux « processus » et leur layer partagé.
+
+        @param self: Instance de la classe.
+        """
+        self.shared = InMemoryChannelLayer()
+        self.first = HybridChannelLayer(inner=self.shared)
+        self.second = HybridChannelLayer(inner=self.shared)
+
+    async def asyncTearDown(self):
+        await self.first.flush()
+        await self.second.flush()
+
+    async def receive(self, layer, channel):
+        return await asyncio.wait_for(layer.receive(channel), timeout=1)
+
+    async def test_single_process_stays_in_memory(self):
+        """
+        Test qu'un groupe dont tous les membres sont dans le processus n'utilise pas le layer partagé.
+
+        @param self: Instance de la classe.
+        """
+        channels = [await self.first.new_channel() for _ in range(3)]
+        for channel in channels:
+            await self.first.group_add("room", channel)
+        local_before = LAYER_GROUP_SENDS.samples().get(("local",), 0)
+
+        with mock.patch.object(self.shared, 'group_send', wraps=self.shared.group_send) as shared_send:
+            for _ in range(5):
+                await self.first.group_send("room", {"type": "room.update", "seq": 1})
+            for channel in channels:
+                self.assertEqual((await self.receive(self.first, channel))["seq"], 1)
+        self.assertEqual(shared_send.call_count, 0)
+        self.assertEqual(LAYER_GROUP_SENDS.samples()[("local",)] - local_before, 5)
+
+    async def test_cross_process_delivery(self):
+        """
+        Test de la livraison aux membres des deux processus, une seule fois chacun,
+        et de l'arrêt du relais quand l'autre processus quitte le groupe.
+
+        @param self: Instance de la classe.
+        """
+        alice = await self.first.new_channel()
+        bob = await self.second.new_channel()
+        await self.first.group_add("room", alice)
+        await self.second.group_add("room", bob)
+
+        await self.second.group_send("room", {"type": "room.update", "seq": 1})
+        self.assertEqual((await self.receive(self.first, alice))["seq"], 1)
+        self.assertEqual((await self.receive(self.second, bob))["seq"], 1)
+        await self.first.group_send("room", {"type": "room.update", "seq": 2})
+        self.assertEqual((await self.receive(self.second, bob))["seq"], 2)
+        self.assertEqual((await self.receive(self.first, alice))["seq"], 2)
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(self.second.receive(bob), timeout=0.05)
+
+        await self.first.send(bob, {"type": "direct"})
+        self.assertEqual((await self.receive(self.second, bob))["type"], "direct")
+
+        await self.second.group_discard("room", bob)
+        await asyncio.sleep(0.05)
+        self.assertEqual(await self.first._remote_members("room"), set())
+        with mock.patch.object(self.shared, 'group_send', wraps=self.shared.group_send) as shared_send:
+            await self.first.group_send("room", {"type": "room.update", "seq": 3})
+        self.assertEqual(shared_send.call_count, 0)
+
+
+@override_settings(CHANNEL_LAYERS={"default": {
+    "BACKEND": "planning_poker.layers.HybridChannelLayer",
+    "CONFIG": {"inner_backend": "channels.layers.InMemoryChannelLayer"},
+}})
+class HybridConsumerTestCase(TestCase):
+    """
+    Test du consommateur avec le channel layer hybride.
+
+    @param TestCase: Classe de test Django.
+    """
+    def setUp(self):
+        """
+        Initialisation du test.
+
+        @param self: Instance de la classe.
+        """
+        clear_room_states()
+        self.room = PokerRoom.objects.create_with_backlog(
+            name="hybrid_room", creator="alice", backlog=[{"feature": "A"}, {"feature": "B"}],
+        )
+
+    async def connect(self, pseudo):
+        session = await sync_to_async(SessionStore)()
+        session["pseudo"] = pseudo
+        await sync_to_async(session.save)()
+        communicator = WebsocketCommunicator(SessionMiddlewareStack(application), f"/ws/poker/{self.room.name}/")
+        communicator.scope["session"] = session
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def test_vote_reaches_the_other_player(self):
+        """
+        Test qu'un vote est diffusé à l'autre joueur de la room.
+
+        @param self: Instance de la classe.
+        """
+        alice = await self.connect("alice")
+        bob = await self.connect("bob")
+        await alice.send_json_to({"type": "vote", "player": "alice", "vote": "5"})
+        for _ in range(10):
+            changes = (await bob.receive_json_from()).get("changes", {})
+            if changes.get("vote", {}).get("player") == "alice":
+                break
+        else:
+            self.fail("Le vote d'alice n'a pas été diffusé à bob.")
+        await alice.disconnect()
+        await bob.disconnect()
@@ -0,0 +1,99 @@
+from io import StringIO
+from django.core.management import call_command
+from django.test import TestCase
+from planning_poker.management.commands.loadtest import percentile
+from planning_poker.models import PokerRoom
+
+
+class LoadTestCommandTestCase(TestCase):
+    """
+    Test pour la commande loadtest.
+
+    @param TestCase: Classe de test Django.
+    """
+    def test_percentile(self):
+        """
+        Test du calcul de percentile (rang le plus proche).
+
+        @param self: Instance de la classe.
+        """
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 99), 99)
+        self.assertEqual(percentile([3.0], 95), 3.0)
+        self.assertIsNone(percentile([], 50))
+
+    def test_small_run(self):
+        """
+        Test d'une simulation réduite : rapport complet et rooms supprimées.
+
+        @param self: Instance de la classe.
+        """
+        out = StringIO()
+        call_command('loadtest', rooms=2, players=2, features=2, stdout=out)
+        report = out.getvalue()
+
+        for kind in ('connect', 'vote', 'reveal', 'start_feature'):
+            self.assertIn(kind, report)
+        self.assertIn('Requêtes SQL', report)
+        self.assertFalse(PokerRoom.objects.filter(name__startswith='loadtest-').exists())
+
+
+class SQLiteBenchCommandTestCase(TestCase):
+    """
+    Test pour la commande sqlitebench.
+
+    @param TestCase: Classe de test Django.
+    """
+    def test_reports_both_profiles(self):
+        """
+        Test d'une comparaison réduite : une ligne par profil, aucun verrou en profil réglé.
+
+        @param self: Instance de la classe.
+        """
+        out = StringIO()
+        call_command('sqlitebench', writers=4, readers=1, duration=0.3, stdout=out)
+        lines = out.getvalue().splitlines()
+
+        tuned = next(line for line in lines if line.startswith('tuned'))
+        self.assertTrue(any(line.startswith('default') for line in lines))
+        self.assertEqual(tuned.split()[3], '0')
+
+
+class SchemaBenchCommandTestCase(TestCase):
+    """
+    Test pour la commande schemabench.
+
+    @param TestCase: Classe de test Django.
+    """
+    def test_reports_every_measure(self):
+        """
+        Test d'un benchmark réduit : une ligne par mesure.
+
+        @param self: Instance de la classe.
+        """
+        out = StringIO()
+        call_command('schemabench', items=100, repeat=2, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(any(line.startswith('validateur du schéma') for line in lines))
+        self.assertTrue(any(line.startswith('document en cache') for line in lines))
+
+
+class LayerBenchCommandTestCase(TestCase):
+    """
+    Test pour la commande layerbench.
+
+    @param TestCase: Classe de test Django.
+    """
+    def test_reports_each_group_size(self):
+        """
+        Test d'un benchmark réduit : une ligne par taille de groupe, et un Redis
+        injoignable signalé sans interrompre la commande.
+
+        @param self: Instance de la classe.
+        """
+        out = StringIO()
+        call_command('layerbench', layers='memory,redis', members='2,5', rounds=3, hosts='localhost:1', stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([line.split()[:2] for line in lines if line.startswith('memory')], [['memory', '2'], ['memory', '5']])
+        self.assertIn('indisponible', [line for line in lines if line.startswith('redis')][0])
@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+from django.test import TestCase, override_settings
+from planning_poker.metrics import Registry, Counter, Gauge, Histogram, DB_QUERIES, track_handler
+from planning_poker.models import PokerRoom
+
+
+class MetricsTestCase(TestCase):
+    """
+    Test pour le registre de métriques et l'endpoint /metrics.
+
+    @param TestCase: Classe de test Django.
+    """
+    def setUp(self):
+        """
+        Initialisation du test.
+
+        @param self: Instance de la classe.
+        """
+        self.registry = Registry()
+        self.counter = Counter('test_total', "Compteur.", ['type'], registry=self.registry)
+        self.gauge = Gauge('test_gauge', "Jauge.", registry=self.registry)
+        self.histogram = Histogram('test_seconds', "Latence.", buckets=(0.1, 1.0), registry=self.registry)
+
+    def test_render_text_format(self):
+        """
+        Test du format d'exposition texte.
+
+        @param self: Instance de la classe.
+        """
+        self.counter.inc("vote")
+        self.counter.inc("vote", amount=2)
+        self.gauge.set(4)
+        self.histogram.observe(0.05)
+        self.histogram.observe(0.5)
+        self.histogram.observe(3)
+
+        output = self.registry.render()
+        self.assertIn('# TYPE test_total counter', output)
+        self.assertIn('test_total{type="vote"} 3', output)
+        self.assertIn('test_gauge 4', output)
+        self.assertIn('test_seconds_bucket{le="0.1"} 1', output)
+        self.assertIn('test_seconds_bucket{le="1.0"} 2', output)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 3', output)
+        self.assertIn('test_seconds_count 3', output)
+
+    def test_aggregates_other_processes(self):
+        """
+        Test de l'agrégation des instantanés écrits par d'autres processus.
+
+        @param self: Instance de la classe.
+        """
+        self.counter.inc("vote")
+        self.gauge.set(1)
+        self.histogram.observe(0.05)
+        with tempfile.TemporaryDirectory() as directory, override_settings(POKER_METRICS_DIR=directory):
+            other = {
+                'test_total': [[["vote"], 5]],
+                'test_gauge': [[[], 10]],
+                'test_seconds': [[[], [1, 0, 0, 0.01]]],
+            }
+            # processus vivant (le parent) et processus terminé (pid inexistant)
+            for pid in (os.getppid(), 4194304):
+                with open(os.path.join(directory, f"{pid}.json"), "w") as handle:
+                    json.dump(other, handle)
+
+            output = self.registry.render()
+
+        self.assertIn('test_total{type="vote"} 11', output)
+        self.assertIn('test_gauge 11', output)
+        self.assertIn('test_seconds_count 3', output)
+
+    def test_queries_are_counted_per_handler(self):
+        """
+        Test de l'attribution des requêtes SQL au handler courant.
+
+        @param self: Instance de la classe.
+        """
+        before = DB_QUERIES.samples().get(("test_handler",), 0)
+        with track_handler("test_handler"):
+            PokerRoom.objects.filter(name="inconnue").exists()
+            PokerRoom.objects.count()
+        self.assertEqual(DB_QUERIES.samples()[("test_handler",)] - before, 2)
+
+    def test_metrics_endpoint(self):
+        """
+        Test de l'endpoint /metrics.
+
+        @param self: Instance de la classe.
+        """
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertIn(b'poker_ws_connections', response.content)
+        self.assertIn(b'poker_vote_broadcast_latency_seconds', response.content)
@@ -1,5 +1,6 @@
+from django.db import IntegrityError, transaction
 from django.test import TestCase
-from planning_poker.models import PokerRoom
+from planning_poker.models import PokerRoom, Feature, Player
 
 class PokerRoomModelTest(TestCase):
     """
@@ -16,7 +17,39 @@ class PokerRoomModelTest(TestCase):
         room = PokerRoom.objects.create(
             name="TestRoom",
             creator="TestCreator",
-            backlog="[]",
         )
         self.assertEqual(room.name, "TestRoom")
         self.assertEqual(room.creator, "TestCreator")
+
+    def test_create_room_with_backlog(self):
+        """
+        Test de création d'une salle avec son backlog normalisé.
+
+        @param self: Instance de la classe.
+        """
+        room = PokerRoom.objects.create_with_backlog(
+            name="BacklogRoom",
+            creator="TestCreator",
+            backlog=[{"feature": "B", "description": "détail"}, {"feature": "C"}],
+            all_features=[{"feature": "A", "priority": 3}],
+        )
+        self.assertEqual(
+            list(room.features.values_list("ordinal", "status", "title")),
+            [(0, Feature.ESTIMATED, "A"), (1, Feature.PENDING, "B"), (2, Feature.PENDING, "C")],
+        )
+        self.assertEqual(room.backlog(), [{"feature": "B", "description": "détail"}, {"feature": "C"}])
+        self.assertEqual(room.all_features(), [{"feature": "A", "priority": "3"}])
+
+    def test_player_name_is_unique_per_room(self):
+        """
+        Test de l'unicité d'un pseudo dans une room.
+
+        @param self: Instance de la classe.
+        """
+        room = PokerRoom.objects.create(name="UniqueRoom", creator="TestCreator")
+        other = PokerRoom.objects.create(name="OtherRoom", creator="TestCreator")
+        Player.objects.create(room=room, name="alice")
+        Player.objects.create(room=other, name="alice")
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Player.objects.create(room=room, name="alice")
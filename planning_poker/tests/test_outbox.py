@@ -0,0 +1,194 @@
+import asyncio
+import json
+import socket
+from unittest import mock
+import websockets
+from asgiref.sync import sync_to_async
+from channels.sessions import SessionMiddlewareStack
+from channels.testing import WebsocketCommunicator
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import SimpleTestCase, TestCase
+from planningpoker.asgi import application
+from planning_poker.consumers import PokerConsumer
+from planning_poker.metrics import OUTBOX_DEPTH, SLOW_DISCONNECTS
+from planning_poker.models import PokerRoom
+from planning_poker.outbox import SLOW_CLOSE_CODE, Outbox
+from planning_poker.room_state import clear_room_states
+from planning_poker.tests.live import RunAsgiTestCase
+
+
+def update(seq, **changes):
+    return {"type": "room_update", "seq": seq, "changes": changes}
+
+
+class OutboxTestCase(SimpleTestCase):
+    """
+    Test pour la file d'envoi d'une connexion.
+
+    @param SimpleTestCase: Classe de test Django.
+    """
+    def setUp(self):
+        """
+        Initialisation du test : un client qui ne lit rien tant que `gate` est fermé.
+
+        @param self: Instance de la classe.
+        """
+        self.gate = asyncio.Event()
+        self.sent = []
+
+    async def send(self, message):
+        await self.gate.wait()
+        self.sent.append(message)
+
+    async def test_superseded_states_are_coalesced(self):
+        """
+        Test que seul le dernier état en attente est gardé, sans fusion au travers d'une révélation.
+
+        @param self: Instance de la classe.
+        """
+        outbox = Outbox(self.send)
+        outbox.put(update(1, vote={"player": "a", "vote": "5"}, not_voted=["b", "c"], all_voted=False))
+        outbox.put(update(2, vote={"player": "b", "vote": "3"}, not_voted=["c"], all_voted=False))
+        outbox.put(update(3, reveal={"votes": []}, not_voted=["a", "b", "c"], feature=None))
+        outbox.put(update(4, not_voted=["a", "b"]))
+        outbox.put(update(5, not_voted=["a"]))
+        self.assertEqual(len(outbox), 4)
+
+        self.gate.set()
+        while len(outbox):
+            await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        self.assertEqual([message["seq"] for message in self.sent], [1, 2, 3, 5])
+        self.assertEqual(self.sent[0]["changes"], {"vote": {"player": "a", "vote": "5"}})
+        self.assertEqual(self.sent[2]["changes"]["not_voted"], ["a", "b", "c"])
+        self.assertEqual(outbox.position, 5)
+
+    async def test_limit(self):
+        """
+        Test du dépassement de la taille maximale, et de l'abandon des messages à la fermeture.
+
+        @param self: Instance de la classe.
+        """
+        depth = OUTBOX_DEPTH.samples().get((), 0)
+        outbox = Outbox(self.send, limit=2)
+        self.assertTrue(outbox.put(update(1, vote={"player": "a", "vote": "1"})))
+        await asyncio.sleep(0)
+        self.assertTrue(outbox.put(update(2, vote={"player": "b", "vote": "2"})))
+        self.assertTrue(outbox.put(update(3, vote={"player": "c", "vote": "3"})))
+        self.assertFalse(outbox.put(update(4, redirect="/export/")))
+        outbox.close()
+        self.assertEqual(OUTBOX_DEPTH.samples()[()], depth)
+        self.assertTrue(outbox.put(update(5, vote={"player": "d", "vote": "5"})))
+        self.assertEqual(len(outbox), 0)
+
+
+class SlowConsumerTestCase(TestCase):
+    """
+    Test de la déconnexion d'un joueur qui ne lit plus ses messages.
+
+    @param TestCase: Classe de test Django.
+    """
+    def setUp(self):
+        """
+        Initialisation du test.
+
+        @param self: Instance de la classe.
+        """
+        clear_room_states()
+        self.room = PokerRoom.objects.create_with_backlog(
+            name="outbox_room", creator="alice", backlog=[{"feature": "A"}],
+        )
+
+    async def connect(self, pseudo):
+        session = await sync_to_async(SessionStore)()
+        session["pseudo"] = pseudo
+        await sync_to_async(session.save)()
+        communicator = WebsocketCommunicator(SessionMiddlewareStack(application), f"/ws/poker/{self.room.name}/")
+        communicator.scope["session"] = session
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        return communicator
+
+    async def test_slow_player_is_disconnected(self):
+        """
+        Test qu'un joueur dont la file déborde est déconnecté avec le code de reprise,
+        sans gêner les autres.
+
+        @param self: Instance de la classe.
+        """
+        write_message = PokerConsumer.write_message
+
+        async def stalled(consumer, message):
+            if consumer.pseudo == "alice":
+                await asyncio.Event().wait()
+            await write_message(consumer, message)
+
+        disconnects = SLOW_DISCONNECTS.samples().get((), 0)
+        with mock.patch('planning_poker.consumers.OUTBOX_LIMIT', 2), \
+                mock.patch.object(PokerConsumer, 'write_message', stalled):
+            alice = await self.connect("alice")
+            bob = await self.connect("bob")
+            for vote in ("1", "2", "3", "5"):
+                await bob.send_json_to({"type": "vote", "player": "bob", "vote": vote})
+
+            output = await alice.receive_output(timeout=1)
+            self.assertEqual(output["type"], "websocket.close")
+            self.assertEqual(output["code"], SLOW_CLOSE_CODE)
+            self.assertEqual(SLOW_DISCONNECTS.samples()[()] - disconnects, 1)
+
+            votes = []
+            while len(votes) < 4:
+                vote = (await bob.receive_json_from()).get("changes", {}).get("vote")
+                if vote:
+                    votes.append(vote["vote"])
+            self.assertEqual(votes, ["1", "2", "3", "5"])
+            await bob.disconnect()
+
+
+class DaphneBackpressureTestCase(RunAsgiTestCase):
+    """
+    Test de la contre-pression sur un vrai serveur (runasgi, Daphne) : un client qui ne lit
+    plus remplit les tampons TCP puis celui de Twisted, et sa file d'envoi déborde.
+
+    @param RunAsgiTestCase: Serveur runasgi lancé dans un sous-processus.
+    """
+    rooms = ("slow_room",)
+    environ = {"POKER_OUTBOX_LIMIT": "8", "POKER_WS_SEND_BUFFER": "4096"}
+
+    async def test_reader_that_stalls_is_closed(self):
+        """
+        Test qu'un client qui ne lit plus est fermé avec SLOW_CLOSE_CODE et sa position de
+        reprise, pendant que l'autre joueur continue de recevoir ses mises à jour.
+
+        @param self: Instance de la classe.
+        """
+        await sync_to_async(self.start_server)()
+        slow_disconnects = sync_to_async(self.metric)
+        stalled_socket = socket.socket()
+        stalled_socket.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        stalled_socket.connect(("127.0.0.1", self.port))
+        # max_queue=1 : le client cesse de lire le socket dès qu'un message attend
+        stalled = await websockets.connect(
+            self.uri("slow_room"), sock=stalled_socket, max_queue=1, additional_headers=self.cookie("alice"),
+        )
+        async with websockets.connect(self.uri("slow_room"), additional_headers=self.cookie("bob")) as bob:
+            sent = 0
+            while await slow_disconnects("poker_ws_slow_disconnects_total") == 0:
+                self.assertLess(sent, 5000, "le client bloqué n'a jamais été déconnecté")
+                for _ in range(50):
+                    await bob.send(json.dumps({"type": "vote", "vote": "1" if sent % 2 else "2"}))
+                    sent += 1
+                # bob lit tout ce qu'il reçoit : lui n'est jamais jugé lent
+                while True:
+                    try:
+                        await asyncio.wait_for(bob.recv(), timeout=0.05)
+                    except asyncio.TimeoutError:
+                        break
+            await bob.send(json.dumps({"type": "heartbeat"}))
+
+        with self.assertRaises(websockets.ConnectionClosed):
+            while True:
+                await asyncio.wait_for(stalled.recv(), timeout=10)
+        self.assertEqual(stalled.close_code, SLOW_CLOSE_CODE)
+        self.assertTrue(stalled.close_reason.startswith("resume="))
+        self.assertEqual(await slow_disconnects("poker_ws_slow_disconnects_total"), 1)
@@ -0,0 +1,87 @@
+from django.core.cache import caches
+from django.test import TestCase, signals
+from django.urls import reverse
+from asgiref.sync import sync_to_async
+from planning_poker.models import PokerRoom
+from planning_poker.rounds import persist_round
+from planning_poker.room_cache import clear_room_cache
+
+
+class PageCacheTestCase(TestCase):
+    """
+    Test pour le cache des pages HTML.
+
+    @param TestCase: Classe de test Django.
+    """
+    def setUp(self):
+        """
+        Initialisation du test : compte des rendus de template.
+
+        @param self: Instance de la classe.
+        """
+        caches['default'].clear()
+        clear_room_cache()
+        self.room = PokerRoom.objects.create_with_backlog(
+            name="page_room",
+            creator="alice",
+            backlog=[{"feature": "A"}, {"feature": "B"}],
+        )
+        self.rendered = []
+        signals.template_rendered.connect(self.on_render)
+        self.addCleanup(signals.template_rendered.disconnect, self.on_render)
+
+    def on_render(self, sender, template, **kwargs):
+        self.rendered.append(template.name)
+
+    def test_home_is_rendered_once(self):
+        """
+        Test que la page d'accueil n'est rendue qu'une fois.
+
+        @param self: Instance de la classe.
+        """
+        self.client.get(reverse('home'))
+        self.client.get(reverse('home'))
+        self.assertEqual(self.rendered.count('home.html'), 1)
+
+    async def test_backlog_pages_follow_room_version(self):
+        """
+        Test que les pages de backlog sont servies du cache, validées par ETag, et
+        rendues de nouveau quand la version de la room change.
+
+        @param self: Instance de la classe.
+        """
+        url = reverse('export_backlog', args=["page_room"])
+        first = await self.async_client.get(url)
+        second = await self.async_client.get(url)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(self.rendered.count('export_backlog.html'), 1)
+        self.assertIn("Last-Modified", first.headers)
+
+        not_modified = await self.async_client.get(url, headers={"if-none-match": first.headers["ETag"]})
+        self.assertEqual(not_modified.status_code, 304)
+
+        feature = await self.room.features.aget(title="A")
+        await sync_to_async(persist_round)(self.room.pk, feature.pk, "5", "page_room")
+        changed = await self.async_client.get(url, headers={"if-none-match": first.headers["ETag"]})
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed.headers["ETag"], first.headers["ETag"])
+        self.assertEqual(self.rendered.count('export_backlog.html'), 2)
+
+    def test_room_page_depends_on_pseudo(self):
+        """
+        Test que la page de room, propre à chaque joueur, est mise en cache par pseudo.
+
+        @param self: Instance de la classe.
+        """
+        url = reverse('room', args=["page_room"])
+        self.client.post(reverse('join_room', args=["page_room"]), {"pseudo": "bob"})
+        bob = self.client.get(url)
+        self.client.get(url)
+        self.assertContains(bob, "Bienvenue, bob")
+        self.assertEqual(bob.headers["Cache-Control"], "private, no-cache")
+        self.assertEqual(self.rendered.count('room.html'), 1)
+
+        self.client.post(reverse('join_room', args=["page_room"]), {"pseudo": "carol"})
+        carol = self.client.get(url, headers={"if-none-match": bob.headers["ETag"]})
+        self.assertContains(carol, "Bienvenue, carol")
+        self.assertEqual(self.rendered.count('room.html'), 2)
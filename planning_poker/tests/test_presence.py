@@ -0,0 +1,201 @@
+from types import SimpleNamespace
+from unittest import mock
+from channels.testing import WebsocketCommunicator
+from channels.sessions import SessionMiddlewareStack
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import SimpleTestCase, TestCase
+from asgiref.sync import sync_to_async
+from planningpoker.asgi import application
+from planning_poker.models import PokerRoom, Player
+from planning_poker.presence import Presence
+from planning_poker.room_state import RoomState, clear_room_states, get_room_state
+
+
+class PresenceTestCase(SimpleTestCase):
+    """
+    Test pour l'ensemble des joueurs présents d'une room.
+
+    @param SimpleTestCase: Classe de test Django sans base de données.
+    """
+    def setUp(self):
+        """
+        Initialisation du test : horloge contrôlée.
+
+        @param self: Instance de la classe.
+        """
+        self.now = 1000.0
+        patcher = mock.patch('planning_poker.presence.time', SimpleNamespace(monotonic=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.presence = Presence(ttl=30, grace=5)
+
+    def test_heartbeat_extends_presence(self):
+        """
+        Test qu'un heartbeat repousse l'échéance du joueur.
+
+        @param self: Instance de la classe.
+        """
+        self.presence.touch("alice")
+        self.presence.touch("bob")
+        self.now += 20
+        self.presence.touch("alice")
+        self.now += 15
+        self.assertEqual(self.presence.expired(), ["bob"])
+        self.assertIn("alice", self.presence)
+        self.assertNotIn("bob", self.presence)
+
+    def test_grace_after_last_socket_closes(self):
+        """
+        Test du délai de grâce : seul la fermeture du dernier websocket le déclenche.
+
+        @param self: Instance de la classe.
+        """
+        self.presence.connect("alice")
+        self.presence.connect("alice")
+        self.presence.disconnect("alice")
+        self.now += 10
+        self.assertEqual(self.presence.expired(), [])
+
+        self.presence.disconnect("alice")
+        self.now += 6
+        self.assertEqual(self.presence.expired(), ["alice"])
+
+    def test_sweep_is_batched(self):
+        """
+        Test que le balayage examine au plus `batch` entrées.
+
+        @param self: Instance de la classe.
+        """
+        for index in range(10):
+            self.presence.touch(f"joueur-{index}")
+        self.now += 31
+        self.assertEqual(len(self.presence.expired(batch=4)), 4)
+        self.assertEqual(len(self.presence.expired(batch=4)), 4)
+        self.assertEqual(len(self.presence.expired()), 2)
+        self.assertEqual(len(self.presence), 0)
+
+
+class RoomPresenceTestCase(TestCase):
+    """
+    Test du retrait des joueurs absents dans l'état d'une room.
+
+    @param TestCase: Classe de test Django.
+    """
+    def setUp(self):
+        """
+        Initialisation du test.
+
+        @param self: Instance de la classe.
+        """
+        clear_room_states()
+        self.room = PokerRoom.objects.create_with_backlog(
+            name="presence_room",
+            creator="alice",
+            backlog=[{"feature": "A"}]
+        )
+        Player.objects.create(room=self.room, name="alice", vote=None)
+        Player.objects.create(room=self.room, name="bob", vote=None)
+        self.now = 1000.0
+        patcher = mock.patch('planning_poker.presence.time', SimpleNamespace(monotonic=lambda: self.now))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_departed_player_stops_blocking_round(self):
+        """
+        Test qu'un joueur parti sort des votes attendus, et de la base seulement s'il s'était
+        connecté à ce processus.
+
+        @param self: Instance de la classe.
+        """
+        state = await sync_to_async(RoomState.load)("presence_room")
+        state.join("alice")
+        state.join("carol")
+        state.record_vote("alice", 5)
+        state.detach("carol")
+        self.assertFalse(state.all_voted)
+
+        # bob ne s'est jamais connecté à ce processus, carol est partie, alice envoie ses heartbeats
+        self.now += state.presence.ttl - 1
+        state.heartbeat("alice")
+        self.now += 2
+        self.assertEqual(sorted(state.sweep()), ["bob", "carol"])
+        self.assertTrue(state.all_voted)
+        self.assertEqual(state.not_voted(), [])
+
+        await state.flush()
+        names = await sync_to_async(list)(
+            Player.objects.filter(room=self.room).order_by('name').values_list('name', flat=True)
+        )
+        self.assertEqual(names, ["alice", "bob"])
+
+    def test_heartbeat_brings_player_back(self):
+        """
+        Test qu'un heartbeat d'un joueur retiré le remet dans la room, sans vote.
+
+        @param self: Instance de la classe.
+        """
+        state = RoomState.load("presence_room")
+        self.now += state.presence.ttl + 1
+        self.assertEqual(sorted(state.sweep()), ["alice", "bob"])
+
+        self.assertTrue(state.heartbeat("bob"))
+        self.assertFalse(state.heartbeat("bob"))
+        self.assertEqual(state.not_voted(), ["bob"])
+
+    async def test_consumer_accepts_heartbeat(self):
+        """
+        Test qu'un heartbeat ne provoque ni erreur ni diffusion.
+
+        @param self: Instance de la classe.
+        """
+        session = await sync_to_async(SessionStore)()
+        session["pseudo"] = "alice"
+        await sync_to_async(session.save)()
+
+        communicator = WebsocketCommunicator(SessionMiddlewareStack(application), f"/ws/poker/{self.room.name}/")
+        communicator.scope["session"] = session
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()  # room_update de l'arrivée
+        await communicator.receive_json_from()  # snapshot
+
+        await communicator.send_json_to({"type": "heartbeat"})
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+
+    async def test_returning_player_gets_snapshot(self):
+        """
+        Test qu'un joueur retiré puis revenu par un heartbeat reçoit un instantané sans son
+        ancien vote.
+
+        @param self: Instance de la classe.
+        """
+        session = await sync_to_async(SessionStore)()
+        session["pseudo"] = "alice"
+        await sync_to_async(session.save)()
+
+        communicator = WebsocketCommunicator(SessionMiddlewareStack(application), f"/ws/poker/{self.room.name}/")
+        communicator.scope["session"] = session
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()  # room_update de l'arrivée
+        await communicator.receive_json_from()  # snapshot
+        await communicator.send_json_to({"type": "vote", "vote": 5})
+        await communicator.receive_json_from()
+
+        state = await get_room_state(self.room.name)
+        self.now += state.presence.ttl + 1
+        self.assertEqual(sorted(state.sweep()), ["alice", "bob"])
+
+        await communicator.send_json_to({"type": "heartbeat"})
+        # l'instantané, envoyé directement, peut précéder la diffusion au groupe
+        received = {}
+        for _ in range(2):
+            message = await communicator.receive_json_from()
+            received[message["type"]] = message
+        update, snapshot = received["room_update"], received["snapshot"]
+        self.assertEqual(update["changes"]["not_voted"], ["alice"])
+        self.assertIsNone(snapshot["vote"])
+        self.assertEqual(snapshot["not_voted"], ["alice"])
+        self.assertEqual(snapshot["seq"], update["seq"])
+        await communicator.disconnect()
@@ -0,0 +1,142 @@
+import zlib
+import msgpack
+from channels.testing import WebsocketCommunicator
+from django.test import TestCase
+from planningpoker.asgi import application
+from planning_poker.models import PokerRoom, Player
+from planning_poker.protocol import (
+    MsgpackCodec, JsonCodec, negotiate, FLAG_RAW, FLAG_DEFLATE, MAX_DECODED_SIZE, MSGPACK_SUBPROTOCOL
+)
+from planning_poker.room_state import clear_room_states
+from channels.sessions import SessionMiddlewareStack
+from django.contrib.sessions.backends.db import SessionStore
+from asgiref.sync import sync_to_async
+
+
+class ProtocolTestCase(TestCase):
+    """
+    Test pour le protocole websocket binaire MessagePack.
+
+    @param TestCase: Classe de test Django.
+    """
+    def setUp(self):
+        """
+        Initialisation du test.
+
+        @param self: Instance de la classe.
+        """
+        clear_room_states()
+        self.room = PokerRoom.objects.create_with_backlog(
+            name="msgpack_room",
+            creator="alice",
+            backlog=[{"feature": "A"}]
+        )
+        Player.objects.create(room=self.room, name="alice", vote=None)
+
+    def test_msgpack_round_trip_and_compression(self):
+        """
+        Test d'encodage/décodage, avec compression au-delà du seuil, et refus d'une trame
+        qui dépasse MAX_DECODED_SIZE une fois décompressée.
+
+        @param self: Instance de la classe.
+        """
+        codec = MsgpackCodec(compression_threshold=100)
+        small = {"type": "room_update", "version": 1, "changes": {"not_voted": ["alice"]}}
+        big = {"type": "room_update", "version": 2, "changes": {"not_voted": [f"player_{i}" for i in range(100)]}}
+
+        text_data, bytes_data = codec.encode(small)
+        self.assertIsNone(text_data)
+        self.assertEqual(bytes_data[0], FLAG_RAW)
+        self.assertEqual(codec.decode(bytes_data=bytes_data), small)
+
+        _, bytes_data = codec.encode(big)
+        self.assertEqual(bytes_data[0], FLAG_DEFLATE)
+        self.assertLess(len(bytes_data), len(JsonCodec().encode(big)[0]) / 2)
+        self.assertEqual(codec.decode(bytes_data=bytes_data), big)
+
+        bomb = bytes([FLAG_DEFLATE]) + zlib.compress(b"\0" * (MAX_DECODED_SIZE * 16))
+        with self.assertRaises(ValueError):
+            codec.decode(bytes_data=bomb)
+
+    def test_negotiation_falls_back_to_json(self):
+        """
+        Test du choix du protocole selon les sous-protocoles proposés.
+
+        @param self: Instance de la classe.
+        """
+        self.assertIsInstance(negotiate(["poker.msgpack", "poker.json"]), MsgpackCodec)
+        self.assertEqual(negotiate(["poker.json"]).subprotocol, "poker.json")
+        self.assertIsNone(negotiate([]).subprotocol)
+        self.assertIsNone(negotiate(["autre"]).subprotocol)
+
+    async def test_consumer_speaks_msgpack(self):
+        """
+        Test d'un échange complet avec le consommateur en MessagePack.
+
+        @param self: Instance de la classe.
+        """
+        session = await sync_to_async(SessionStore)()
+        session["pseudo"] = "alice"
+        await sync_to_async(session.save)()
+
+        communicator = WebsocketCommunicator(
+            SessionMiddlewareStack(application),
+            f"/ws/poker/{self.room.name}/",
+            subprotocols=[MSGPACK_SUBPROTOCOL, "poker.json"],
+        )
+        communicator.scope["session"] = session
+        connected, subprotocol = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, MSGPACK_SUBPROTOCOL)
+
+        codec = MsgpackCodec()
+        snapshot = codec.decode(bytes_data=await communicator.receive_from())
+        self.assertEqual(snapshot["type"], "snapshot")
+        self.assertEqual(snapshot["feature"], {"feature": "A"})
+        self.assertEqual(codec.decode(bytes_data=await communicator.receive_from())["changes"]["not_voted"], ["alice"])
+
+        await communicator.send_to(bytes_data=codec.encode({"type": "vote", "player": "alice", "vote": 5})[1])
+        update = codec.decode(bytes_data=await communicator.receive_from())
+        self.assertEqual(update["type"], "room_update")
+        self.assertEqual(update["changes"]["vote"], {"player": "alice", "vote": "5"})
+        self.assertTrue(update["changes"]["all_voted"])
+
+        await communicator.disconnect()
+
+    async def test_consumer_rejects_invalid_frames(self):
+        """
+        Test qu'une trame trop volumineuse une fois décompressée, ou qui n'est pas un
+        dictionnaire, reçoit une erreur sans fermer la connexion.
+
+        @param self: Instance de la classe.
+        """
+        session = await sync_to_async(SessionStore)()
+        session["pseudo"] = "alice"
+        await sync_to_async(session.save)()
+
+        communicator = WebsocketCommunicator(
+            SessionMiddlewareStack(application), f"/ws/poker/{self.room.name}/", subprotocols=[MSGPACK_SUBPROTOCOL],
+        )
+        communicator.scope["session"] = session
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        codec = MsgpackCodec()
+        await communicator.receive_from()  # snapshot
+        await communicator.receive_from()  # arrivée
+
+        frames = [
+            bytes([FLAG_DEFLATE]) + zlib.compress(b"\0" * (MAX_DECODED_SIZE * 16)),
+            bytes([FLAG_RAW]) + msgpack.packb([1, 2, 3]),
+            bytes([FLAG_RAW]) + b"\xc1",
+        ]
+        for frame in frames:
+            await communicator.send_to(bytes_data=frame)
+            error = codec.decode(bytes_data=await communicator.receive_from())
+            self.assertEqual(error, {"type": "error", "message": "Message illisible"})
+        await communicator.send_to(text_data='"vote"')
+        self.assertEqual(codec.decode(bytes_data=await communicator.receive_from())["type"], "error")
+
+        await communicator.send_to(bytes_data=codec.encode({"type": "vote", "vote": 5})[1])
+        update = codec.decode(bytes_data=await communicator.receive_from())
+        self.assertEqual(update["changes"]["vote"], {"player": "alice", "vote": "5"})
+        await communicator.disconnect()
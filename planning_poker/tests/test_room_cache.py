@@ -0,0 +1,104 @@
+from asgiref.sync import sync_to_async
+from django.test import TestCase, override_settings
+from planning_poker.models import PokerRoom
+from planning_poker.room_cache import get_room_info, clear_room_cache, cache_stats, invalidate_room
+from planning_poker.room_state import RoomState, clear_room_states
+from planning_poker.rounds import complete_round
+from planning_poker.sessions import local_sessions
+
+
+class RoomCacheTestCase(TestCase):
+    """
+    Test pour le cache des métadonnées de room.
+
+    @param TestCase: Classe de test Django.
+    """
+    def setUp(self):
+        """
+        Initialisation du test.
+
+        @param self: Instance de la classe.
+        """
+        clear_room_cache()
+        clear_room_states()
+        self.room = PokerRoom.objects.create_with_backlog(
+            name="cache_room",
+            creator="alice",
+            backlog=[{"feature": "A"}, {"feature": "B"}]
+        )
+
+    def test_read_through(self):
+        """
+        Test d'une seule lecture en base pour des accès répétés.
+
+        @param self: Instance de la classe.
+        """
+        before = cache_stats()
+        with self.assertNumQueries(2):
+            info = get_room_info("cache_room")
+        with self.assertNumQueries(0):
+            self.assertEqual(get_room_info("cache_room"), info)
+
+        self.assertEqual(info.creator, "alice")
+        self.assertEqual([feature["feature"] for feature in info.backlog], ["A", "B"])
+        after = cache_stats()
+        self.assertEqual(after["miss"] - before["miss"], 1)
+        self.assertEqual(after["local_hit"] - before["local_hit"], 1)
+
+    def test_save_invalidates(self):
+        """
+        Test de l'invalidation par PokerRoom.save().
+
+        @param self: Instance de la classe.
+        """
+        get_room_info("cache_room")
+        self.room.mode = "absolute_majority"
+        self.room.save()
+        self.assertEqual(get_room_info("cache_room").mode, "absolute_majority")
+
+    async def test_reveal_invalidates(self):
+        """
+        Test de l'invalidation quand une fonctionnalité est estimée.
+
+        @param self: Instance de la classe.
+        """
+        state = await sync_to_async(RoomState.load)("cache_room")
+        await complete_round(state, "5")
+
+        info = await sync_to_async(get_room_info)("cache_room")
+        self.assertEqual(info.all_features, [{"feature": "A", "priority": "5"}])
+        self.assertEqual([feature["feature"] for feature in info.backlog], ["B"])
+
+    @override_settings(POKER_ROOM_CACHE_ALIAS='default')
+    def test_shared_tier_versioning(self):
+        """
+        Test du cache partagé : lecture sans base depuis un autre processus, puis invalidation par version.
+
+        @param self: Instance de la classe.
+        """
+        before = cache_stats()
+        get_room_info("cache_room")
+        clear_room_cache()  # simule un autre processus
+        with self.assertNumQueries(0):
+            get_room_info("cache_room")
+        self.assertEqual(cache_stats()["shared_hit"] - before["shared_hit"], 1)
+
+        invalidate_room("cache_room")
+        with self.assertNumQueries(2):
+            get_room_info("cache_room")
+
+    def test_room_page_reload_without_database(self):
+        """
+        Test du rechargement de la page de room sans requête SQL.
+
+        @param self: Instance de la classe.
+        """
+        local_sessions.clear()
+        session = self.client.session
+        session["pseudo"] = "alice"
+        session.save()
+
+        self.assertEqual(self.client.get("/poker/cache_room/").status_code, 200)
+        with self.assertNumQueries(0):
+            response = self.client.get("/poker/cache_room/")
+        self.assertContains(response, "cache_room")
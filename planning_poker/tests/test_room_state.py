@@ -0,0 +1,189 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from django.db import OperationalError
+from channels.sessions import SessionMiddlewareStack
+from channels.testing import WebsocketCommunicator
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import TestCase, override_settings
+from asgiref.sync import sync_to_async
+from planningpoker.asgi import application
+from planning_poker.affinity import RoomNotServedHere, worker_for
+from planning_poker.models import PokerRoom, Player
+from planning_poker.room_state import RoomState, get_room_state, clear_room_states
+
+
+class RoomStateTestCase(TestCase):
+    """
+    Test pour le moteur d'état des rooms en mémoire.
+
+    @param TestCase: Classe de test Django.
+    """
+    def setUp(self):
+        """
+        Initialisation du test.
+
+        @param self: Instance de la classe.
+        """
+        clear_room_states()
+        self.room = PokerRoom.objects.create_with_backlog(
+            name="state_room",
+            creator="alice",
+            backlog=[{"feature": "A"}, {"feature": "B"}]
+        )
+        Player.objects.create(room=self.room, name="alice", vote=None)
+
+    async def test_state_is_shared_between_consumers(self):
+        """
+        Test que deux accès à la même room partagent le même état.
+
+        @param self: Instance de la classe.
+        """
+        first = await get_room_state("state_room")
+        second = await get_room_state("state_room")
+        self.assertIs(first, second)
+
+        first.record_vote("alice", "5")
+        self.assertEqual(second.not_voted(), [])
+
+    async def test_room_of_another_worker_is_not_loaded(self):
+        """
+        Test qu'un worker ne charge pas l'état d'une room confiée à un autre worker, et qu'une
+        connexion qui l'y vise est refusée : une room n'a qu'un état autoritaire.
+
+        @param self: Instance de la classe.
+        """
+        other = 1 - worker_for("state_room", 2)
+        with override_settings(POKER_WORKER_COUNT=2, POKER_WORKER_INDEX=other):
+            with self.assertRaises(RoomNotServedHere):
+                await get_room_state("state_room")
+
+            session = await sync_to_async(SessionStore)()
+            session["pseudo"] = "alice"
+            await sync_to_async(session.save)()
+            communicator = WebsocketCommunicator(SessionMiddlewareStack(application), "/ws/poker/state_room/")
+            communicator.scope["session"] = session
+            connected, _ = await communicator.connect()
+            self.assertFalse(connected)
+
+        with override_settings(POKER_WORKER_COUNT=2, POKER_WORKER_INDEX=1 - other):
+            self.assertEqual((await get_room_state("state_room")).name, "state_room")
+
+    def test_vote_does_not_hit_database(self):
+        """
+        Test que l'enregistrement d'un vote ne fait aucune requête avant le flush.
+
+        @param self: Instance de la classe.
+        """
+        state = RoomState.load("state_room")
+        with self.assertNumQueries(0):
+            state.join("bob")
+            state.record_vote("alice", "3")
+            state.not_voted()
+            state.reset_votes()
+
+    async def test_flush_persists_votes(self):
+        """
+        Test de la persistance différée des votes et des nouveaux joueurs.
+
+        @param self: Instance de la classe.
+        """
+        state = await get_room_state("state_room")
+        state.join("bob")
+        state.record_vote("alice", "8")
+        await state.flush()
+
+        votes = await sync_to_async(dict)(Player.objects.filter(room=self.room).values_list("name", "vote"))
+        self.assertEqual(votes, {"alice": 8, "bob": None})
+
+        reloaded = await sync_to_async(RoomState.load)("state_room")
+        self.assertEqual(reloaded.current_feature, {"feature": "A"})
+        self.assertEqual(reloaded.players, {"alice": "8", "bob": None})
+
+    async def test_failed_flush_is_retried(self):
+        """
+        Test qu'un échec de persistance garde les modifications du lot pour le flush suivant.
+
+        @param self: Instance de la classe.
+        """
+        state = await get_room_state("state_room")
+        state.join("bob")
+        state.record_vote("alice", "8")
+        with mock.patch.object(state, '_write', side_effect=OperationalError("database is locked")), \
+                self.assertLogs('planning_poker.room_state', 'ERROR'):
+            await state.flush()
+        self.assertIsNotNone(state._flush_handle)
+
+        state.record_vote("bob", "3")
+        await state.flush()
+        votes = await sync_to_async(dict)(Player.objects.filter(room=self.room).values_list("name", "vote"))
+        self.assertEqual(votes, {"alice": 8, "bob": 3})
+
+    def test_write_is_single_upsert(self):
+        """
+        Test que la persistance des joueurs est un seul INSERT ... ON CONFLICT, sans doublon.
+
+        @param self: Instance de la classe.
+        """
+        state = RoomState.load("state_room")
+        with self.assertNumQueries(1):
+            state._write({"alice": 3, "carol": None})
+        with self.assertNumQueries(1):
+            state._write({"carol": 5})
+
+        votes = dict(Player.objects.filter(room=self.room).values_list("name", "vote"))
+        self.assertEqual(votes, {"alice": 3, "carol": 5})
+
+    def test_concurrent_votes_are_never_lost(self):
+        """
+        Test que des votes concurrents sont tous comptabilisés et qu'un seul voit "tous ont voté".
+
+        @param self: Instance de la classe.
+        """
+        names = [f"player_{i}" for i in range(2000)]
+        state = RoomState(1, "big_room", "alice", "unanimity", [{"feature": "A"}], [],
+                          {name: None for name in names})
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda name: state.record_vote(name, "5"), names))
+
+        self.assertTrue(state.all_voted)
+        self.assertEqual(state.not_voted(), [])
+        self.assertTrue(all(vote == "5" for vote in state.players.values()))
+        self.assertEqual(sum(1 for _, all_voted in results if all_voted), 1)
+
+    def test_vote_cost_does_not_depend_on_room_size(self):
+        """
+        Test qu'un vote reste sous la milliseconde dans une room de 10 000 joueurs.
+
+        @param self: Instance de la classe.
+        """
+        names = [f"player_{i}" for i in range(10000)]
+        state = RoomState(1, "big_room", "alice", "unanimity", [{"feature": "A"}], [],
+                          {name: "3" for name in names})
+        state.reset_votes()
+        for name in names[:-10]:
+            state.record_vote(name, "3")
+
+        start = time.perf_counter()
+        for name in names[-10:]:
+            state.record_vote(name, "3")
+        elapsed = (time.perf_counter() - start) / 10
+
+        self.assertTrue(state.all_voted)
+        self.assertLess(elapsed, 0.001)
+
+    def test_updates_since_uses_bounded_buffer(self):
+        """
+        Test du tampon de reprise : deltas manquants, ou None si le client est trop en retard.
+
+        @param self: Instance de la classe.
+        """
+        state = RoomState.load("state_room")
+        for i in range(state._updates.maxlen + 10):
+            state.publish({"n": i})
+
+        self.assertEqual(state.updates_since(state.epoch, state.seq), [])
+        self.assertEqual(state.updates_since(state.epoch, state.seq - 2), [(state.seq - 1, {"n": state.seq - 2}), (state.seq, {"n": state.seq - 1})])
+        self.assertIsNone(state.updates_since(state.epoch, 5))
+        self.assertIsNone(state.updates_since("autre", state.seq))
@@ -0,0 +1,134 @@
+from unittest import mock
+from channels.sessions import SessionMiddlewareStack
+from channels.testing import WebsocketCommunicator
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import OperationalError
+from django.test import TestCase
+from asgiref.sync import sync_to_async
+from planningpoker.asgi import application
+from planning_poker.models import PokerRoom, Player
+from planning_poker.room_state import RoomState, clear_room_states
+from planning_poker.rounds import complete_round, persist_round
+
+
+class RoundTransitionTestCase(TestCase):
+    """
+    Test pour le service de transition de round.
+
+    @param TestCase: Classe de test Django.
+    """
+    def setUp(self):
+        """
+        Initialisation du test.
+
+        @param self: Instance de la classe.
+        """
+        clear_room_states()
+        self.room = PokerRoom.objects.create_with_backlog(
+            name="round_room",
+            creator="alice",
+            backlog=[{"feature": "A"}, {"feature": "B"}]
+        )
+        Player.objects.bulk_create([
+            Player(room=self.room, name=f"player_{i}", vote=5) for i in range(50)
+        ])
+
+    def test_persist_round_query_count(self):
+        """
+        Test qu'une transition coûte un nombre constant de requêtes, quel que soit le nombre de joueurs.
+
+        @param self: Instance de la classe.
+        """
+        feature = self.room.features.get(title="A")
+
+        # SAVEPOINT + UPDATE feature + UPDATE version de la room + UPDATE joueurs + RELEASE
+        with self.assertNumQueries(5):
+            persist_round(self.room.pk, feature.pk, "5")
+
+        # SAVEPOINT + UPDATE joueurs + RELEASE
+        with self.assertNumQueries(3):
+            persist_round(self.room.pk)
+
+        self.assertFalse(Player.objects.filter(room=self.room, vote__isnull=False).exists())
+
+    async def test_complete_round_advances_and_resets(self):
+        """
+        Test qu'une transition estime la fonctionnalité, avance le backlog et remet les votes à zéro.
+
+        @param self: Instance de la classe.
+        """
+        state = await sync_to_async(RoomState.load)("round_room")
+        result = await complete_round(state, "5")
+
+        self.assertTrue(result.advanced)
+        self.assertEqual(result.next_feature, {"feature": "B"})
+        self.assertEqual(result.all_features, [{"feature": "A", "priority": "5"}])
+        self.assertEqual(len(result.not_voted), 50)
+
+        room = await sync_to_async(PokerRoom.objects.get)(pk=self.room.pk)
+        self.assertEqual(await sync_to_async(room.backlog)(), [{"feature": "B"}])
+        self.assertEqual(await sync_to_async(room.all_features)(), [{"feature": "A", "priority": "5"}])
+        voted = await sync_to_async(Player.objects.filter(room=self.room, vote__isnull=False).count)()
+        self.assertEqual(voted, 0)
+
+    async def test_complete_round_without_priority_keeps_feature(self):
+        """
+        Test qu'un revote conserve la fonctionnalité courante.
+
+        @param self: Instance de la classe.
+        """
+        state = await sync_to_async(RoomState.load)("round_room")
+        result = await complete_round(state)
+
+        self.assertFalse(result.advanced)
+        self.assertEqual(result.next_feature, {"feature": "A"})
+        self.assertEqual(result.all_features, [])
+
+    async def test_failed_persist_leaves_memory_unchanged(self):
+        """
+        Test qu'une transition dont l'écriture échoue ne modifie pas l'état en mémoire.
+
+        @param self: Instance de la classe.
+        """
+        state = await sync_to_async(RoomState.load)("round_room")
+        version = state.version
+        with mock.patch("planning_poker.rounds.persist_round", side_effect=OperationalError("database is locked")):
+            with self.assertRaises(OperationalError):
+                await complete_round(state, "5")
+
+        self.assertEqual(state.current_feature, {"feature": "A"})
+        self.assertEqual(state.all_features, [])
+        self.assertEqual(state.version, version)
+        self.assertTrue(state.all_voted)
+
+        result = await complete_round(state, "5")
+        self.assertEqual(result.next_feature, {"feature": "B"})
+
+    async def test_reveal_reports_failed_persist(self):
+        """
+        Test qu'une révélation dont la transition échoue renvoie une erreur au joueur sans
+        fermer la connexion, et qu'il peut révéler à nouveau.
+
+        @param self: Instance de la classe.
+        """
+        session = await sync_to_async(SessionStore)()
+        session["pseudo"] = "alice"
+        await sync_to_async(session.save)()
+        communicator = WebsocketCommunicator(SessionMiddlewareStack(application), "/ws/poker/round_room/")
+        communicator.scope["session"] = session
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.receive_json_from()  # snapshot
+        await communicator.receive_json_from()  # arrivée
+        await communicator.send_json_to({"type": "vote", "vote": 5})
+        await communicator.receive_json_from()
+
+        with mock.patch("planning_poker.rounds.persist_round", side_effect=OperationalError("database is locked")):
+            await communicator.send_json_to({"type": "reveal"})
+            self.assertEqual((await communicator.receive_json_from())["type"], "error")
+
+        await communicator.send_json_to({"type": "reveal"})
+        update = await communicator.receive_json_from()
+        self.assertEqual(update["changes"]["reveal"]["estimate"], "5")
+        self.assertEqual(update["changes"]["feature"], {"feature": "B"})
+        await communicator.disconnect()
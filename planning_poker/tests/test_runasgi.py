@@ -0,0 +1,184 @@
+import argparse
+import asyncio
+import json
+import os
+import re
+import signal
+import time
+from io import StringIO
+from unittest import mock
+import websockets
+from asgiref.sync import sync_to_async
+from django.test import SimpleTestCase
+from planning_poker.affinity import room_of, worker_for
+from planning_poker.management.commands.runasgi import Supervisor, prepare_request, worker_count
+from planning_poker.tests.live import RunAsgiTestCase
+
+
+class RoutingTestCase(SimpleTestCase):
+    """
+    Test de la répartition des connexions par room.
+
+    @param SimpleTestCase: Classe de test Django.
+    """
+    def test_room_of(self):
+        """
+        Test que websocket et pages d'une room donnent la même room, et les autres chemins aucune.
+
+        @param self: Instance de la classe.
+        """
+        for target in ("/ws/poker/sprint%201/?resume=ab:3", "/poker/sprint%201/join/",
+                       "/export/sprint%201/download.csv", "/api/rooms/sprint%201/backlog/"):
+            self.assertEqual(room_of(target), "sprint 1", target)
+        for target in ("/", "/metrics", "/poker/create/", "/static/js/room.js"):
+            self.assertIsNone(room_of(target), target)
+
+    def test_worker_for(self):
+        """
+        Test que le worker d'une room est stable et que les rooms se répartissent.
+
+        @param self: Instance de la classe.
+        """
+        self.assertEqual(worker_for("alpha", 3), worker_for("alpha", 3))
+        workers = {worker_for(f"room-{index}", 4) for index in range(100)}
+        self.assertEqual(workers, {0, 1, 2, 3})
+
+    def test_worker_count(self):
+        """
+        Test du nombre de workers : entier positif ou "auto".
+
+        @param self: Instance de la classe.
+        """
+        self.assertEqual(worker_count("3"), 3)
+        self.assertEqual(worker_count("auto"), os.cpu_count())
+        for value in ("0", "-2", "many"):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                worker_count(value)
+
+    def test_prepare_request(self):
+        """
+        Test qu'une requête HTTP est limitée à une requête par connexion, qu'un websocket garde
+        son Upgrade, et que l'adresse du client remplace celle qu'il annonce.
+
+        @param self: Instance de la classe.
+        """
+        head = (b"GET /poker/alpha/ HTTP/1.1\r\nHost: x\r\nConnection: keep-alive\r\n"
+                b"X-Forwarded-For: 6.6.6.6\r\n\r\n")
+        target, prepared = prepare_request(head, ("10.0.0.1", 4242))
+        self.assertEqual(target, "/poker/alpha/")
+        self.assertTrue(prepared.endswith(b"\r\n\r\n"))
+        lines = prepared[:-4].split(b"\r\n")
+        self.assertIn(b"Connection: close", lines)
+        self.assertNotIn(b"Connection: keep-alive", lines)
+        self.assertNotIn(b"X-Forwarded-For: 6.6.6.6", lines)
+        self.assertIn(b"X-Forwarded-For: 10.0.0.1", lines)
+
+        head = b"GET /ws/poker/alpha/ HTTP/1.1\r\nConnection: Upgrade\r\nUpgrade: websocket\r\n\r\n"
+        _, prepared = prepare_request(head, None)
+        self.assertEqual(prepared, head)
+
+    async def test_reload_stops_before_starting(self):
+        """
+        Test que le rechargement arrête chaque worker avant de lancer son remplaçant.
+
+        @param self: Instance de la classe.
+        """
+        command = mock.Mock(stdout=StringIO())
+        supervisor = Supervisor(command, "127.0.0.1", 0, 2)
+        events = []
+        old = [mock.Mock(name=f"old-{slot}") for slot in range(2)]
+        supervisor.slots = [(process, 0) for process in old]
+
+        async def stop(process, timeout=15):
+            events.append(("stop", old.index(process)))
+
+        def spawn(slot):
+            events.append(("spawn", slot))
+            supervisor.slots[slot] = (mock.Mock(), time.monotonic())
+
+        with mock.patch.object(supervisor, "stop", stop), mock.patch.object(supervisor, "spawn", spawn):
+            await supervisor.reload()
+        self.assertEqual(events, [("stop", 0), ("spawn", 0), ("stop", 1), ("spawn", 1)])
+
+
+class SupervisorTestCase(RunAsgiTestCase):
+    """
+    Test de `runasgi --workers N` : chaque room servie par un seul worker, relance et rechargement.
+
+    @param RunAsgiTestCase: Serveur runasgi lancé dans un sous-processus.
+    """
+    rooms = ("alpha", "beta", "gamma", "zeta")
+
+    async def join(self, room_name, pseudo):
+        """
+        @brief Connecte un joueur, en réessayant tant que le worker de la room redémarre.
+
+        @return Tuple (websocket, instantané reçu à la connexion).
+        """
+        deadline = time.monotonic() + 30
+        while True:
+            try:
+                connection = await websockets.connect(self.uri(room_name), additional_headers=self.cookie(pseudo))
+                break
+            except (OSError, EOFError, websockets.InvalidHandshake):
+                # connexion acceptée par un worker mourant : le client réessaie, comme room.js
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+        while True:
+            message = json.loads(await asyncio.wait_for(connection.recv(), timeout=10))
+            if message["type"] == "snapshot":
+                return connection, message
+
+    async def receive_vote(self, connection):
+        while True:
+            message = json.loads(await asyncio.wait_for(connection.recv(), timeout=10))
+            vote = message.get("changes", {}).get("vote")
+            if vote:
+                return vote
+
+    async def test_each_room_is_served_by_one_worker(self):
+        """
+        Test que les joueurs d'une même room partagent le même état, avec un channel layer en
+        mémoire propre à chaque processus : toutes leurs connexions vont au même worker.
+
+        @param self: Instance de la classe.
+        """
+        self.assertGreater(len({worker_for(room_name, 3) for room_name in self.rooms}), 1)
+        await sync_to_async(self.start_server)("--workers", "3")
+
+        for room_name in self.rooms:
+            alice, _ = await self.join(room_name, "alice")
+            bob, snapshot = await self.join(room_name, "bob")
+            self.assertEqual(sorted(snapshot["not_voted"]), ["alice", "bob"])
+            await alice.send(json.dumps({"type": "vote", "vote": "5"}))
+            self.assertEqual(await self.receive_vote(bob), {"player": "alice", "vote": "5"})
+            await alice.close()
+            await bob.close()
+
+    async def test_restart_and_reload(self):
+        """
+        Test qu'un worker tué est relancé et que SIGHUP remplace les workers : la room
+        redevient joignable, avec un nouvel état (nouvelle époque).
+
+        @param self: Instance de la classe.
+        """
+        supervisor = await sync_to_async(self.start_server)("--workers", "2")
+        alice, snapshot = await self.join("alpha", "alice")
+        epoch = snapshot["epoch"]
+
+        slot = worker_for("alpha", 2)
+        pid = int(re.findall(rf"Worker {slot} démarré \(pid (\d+)\)", self.server_log())[-1])
+        os.kill(pid, signal.SIGKILL)
+        await asyncio.wait_for(alice.wait_closed(), timeout=10)
+        alice, snapshot = await self.join("alpha", "alice")
+        self.assertNotEqual(snapshot["epoch"], epoch)
+        self.assertIn(f"Worker {slot} terminé", self.server_log())
+
+        epoch = snapshot["epoch"]
+        supervisor.send_signal(signal.SIGHUP)
+        await asyncio.wait_for(alice.wait_closed(), timeout=20)
+        alice, snapshot = await self.join("alpha", "alice")
+        self.assertNotEqual(snapshot["epoch"], epoch)
+        self.assertIn("Rechargement des workers", self.server_log())
+        await alice.close()
@@ -0,0 +1,75 @@
+import json
+from unittest import mock
+from django.test import TestCase
+from django.urls import reverse
+from planning_poker.models import PokerRoom
+from planning_poker import schema
+from planning_poker.schema import BacklogSchemaError, clear_schema_cache, load_backlog, validate_backlog_json
+
+
+class SchemaTestCase(TestCase):
+    """
+    Test pour le validateur de backlog compilé.
+
+    @param TestCase: Classe de test Django.
+    """
+    def setUp(self):
+        """
+        Initialisation du test.
+
+        @param self: Instance de la classe.
+        """
+        clear_schema_cache()
+
+    def test_all_errors_with_paths(self):
+        """
+        Test que toutes les erreurs sont renvoyées, avec leur chemin JSON.
+
+        @param self: Instance de la classe.
+        """
+        document = {
+            "backlog": [{"feature": "A"}, {"feature": ""}, {"title": "C"}, "D", {"feature": "E", "priority": {}}],
+            "all_features": {},
+        }
+        errors = validate_backlog_json(json.dumps(document))
+        self.assertEqual([path for path, _ in errors], [
+            "$.backlog[1].feature",
+            "$.backlog[2].feature",
+            "$.backlog[3]",
+            "$.backlog[4].priority",
+            "$.all_features",
+        ])
+        self.assertEqual(validate_backlog_json("{"), [("$", "le backlog doit être un JSON valide")])
+
+    def test_results_are_memoized(self):
+        """
+        Test qu'un document déjà validé ne l'est pas une seconde fois.
+
+        @param self: Instance de la classe.
+        """
+        raw = json.dumps({"backlog": [{"feature": "A", "points": 3}]})
+        with mock.patch.object(schema, 'validate_document', wraps=schema.validate_document) as validate:
+            self.assertEqual(load_backlog(raw), {"backlog": [{"feature": "A", "points": 3}]})
+            self.assertEqual(load_backlog(raw), {"backlog": [{"feature": "A", "points": 3}]})
+            self.assertEqual(validate_backlog_json(raw.encode()), [])
+        self.assertEqual(validate.call_count, 1)
+
+        with self.assertRaises(BacklogSchemaError):
+            load_backlog('{"all_features": []}')
+
+    def test_views_share_the_validator(self):
+        """
+        Test que create_room et validate_backlog_view renvoient les mêmes erreurs.
+
+        @param self: Instance de la classe.
+        """
+        backlog = json.dumps({"backlog": [{"feature": "A"}, {"feature": 3.5}, {"feature": None}]})
+        response = self.client.post(reverse('validate_backlog'), backlog, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"][0]["path"], "$.backlog[2].feature")
+
+        response = self.client.post(reverse('create_room'), {
+            "room_name": "schema_room", "pseudo": "alice", "mode": "unanimity", "backlog": backlog,
+        })
+        self.assertContains(response, "$.backlog[2].feature")
+        self.assertFalse(PokerRoom.objects.filter(name="schema_room").exists())
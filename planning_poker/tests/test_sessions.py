@@ -0,0 +1,91 @@
+from unittest import mock
+from django.test import TestCase
+from planning_poker.sessions import SessionStore, LocalSessionCache, local_sessions
+
+
+class SessionStoreTestCase(TestCase):
+    """
+    Test pour le moteur de sessions à cache local.
+
+    @param TestCase: Classe de test Django.
+    """
+    def setUp(self):
+        """
+        Initialisation du test.
+
+        @param self: Instance de la classe.
+        """
+        local_sessions.clear()
+        self.session = SessionStore()
+        self.session["pseudo"] = "alice"
+        self.session.save()
+
+    def test_load_without_database(self):
+        """
+        Test de la lecture d'une session enregistrée sans requête SQL.
+
+        @param self: Instance de la classe.
+        """
+        with self.assertNumQueries(0):
+            loaded = SessionStore(self.session.session_key)
+            self.assertEqual(loaded.get("pseudo"), "alice")
+
+    def test_falls_back_to_database(self):
+        """
+        Test du repli sur la base quand les caches sont vides.
+
+        @param self: Instance de la classe.
+        """
+        local_sessions.clear()
+        self.session._cache.cache.clear()
+        with self.assertNumQueries(1):
+            self.assertEqual(SessionStore(self.session.session_key).get("pseudo"), "alice")
+        with self.assertNumQueries(0):
+            self.assertEqual(SessionStore(self.session.session_key).get("pseudo"), "alice")
+
+    def test_save_and_delete_update_local_cache(self):
+        """
+        Test de la mise à jour du cache local à l'enregistrement et à la suppression.
+
+        @param self: Instance de la classe.
+        """
+        session = SessionStore(self.session.session_key)
+        session["pseudo"] = "bob"
+        session.save()
+        self.assertEqual(SessionStore(self.session.session_key).get("pseudo"), "bob")
+
+        session.delete()
+        self.assertIsNone(SessionStore(self.session.session_key).get("pseudo"))
+
+    def test_local_cache_lru_and_ttl(self):
+        """
+        Test de l'éviction LRU et de l'expiration du cache local.
+
+        @param self: Instance de la classe.
+        """
+        cache = LocalSessionCache(max_entries=2, ttl=10)
+        cache.set("a", {"pseudo": "a"})
+        cache.set("b", {"pseudo": "b"})
+        cache.get("a")
+        cache.set("c", {"pseudo": "c"})
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {"pseudo": "a"})
+
+        with mock.patch("planning_poker.sessions.time.monotonic", return_value=float("inf")):
+            self.assertIsNone(cache.get("a"))
+
+    def test_unreachable_shared_cache_falls_back_to_database(self):
+        """
+        Test du repli sur la base quand le cache partagé lève des erreurs.
+
+        @param self: Instance de la classe.
+        """
+        local_sessions.clear()
+        with mock.patch.object(self.session._cache.cache, "get", side_effect=ConnectionError), \
+                mock.patch.object(self.session._cache.cache, "set", side_effect=ConnectionError), \
+                mock.patch.object(self.session._cache.cache, "has_key", side_effect=ConnectionError):
+            self.assertEqual(SessionStore(self.session.session_key).get("pseudo"), "alice")
+            session = SessionStore()
+            session["pseudo"] = "carol"
+            session.save()
+        self.assertIsNotNone(session.session_key)
@@ -0,0 +1,130 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from whitenoise.compress import brotli_installed
+from planning_poker.middleware import AsyncWhiteNoiseMiddleware
+from planning_poker.models import PokerRoom
+from planning_poker.storage import SPRITE_NAME, build_sprite, card_urls, minify_svg
+
+CARDS = os.path.join(settings.BASE_DIR, 'planning_poker', 'static', 'images', 'cards')
+
+
+class StaticPipelineTestCase(TestCase):
+    """
+    Test pour la chaîne des fichiers statiques (minification, planche de cartes, manifeste).
+
+    @param TestCase: Classe de test Django.
+    """
+    def test_minify_svg(self):
+        """
+        Test que la minification retire les données de l'éditeur sans toucher au dessin.
+
+        @param self: Instance de la classe.
+        """
+        with open(os.path.join(CARDS, 'cartes_5.svg'), 'rb') as card:
+            original = card.read()
+        minified = minify_svg(original)
+        self.assertLess(len(minified), len(original) * 0.8)
+        self.assertNotIn(b"inkscape", minified.lower())
+        self.assertNotIn(b"\n", minified)
+        root = ET.fromstring(minified)
+        self.assertEqual(root.get('viewBox'), "0 0 58.264584 90.26458")
+        self.assertEqual(len(root.findall('.//{http://www.w3.org/2000/svg}tspan')), 5)
+
+    def test_sprite_views_and_ids(self):
+        """
+        Test que chaque carte de la planche a sa vue, et que ses identifiants restent uniques.
+
+        @param self: Instance de la classe.
+        """
+        card = (b'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 10 20">'
+                b'<defs><linearGradient id="g" /></defs><rect fill="url(#g)" width="10" height="20" /></svg>')
+        sprite = ET.fromstring(build_sprite([("1", minify_svg(card)), ("2", card)]))
+        views = {view.get('id'): view.get('viewBox') for view in sprite.iter('{http://www.w3.org/2000/svg}view')}
+        self.assertEqual(views, {"card-1": "0 0 10 20", "card-2": "11 0 10 20"})
+        fills = [rect.get('fill') for rect in sprite.iter('{http://www.w3.org/2000/svg}rect')]
+        self.assertEqual(fills, ["url(#1-g)", "url(#2-g)"])
+        self.assertEqual(sprite.get('viewBox'), "0 0 21 20")
+
+
+class CollectStaticTestCase(TestCase):
+    """
+    Test de collectstatic avec le stockage de production.
+
+    @param TestCase: Classe de test Django.
+    """
+    @classmethod
+    def setUpClass(cls):
+        """
+        Collecte des fichiers statiques dans un répertoire temporaire.
+
+        @param cls: Classe de test.
+        """
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.static_root)
+        cls.settings = override_settings(
+            STATIC_ROOT=cls.static_root,
+            STORAGES={**settings.STORAGES, "staticfiles": {"BACKEND": "planning_poker.storage.PokerStaticFilesStorage"}},
+        )
+        cls.settings.enable()
+        cls.addClassCleanup(cls.settings.disable)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        with open(os.path.join(cls.static_root, 'staticfiles.json')) as manifest:
+            cls.manifest = json.load(manifest)['paths']
+
+    def test_sprite_is_fingerprinted_and_compressed(self):
+        """
+        Test que la planche est empreintée, précompressée et référencée par fragments.
+
+        @param self: Instance de la classe.
+        """
+        hashed = self.manifest[SPRITE_NAME]
+        self.assertRegex(hashed, r'^images/cards/deck\.[0-9a-f]{12}\.svg$')
+        path = os.path.join(self.static_root, hashed)
+        self.assertTrue(os.path.exists(path + '.gz'))
+        if brotli_installed:
+            self.assertTrue(os.path.exists(path + '.br'))
+
+        with open(path, 'rb') as sprite:
+            views = {view.get('id') for view in ET.fromstring(sprite.read()).iter('{http://www.w3.org/2000/svg}view')}
+        urls = card_urls()
+        self.assertEqual(len(urls), 11)
+        for url in urls.values():
+            sprite_url, fragment = url.split('#')
+            self.assertEqual(sprite_url, settings.STATIC_URL + hashed)
+            self.assertIn(fragment, views)
+
+    def test_room_page_uses_two_static_files_and_the_sprite(self):
+        """
+        Test que la page d'une room ne référence que les scripts et la planche, servie en
+        cache immuable et compressée.
+
+        @param self: Instance de la classe.
+        """
+        caches['default'].clear()
+        PokerRoom.objects.create_with_backlog(name="static_room", creator="alice", backlog=[{"feature": "A"}])
+        session = self.client.session
+        session['pseudo'] = "alice"
+        session.save()
+        html = self.client.get(reverse('room', args=["static_room"])).content.decode()
+        static_urls = set(re.findall(r'/static/[^"#\\]+', html))
+        self.assertEqual(static_urls, {
+            settings.STATIC_URL + self.manifest['js/protocol.js'],
+            settings.STATIC_URL + self.manifest['js/room.js'],
+            settings.STATIC_URL + self.manifest[SPRITE_NAME],
+        })
+
+        middleware = AsyncWhiteNoiseMiddleware(lambda request: None)
+        request = RequestFactory().get(settings.STATIC_URL + self.manifest[SPRITE_NAME], headers={"accept-encoding": "gzip"})
+        response = middleware(request)
+        self.assertIn("immutable", response.headers["Cache-Control"])
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
@@ -0,0 +1,60 @@
+from django.test import SimpleTestCase
+from planning_poker.models import PokerRoom
+from planning_poker.tally import COFFEE_CARD, RULES, compute_tally, decide
+
+
+class TallyTestCase(SimpleTestCase):
+    """
+    Test pour le décompte des votes et les règles de consensus.
+
+    @param SimpleTestCase: Classe de test Django sans base de données.
+    """
+    def test_statistics(self):
+        """
+        Test des statistiques calculées sur les cartes numériques.
+
+        @param self: Instance de la classe.
+        """
+        tally = compute_tally(["5", 8, "5", "13", COFFEE_CARD])
+        self.assertEqual(tally.count, 5)
+        self.assertEqual(tally.distribution, {"5": 2, "8": 1, "13": 1, COFFEE_CARD: 1})
+        self.assertEqual(tally.modes, ["5"])
+        self.assertEqual(tally.median, 5)
+        self.assertEqual(tally.mean, 7.75)
+        self.assertEqual(tally.spread, 8)
+
+    def test_rules(self):
+        """
+        Test de la valeur retenue par chaque mode.
+
+        @param self: Instance de la classe.
+        """
+        split = compute_tally(["3", "5", "5", "8", "13"])
+        self.assertIsNone(decide('unanimity', split))
+        self.assertIsNone(decide('absolute_majority', split))
+        self.assertEqual(decide('relative_majority', split), "5")
+        self.assertEqual(decide('median', split), "5")
+        self.assertEqual(decide('average', split), "8")
+
+        self.assertEqual(decide('unanimity', compute_tally(["8", "8"])), "8")
+        self.assertEqual(decide('absolute_majority', compute_tally(["8", "8", "3"])), "8")
+        self.assertIsNone(decide('relative_majority', compute_tally(["3", "8"])))
+        self.assertIsNone(decide('unknown', split))
+
+    def test_coffee_break(self):
+        """
+        Test qu'une pause café unanime est retenue dans tous les modes.
+
+        @param self: Instance de la classe.
+        """
+        for mode in RULES:
+            self.assertEqual(decide(mode, compute_tally([COFFEE_CARD, COFFEE_CARD])), COFFEE_CARD)
+
+    def test_every_mode_has_a_rule(self):
+        """
+        Test que chaque mode proposé à la création d'une room a une règle.
+
+        @param self: Instance de la classe.
+        """
+        modes = {value for value, _ in PokerRoom._meta.get_field('mode').choices}
+        self.assertEqual(modes, set(RULES))
@@ -9,7 +9,9 @@ urlpatterns = [
     path('poker/<str:room_name>/', views.room, name='room'),
     path('final_backlog/<str:room_name>/', views.final_backlog_view, name='final_backlog'),
     path('export/<str:room_name>/', views.export_backlog, name='export_backlog'),
+    path('export/<str:room_name>/download.<str:export_format>', views.export_backlog_download, name='export_backlog_download'),
     path('create-backlog/', views.create_backlog_view, name='create_backlog'),
     path('validate-backlog/', views.validate_backlog_view, name='validate_backlog'),
+    path('api/rooms/<str:room_name>/backlog/', views.import_backlog_api, name='import_backlog_api'),
 
 ]
\ No newline at end of file
@@ -1,9 +1,21 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from django.shortcuts import render, redirect
 from .models import PokerRoom
+from .room_cache import aget_room_info
+from .metrics import REGISTRY
+from .export import EXPORT_FORMATS, STREAMS, export_validators, encode
+from .db import db_sync_to_async
+from .importer import BacklogImportError, detect_format, import_backlog
+from .schema import BacklogSchemaError, load_backlog, validate_backlog_json
+from .pages import PAGE_CACHE_TTL, cached_page, page_etag
+from .storage import card_urls
 import json
 import logging
 from django.urls import reverse
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse, Http404, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from django.db import transaction
+from django.views.decorators.cache import cache_page
 
 logger = logging.getLogger(__name__)
 
@@ -20,44 +32,46 @@ def create_room(request):
         pseudo = request.POST.get('pseudo')
         mode = request.POST.get('mode')
         backlog = request.POST.get('backlog')
+        backlog_file = request.FILES.get('backlog_file')
 
-        if not room_name or not pseudo or not mode or not backlog:
+        if not room_name or not pseudo or not mode or not (backlog or backlog_file):
             return render(request, 'create_room.html', {
                 'error': 'Tous les champs sont requis.'
             })
 
+        if backlog_file:
+            try:
+                file_format = detect_format(backlog_file.name)
+                with transaction.atomic():
+                    room, created = PokerRoom.objects.get_or_create(
+                        name=room_name,
+                        creator=pseudo,
+                        defaults={'mode': mode}
+                    )
+                    if created:
+                        import_backlog(room, backlog_file, file_format)
+            except BacklogImportError as e:
+                return render(request, 'create_room.html', {
+                    'error': str(e)
+                })
+            request.session['pseudo'] = pseudo
+            return redirect('room', room_name=room_name)
+
         try:
-            backlog_json = json.loads(backlog)
-
-            if 'backlog' not in backlog_json or not isinstance(backlog_json['backlog'], list):
-                raise ValueError("Le JSON doit contenir un champ 'backlog' avec une liste d'objets.")
-            if not all(isinstance(item, dict) and 'feature' in item for item in backlog_json['backlog']):
-                raise ValueError("Tous les éléments de 'backlog' doivent être des objets avec une clé 'feature'.")
-
-            if 'all_features' in backlog_json:
-                if not isinstance(backlog_json['all_features'], list):
-                    raise ValueError("Le champ 'all_features', s'il est présent, doit être une liste d'objets.")
-                if not all(isinstance(item, dict) and 'feature' in item for item in backlog_json['all_features']):
-                    raise ValueError(
-                        "Tous les éléments de 'all_features' doivent être des objets avec une clé 'feature'.")
-        except json.JSONDecodeError:
-            return render(request, 'create_room.html', {
-                'error': "Le backlog doit être un JSON valide."
-            })
+            backlog_json = load_backlog(backlog)
         except ValueError as e:
             return render(request, 'create_room.html', {
                 'error': str(e)
             })
 
-        room, created = PokerRoom.objects.get_or_create(
-            name=room_name,
-            creator=pseudo,
-            defaults={
-                'mode': mode,
-                'backlog': json.dumps(backlog_json['backlog']),
-                'all_features': json.dumps(backlog_json.get('all_features', []))
-            }
-        )
+        with transaction.atomic():
+            room, created = PokerRoom.objects.get_or_create(
+                name=room_name,
+                creator=pseudo,
+                defaults={'mode': mode}
+            )
+            if created:
+                room.add_features(backlog_json['backlog'], backlog_json.get('all_features', []))
 
         request.session['pseudo'] = pseudo
         return redirect('room', room_name=room_name)
@@ -67,9 +81,10 @@ def create_room(request):
 
 
 
+@cache_page(PAGE_CACHE_TTL)
 def home(request):
     """
-    @brief Affiche la page d'accueil.
+    @brief Affiche la page d'accueil (statique, mise en cache).
 
     @param request Lobjet HTTP request.
 
@@ -98,53 +113,81 @@ def join_room(request, room_name):
     return render(request, 'join_room.html', {'room_name': room_name})
 
 
-def room(request, room_name):
+async def room(request, room_name):
     """
     @brief Affiche la room.
 
+    @details Vue asynchrone : avec la session et la room en cache, la page est servie
+    sans quitter la boucle asyncio, depuis le cache des pages (voir pages.cached_page()).
+
     @param request L'objet HTTP request.
     @param room_name est le nom de la room.
 
     @return Rend la template 'room.html'.
     """
-    pseudo = request.session.get('pseudo', None)
+    pseudo = await request.session.aget('pseudo', None)
     if not pseudo:
         return redirect('create_room')
 
     try:
-        room = PokerRoom.objects.get(name=room_name)
+        room = await aget_room_info(room_name)
     except PokerRoom.DoesNotExist:
         return redirect('create_room')
 
     creator = room.creator
-    backlog = json.loads(room.backlog) if room.backlog else []
-    all_features = json.loads(room.all_features) if room.all_features else []
+    validators = (room.id, room.version, room.updated_at, pseudo)
 
-    return render(request, 'room.html', {
-        'room_name': room_name,
-        'pseudo': pseudo,
-        'creator': creator,
-        'backlog': backlog,
-        'all_features': all_features,
-    })
+    return cached_page(
+        request,
+        'room.html',
+        lambda: {'room_name': room_name, 'pseudo': pseudo, 'creator': creator, 'card_urls': card_urls()},
+        validators,
+        page_etag(*validators),
+    )
 
 
 
-def final_backlog_view(request, room_name):
+async def _aget_room_or_404(room_name):
     """
-    @brief Affiche le backlog final.
-
-    @param request L'objet HTTP.
+    @brief Métadonnées d'une room via le cache des rooms.
 
     @param room_name Le nom de la room.
+
+    @return Un RoomInfo.
+
+    @exception Http404 Si la room n'existe pas.
     """
-    poker_room = get_object_or_404(PokerRoom, name=room_name)
+    try:
+        return await aget_room_info(room_name)
+    except PokerRoom.DoesNotExist:
+        raise Http404("Room introuvable.")
 
-    final_backlog = json.loads(poker_room.all_features)
 
-    return render(request, 'final_backlog.html', {'final_backlog': final_backlog})
+def _timestamp(updated_at):
+    return None if updated_at is None else int(updated_at.timestamp())
 
-def export_backlog(request, room_name):
+
+async def final_backlog_view(request, room_name):
+    """
+    @brief Affiche le backlog final.
+
+    @param request L'objet HTTP.
+
+    @param room_name Le nom de la room.
+    """
+    room = await _aget_room_or_404(room_name)
+    validators = (room.id, room.version, room.updated_at)
+
+    return cached_page(
+        request,
+        'final_backlog.html',
+        {'final_backlog': room.all_features},
+        validators,
+        page_etag(*validators),
+        _timestamp(room.updated_at),
+    )
+
+async def export_backlog(request, room_name):
     """
     @brief Exporte le backlog (fonctionnalités passées et à venir) au format JSON.
 
@@ -153,20 +196,73 @@ def export_backlog(request, room_name):
 
     @return Rend la page 'export_backlog.html' avec le lien de téléchargement.
     """
-    poker_room = get_object_or_404(PokerRoom, name=room_name)
+    poker_room = await _aget_room_or_404(room_name)
+    validators = (poker_room.id, poker_room.version, poker_room.updated_at)
+
+    def context():
+        export_data = {
+            "backlog": poker_room.backlog,
+            "all_features": poker_room.all_features
+        }
+        return {
+            'export_data': json.dumps(export_data, indent=2),
+            'room_name': room_name,
+            'export_formats': list(EXPORT_FORMATS),
+        }
+
+    return cached_page(
+        request,
+        'export_backlog.html',
+        context,
+        validators,
+        page_etag(*validators),
+        _timestamp(poker_room.updated_at),
+    )
+
+
+async def export_backlog_download(request, room_name, export_format):
+    """
+    @brief Télécharge le backlog de la room en JSON, NDJSON ou CSV, en streaming.
 
-    backlog = json.loads(poker_room.backlog) if poker_room.backlog else []
-    all_features = json.loads(poker_room.all_features) if poker_room.all_features else []
+    @details La réponse porte un ETag et un Last-Modified issus de la version de la room :
+    une requête conditionnelle sur un export inchangé reçoit un 304 après une seule requête
+    en base, sans lecture des fonctionnalités. La sortie est compressée en gzip si le client
+    l'accepte. Si un round ou un import modifie la room pendant le téléchargement, le flux
+    est interrompu (export.ExportChanged) : le client reçoit un fichier tronqué en erreur
+    plutôt qu'un mélange de deux versions sous l'ancien ETag.
+
+    @param request L'objet HTTP.
+    @param room_name Le nom de la room.
+    @param export_format 'json', 'ndjson' ou 'csv'.
 
-    export_data = {
-        "backlog": backlog,
-        "all_features": all_features
-    }
+    @return Une StreamingHttpResponse, ou une réponse 304.
 
-    return render(request, 'export_backlog.html', {
-        'export_data': json.dumps(export_data, indent=2),
-        'room_name': room_name
-    })
+    @exception Http404 Si la room ou le format n'existe pas.
+    """
+    if export_format not in EXPORT_FORMATS:
+        raise Http404("Format d'export inconnu.")
+    validators = await db_sync_to_async(export_validators)(room_name)
+    if validators is None:
+        raise Http404("Room introuvable.")
+    room_id, version, updated_at = validators
+
+    gzip = 'gzip' in request.headers.get('Accept-Encoding', '')
+    etag = quote_etag(f"{room_id}-{version}-{export_format}{'-gz' if gzip else ''}")
+    last_modified = int(updated_at.timestamp())
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = StreamingHttpResponse(
+            encode(STREAMS[export_format](room_id, version), gzip=gzip),
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        response.headers['Content-Disposition'] = f'attachment; filename="{room_name}_backlog.{export_format}"'
+        if gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.headers['ETag'] = etag
+    response.headers['Last-Modified'] = http_date(last_modified)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    return response
 
 def create_backlog_view(request):
     """
@@ -179,7 +275,7 @@ def create_backlog_view(request):
     return render(request, 'create_backlog.html')
 
 
-def validate_backlog_view(request):
+async def validate_backlog_view(request):
     """
     @brief Valide le JSON généré par l'utilisateur.
 
@@ -188,17 +284,58 @@ def validate_backlog_view(request):
     @return Renvoie un message de validation ou d'erreur.
     """
     if request.method == "POST":
-        try:
-            backlog_data = json.loads(request.body)
-            if not all(isinstance(item, dict) and 'feature' in item for item in backlog_data.get('backlog', [])):
-                raise ValueError("Le JSON doit contenir des objets avec une clé 'feature'.")
-
+        errors = validate_backlog_json(request.body)
+        if not errors:
             return JsonResponse({"success": True, "message": "Backlog valide !"}, status=200)
-
-        except json.JSONDecodeError:
-            return JsonResponse({"success": False, "message": "Le JSON est invalide."}, status=400)
-        except ValueError as e:
-            return JsonResponse({"success": False, "message": str(e)}, status=400)
+        return JsonResponse({
+            "success": False,
+            "message": str(BacklogSchemaError(errors)),
+            "errors": [{"path": path, "message": message} for path, message in errors],
+        }, status=400)
     else:
         return JsonResponse({"success": False, "message": "Méthode non autorisée."}, status=405)
 
+
+def import_backlog_api(request, room_name):
+    """
+    @brief Ajoute au backlog d'une room les fonctionnalités d'un fichier JSON, NDJSON ou CSV.
+
+    @details Le fichier est envoyé en multipart (champ `file`) ; son format est déduit de
+    son extension. Seul le créateur de la room (pseudo de la session) peut importer, et la
+    requête doit porter le jeton CSRF comme tout formulaire du site.
+
+    @param request: Objet de requête HTTP.
+    @param room_name: Le nom de la room.
+
+    @return JSON {"success", "imported"} ou {"success", "message", "errors"}.
+    """
+    if request.method != "POST":
+        return JsonResponse({"success": False, "message": "Méthode non autorisée."}, status=405)
+    backlog_file = request.FILES.get('file')
+    if backlog_file is None:
+        return JsonResponse({"success": False, "message": "Fichier manquant (champ 'file')."}, status=400)
+    room = PokerRoom.objects.filter(name=room_name).first()
+    if room is None:
+        return JsonResponse({"success": False, "message": "Room introuvable."}, status=404)
+    if request.session.get('pseudo') != room.creator:
+        return JsonResponse({"success": False, "message": "Réservé au créateur de la room."}, status=403)
+    try:
+        imported = import_backlog(room, backlog_file, detect_format(backlog_file.name))
+    except BacklogImportError as e:
+        return JsonResponse({
+            "success": False,
+            "message": str(e),
+            "errors": [{"line": line, "message": message} for line, message in e.errors],
+        }, status=400)
+    return JsonResponse({"success": True, "imported": imported})
+
+
+def metrics_view(request):
+    """
+    @brief Expose les métriques de l'application au format texte Prometheus.
+
+    @param request: Objet de requête HTTP.
+
+    @return Les métriques agrégées sur tous les workers.
+    """
+    return HttpResponse(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,116 @@
+"""
+Configuration du channel layer à partir des variables d'environnement.
+
+Variables lues :
+    POKER_CHANNEL_LAYER        memory, redis (par défaut), pubsub ou hybrid (diffusion en
+                               mémoire dans le processus, Redis entre processus)
+    POKER_REDIS_HOSTS          instances Redis séparées par des virgules (redis://hôte:port/db
+                               ou hôte:port) ; plusieurs instances répartissent les channels
+                               et les groupes par hachage cohérent
+    REDIS_HOST / REDIS_PORT    instance unique, si POKER_REDIS_HOSTS est vide (docker-compose)
+    POKER_LAYER_PREFIX         préfixe des clés Redis (asgi)
+    POKER_LAYER_CAPACITY       messages en attente par channel (100)
+    POKER_LAYER_EXPIRY         durée de vie d'un message non lu, en secondes (60)
+    POKER_LAYER_GROUP_EXPIRY   durée de vie d'une appartenance à un groupe, en secondes (86400)
+"""
+
+import os
+from urllib.parse import urlsplit
+
+from django.core.exceptions import ImproperlyConfigured
+
+LAYER_BACKENDS = {
+    'memory': "channels.layers.InMemoryChannelLayer",
+    'redis': "channels_redis.core.RedisChannelLayer",
+    'pubsub': "channels_redis.pubsub.RedisPubSubChannelLayer",
+    'hybrid': "planning_poker.layers.HybridChannelLayer",
+}
+"""@var LAYER_BACKENDS
+@brief Channel layers sélectionnables par POKER_CHANNEL_LAYER.
+"""
+
+LAYER_DEFAULTS = {
+    'capacity': ('POKER_LAYER_CAPACITY', 100),
+    'expiry': ('POKER_LAYER_EXPIRY', 60),
+    'group_expiry': ('POKER_LAYER_GROUP_EXPIRY', 86400),
+}
+"""@var LAYER_DEFAULTS
+@brief Options de file des layers memory, redis et hybrid : {option: (variable, valeur par défaut)}.
+Le layer pubsub ne stocke pas les messages et les ignore.
+"""
+
+
+def redis_hosts(environ=os.environ):
+    """
+    @brief Instances Redis configurées.
+
+    @param environ Variables d'environnement.
+
+    @return Liste d'URL redis://, dans l'ordre de POKER_REDIS_HOSTS.
+    """
+    hosts = [host.strip() for host in environ.get('POKER_REDIS_HOSTS', '').split(',') if host.strip()]
+    if not hosts:
+        default = 'redis' if 'dockerenable' in environ else 'localhost'
+        hosts = [f"{environ.get('REDIS_HOST') or default}:{environ.get('REDIS_PORT') or 6379}"]
+    return [host if '://' in host else f"redis://{host}" for host in hosts]
+
+
+def redis_url(db, environ=os.environ):
+    """
+    @brief URL d'une base de la première instance Redis (caches partagés).
+
+    @param db Numéro de la base.
+    @param environ Variables d'environnement.
+
+    @return URL redis://hôte:port/db.
+    """
+    return urlsplit(redis_hosts(environ)[0])._replace(path=f"/{db}").geturl()
+
+
+def _integer(environ, name, default):
+    value = environ.get(name)
+    if value is None or value == '':
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ImproperlyConfigured(f"{name} doit être un entier (valeur : {value!r})")
+
+
+def channel_layer_config(kind, hosts=(), environ=os.environ, prefix=None):
+    """
+    @brief Configuration d'un channel layer, au format de CHANNEL_LAYERS.
+
+    @param kind Type de layer (clé de LAYER_BACKENDS).
+    @param hosts Instances Redis (ignorées par le layer memory).
+    @param environ Variables d'environnement (options de file et préfixe).
+    @param prefix Préfixe des clés Redis, à la place de POKER_LAYER_PREFIX.
+
+    @return Dictionnaire {"BACKEND": ..., "CONFIG": ...}.
+
+    @exception ImproperlyConfigured Si le type ou une option est invalide.
+    """
+    if kind not in LAYER_BACKENDS:
+        raise ImproperlyConfigured(
+            f"POKER_CHANNEL_LAYER doit valoir {', '.join(sorted(LAYER_BACKENDS))} (valeur : {kind!r})"
+        )
+    config = {}
+    if kind != 'pubsub':
+        config = {option: _integer(environ, name, default) for option, (name, default) in LAYER_DEFAULTS.items()}
+    if kind != 'memory':
+        config["hosts"] = list(hosts)
+        config["prefix"] = prefix or environ.get('POKER_LAYER_PREFIX') or "asgi"
+    return {"BACKEND": LAYER_BACKENDS[kind], "CONFIG": config}
+
+
+def channel_layers_from_env(environ=os.environ, testing=False):
+    """
+    @brief Valeur de CHANNEL_LAYERS.
+
+    @param environ Variables d'environnement.
+    @param testing Tests en cours : layer en mémoire, quelle que soit la configuration.
+
+    @return Dictionnaire CHANNEL_LAYERS.
+    """
+    kind = 'memory' if testing else environ.get('POKER_CHANNEL_LAYER') or 'redis'
+    return {"default": channel_layer_config(kind, redis_hosts(environ), environ)}
@@ -13,6 +13,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 import sys, os
 
+from .channel_layers import channel_layers_from_env, redis_url
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -52,7 +54,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'planning_poker.middleware.AsyncWhiteNoiseMiddleware',
 ]
 
 ROOT_URLCONF = 'planningpoker.urls'
@@ -61,7 +63,6 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -69,6 +70,13 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # templates compilés une seule fois par processus
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
         },
     },
 ]
@@ -82,10 +90,39 @@ WSGI_APPLICATION = 'planningpoker.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('POKER_DB_NAME') or BASE_DIR / 'db.sqlite3',
     }
 }
 
+# Profil SQLite pour les écritures concurrentes (threads de sync_to_async) :
+# "tuned" (par défaut) ou "default" pour revenir au comportement standard de Django.
+# Comparer les deux avec `python manage.py sqlitebench`.
+POKER_SQLITE_PROFILE = os.environ.get('POKER_SQLITE_PROFILE', 'tuned')
+
+# Threads du pool d'accès à la base depuis le code asynchrone (planning_poker.db).
+# 0 garde le thread unique de sync_to_async : c'est le cas des tests, dont la transaction
+# n'est visible que de ce thread.
+POKER_DB_THREADS = 0 if 'test' in sys.argv else int(os.environ.get('POKER_DB_THREADS', 8))
+POKER_SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',        # les lectures ne bloquent plus les écritures
+    'synchronous': 'NORMAL',      # fsync au checkpoint seulement (sûr en WAL)
+    'busy_timeout': 5000,         # attendre un verrou plutôt qu'échouer (ms)
+    'mmap_size': 134217728,       # 128 Mo lus par mmap
+    'cache_size': -20000,         # 20 Mo de cache de pages par connexion
+}
+
+if POKER_SQLITE_PROFILE == 'tuned':
+    DATABASES['default'].update({
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in POKER_SQLITE_PRAGMAS.items()),
+            # prendre le verrou d'écriture dès BEGIN : évite les "database is locked"
+            # immédiats quand une transaction de lecture veut ensuite écrire
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+    })
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -126,6 +163,16 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+# collectstatic minifie les SVG, assemble la planche de cartes, ajoute une empreinte au nom
+# des fichiers et les précompresse (gzip, brotli) : WhiteNoise les sert en cache immuable.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "planning_poker.storage.PokerStaticFilesStorage"},
+}
+if 'test' in sys.argv:
+    # pas de manifeste en test : les fichiers gardent leur nom d'origine
+    STORAGES["staticfiles"] = {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -133,27 +180,56 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 ASGI_APPLICATION = 'planningpoker.asgi.application'
 
+# Répertoire partagé par les workers pour agréger les métriques exposées sur /metrics
+# (laisser vide en mode mono-processus).
+POKER_METRICS_DIR = os.environ.get('POKER_METRICS_DIR') or None
+
+# File d'envoi des websockets (voir planning_poker.outbox) : messages en attente au-delà
+# desquels un client est fermé, et tampon d'envoi noyau de chaque connexion sous runasgi
+# (octets, 0 pour le réglage du système, voir planning_poker.server).
+POKER_OUTBOX_LIMIT = int(os.environ.get('POKER_OUTBOX_LIMIT', 64))
+POKER_WS_SEND_BUFFER = int(os.environ.get('POKER_WS_SEND_BUFFER', 0)) or None
+
+# Worker courant sous `runasgi --workers N`, renseigné par le superviseur : un worker ne
+# charge l'état que des rooms qui lui sont confiées (voir planning_poker.affinity).
+POKER_WORKER_COUNT = int(os.environ.get('POKER_WORKER_COUNT', 1))
+POKER_WORKER_INDEX = int(os.environ.get('POKER_WORKER_INDEX', 0))
+
+# Channel layer choisi par l'environnement (voir planningpoker.channel_layers) : type,
+# instances Redis (réparties par hachage si plusieurs), capacité et durées de vie.
+CHANNEL_LAYERS = channel_layers_from_env(os.environ, testing='test' in sys.argv)
+
+# Cache partagé des sessions : Redis hors tests, pour que la poignée de main websocket
+# ne dépende pas de la base (voir planning_poker.sessions).
 if 'test' in sys.argv:
-    CHANNEL_LAYERS = {
-        "default": {
-            "BACKEND": "channels.layers.InMemoryChannelLayer",
-        },
-    }
-elif 'dockerenable' in os.environ:
-    CHANNEL_LAYERS = {
-        "default": {
-            'BACKEND': 'channels_redis.core.RedisChannelLayer',
-            "CONFIG": {
-                "hosts": [("redis", 6379)],
-            },
-        },
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "sessions": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "sessions"},
     }
 else:
-    CHANNEL_LAYERS = {
-        "default": {
-            'BACKEND': 'channels_redis.core.RedisChannelLayer',
-            "CONFIG": {
-                "hosts": [("localhost", 6379)],
-            },
+    CACHES = {
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "sessions": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": redis_url(1),
         },
-    }
\ No newline at end of file
+    }
+
+# Sessions : cache du processus, puis Redis, puis base. Pour des sessions sans aucun
+# stockage serveur (le pseudo est signé dans le cookie), utiliser
+# POKER_SESSION_ENGINE=django.contrib.sessions.backends.signed_cookies.
+SESSION_ENGINE = os.environ.get('POKER_SESSION_ENGINE', 'planning_poker.sessions')
+SESSION_CACHE_ALIAS = 'sessions'
+POKER_SESSION_LOCAL_TTL = 30
+POKER_SESSION_LOCAL_MAX_ENTRIES = 10000
+
+# Cache des métadonnées de room : cache du processus (POKER_ROOM_CACHE_LOCAL_TTL secondes),
+# puis, si un alias est donné (par exemple "sessions", servi par Redis), cache partagé
+# entre les workers.
+POKER_ROOM_CACHE_ALIAS = os.environ.get('POKER_ROOM_CACHE_ALIAS') or None
+POKER_ROOM_CACHE_LOCAL_TTL = 5
+
+# Pages HTML rendues en cache (cache "default"), indexées par version de room ; POKER_RELEASE
+# identifie le déploiement (par défaut : empreinte des templates).
+POKER_PAGE_CACHE_TTL = 600
+POKER_RELEASE = os.environ.get('POKER_RELEASE') or None